@@ -0,0 +1,66 @@
+"""Compares drawing many shapes one at a time with the batched shape
+functions.
+
+The loop calls the single-shape function for each shape and joins the
+results once at the end, which is the fastest way to use them.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_batched_shapes.py
+"""
+
+from timeit import default_timer
+
+import numpy as np
+
+from penkit import shapes
+
+NUM_SHAPES = 100000
+SEPARATOR = np.array([np.nan])
+
+
+def loop(function, count):
+    parts = []
+    for i in range(count):
+        x, y = function(i)
+        parts.append((x, y))
+        parts.append((SEPARATOR, SEPARATOR))
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+
+def timed(function, *args, **kwargs):
+    start = default_timer()
+    function(*args, **kwargs)
+    return default_timer() - start
+
+
+def main():
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(0, 100, size=(NUM_SHAPES, 2))
+    radii = rng.uniform(0.5, 2, NUM_SHAPES)
+    angles = rng.uniform(0, 2 * np.pi, NUM_SHAPES)
+    sides = rng.integers(3, 7, NUM_SHAPES)
+
+    cases = [
+        ('circle',
+         lambda: loop(lambda i: shapes.circle(centers[i], radii[i], 20), NUM_SHAPES),
+         lambda: shapes.circles(centers, radii, 20)),
+        ('line',
+         lambda: loop(lambda i: shapes.line(centers[i], length=radii[i], angle=angles[i]),
+                      NUM_SHAPES),
+         lambda: shapes.lines(centers, lengths=radii, angles=angles)),
+        ('ngon',
+         lambda: loop(lambda i: shapes.ngon(sides[i], centers[i]), NUM_SHAPES),
+         lambda: shapes.ngons(sides, centers, radii, angles)),
+    ]
+
+    print('{:,} shapes'.format(NUM_SHAPES))
+    for name, looped, batched in cases:
+        loop_time = timed(looped)
+        batch_time = timed(batched)
+        print('  {:<8} loop {:>7.2f}s  batched {:>7.3f}s  speedup {:>6.0f}x'.format(
+            name, loop_time, batch_time, loop_time / batch_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Measures hidden line removal with ``penkit.camera`` on a 1000x1000
+surface, rasterised and with points tested exactly, for a few cameras.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_camera.py
+"""
+
+from timeit import default_timer
+
+import numpy as np
+
+from penkit.camera import Camera, project_and_occlude_texture
+from penkit.surfaces import make_noise_surface
+from penkit.textures import make_grid_texture
+
+CAMERAS = [
+    Camera(60),
+    Camera(60, azimuth=30),
+    Camera(60, azimuth=30, distance=3),
+]
+
+
+def timed(function):
+    """Returns the result of a function and how long it took."""
+    start = default_timer()
+    result = function()
+    return result, default_timer() - start
+
+
+def main():
+    texture = make_grid_texture(200, 200, 2500)
+    surface = make_noise_surface((1000, 1000), blur=10, seed=1) * 10
+    points = ~np.isnan(texture[0])
+    print('{}x{} surface, {:,} texture points'.format(
+        surface.shape[0], surface.shape[1], int(points.sum())))
+
+    for camera in CAMERAS:
+        layer, elapsed = timed(lambda: project_and_occlude_texture(texture, surface, camera))
+        exact, exact_elapsed = timed(
+            lambda: project_and_occlude_texture(texture, surface, camera, exact=True))
+        hidden = np.isnan(layer[1][points])
+        differ = np.mean(hidden != np.isnan(exact[1][points]))
+        print('  {!r}'.format(camera))
+        print('    rasterised {:>6.2f}s  exact {:>6.2f}s  {:.2%} of points differ'.format(
+            elapsed, exact_elapsed, differ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Compares joining shapes with ``concat`` in a loop against a
+``LayerBuilder``, for increasing numbers of shapes.
+
+``concat`` copies the whole layer on every iteration, so its time per shape
+grows with the number of shapes. The builder's stays about constant.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_layer_builder.py
+"""
+
+from timeit import default_timer
+
+import numpy as np
+
+from penkit import shapes
+from penkit.textures.util import LayerBuilder, concat
+
+COUNTS = (1000, 2000, 4000, 8000, 16000)
+SEPARATOR = ([np.nan], [np.nan])
+
+
+def with_concat(polygons):
+    layer = ([], [])
+    for polygon in polygons:
+        layer = concat([layer, polygon, SEPARATOR])
+    return layer
+
+
+def with_builder(polygons):
+    builder = LayerBuilder()
+    for polygon in polygons:
+        builder.append(polygon)
+    return builder.to_layer()
+
+
+def timed(function, *args):
+    start = default_timer()
+    function(*args)
+    return default_timer() - start
+
+
+def main():
+    print('  {:>7} {:>22} {:>22}'.format('shapes', 'concat (us/shape)', 'builder (us/shape)'))
+    for count in COUNTS:
+        polygons = [shapes.circle((i, 0), 1, 50) for i in range(count)]
+        concat_time = timed(with_concat, polygons)
+        builder_time = timed(with_builder, polygons)
+        print('  {:>7} {:>22.1f} {:>22.1f}'.format(
+            count, 1e6 * concat_time / count, 1e6 * builder_time / count))
+
+
+if __name__ == '__main__':
+    main()
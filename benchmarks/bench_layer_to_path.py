@@ -0,0 +1,58 @@
+"""Compares SVG path serialization throughput against the per-point loop
+that ``penkit.write.layer_to_path`` used previously.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_layer_to_path.py
+"""
+
+from timeit import default_timer
+
+import numpy as np
+
+from penkit.write import layer_to_path
+
+
+def reference_layer_to_path(layer):
+    """The original per-point implementation of ``layer_to_path``."""
+    def gen():
+        draw = False
+        for x, y in zip(*layer):
+            if np.isnan(x) or np.isnan(y):
+                draw = False
+            elif not draw:
+                yield 'M {} {}'.format(x, y)
+                draw = True
+            else:
+                yield 'L {} {}'.format(x, y)
+    return ' '.join(gen())
+
+
+def make_layer(num_points, segment_length=100, seed=0):
+    rng = np.random.RandomState(seed)
+    x = rng.uniform(size=num_points)
+    y = rng.uniform(size=num_points)
+    x[::segment_length] = np.nan
+    y[::segment_length] = np.nan
+    return x, y
+
+
+def time_call(fn, *args):
+    start = default_timer()
+    result = fn(*args)
+    return result, default_timer() - start
+
+
+def main():
+    for num_points in (10 ** 4, 10 ** 5, 10 ** 6):
+        layer = make_layer(num_points)
+        before, before_time = time_call(reference_layer_to_path, layer)
+        after, after_time = time_call(layer_to_path, layer)
+        assert before == after
+        print('{:>9} points: before {:>12,.0f} pts/s, after {:>12,.0f} pts/s ({:.1f}x)'.format(
+            num_points, num_points / before_time, num_points / after_time,
+            before_time / after_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Compares the run time of the noise surface generators across blur sizes.
+
+``make_noise_surface`` blurs with ``gaussian_filter``, whose cost grows with
+the blur. The spectral and tiled generators use FFTs, whose cost barely
+depends on it.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_noise_surface.py
+"""
+
+from timeit import default_timer
+
+import numpy as np
+
+from penkit.surfaces import (
+    make_noise_surface, make_spectral_noise_surface, make_tiled_noise_surface)
+
+DIMS = (2000, 2000)
+BLURS = (2, 8, 32, 64)
+
+
+def timed(function, *args, **kwargs):
+    start = default_timer()
+    function(*args, **kwargs)
+    return default_timer() - start
+
+
+def main():
+    print('{}x{} surface'.format(*DIMS))
+    print('  {:>5} {:>16} {:>16} {:>16} {:>16}'.format(
+        'blur', 'gaussian_filter', 'spectral', 'spectral f32', 'tiled f32'))
+    for blur in BLURS:
+        print('  {:>5} {:>15.2f}s {:>15.2f}s {:>15.2f}s {:>15.2f}s'.format(
+            blur,
+            timed(make_noise_surface, DIMS, blur, seed=0),
+            timed(make_spectral_noise_surface, DIMS, blur, seed=0),
+            timed(make_spectral_noise_surface, DIMS, blur, seed=0, dtype=np.float32),
+            timed(make_tiled_noise_surface, DIMS, blur, seed=0, tile_size=1024)))
+
+
+if __name__ == '__main__':
+    main()
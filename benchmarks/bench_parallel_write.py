@@ -0,0 +1,54 @@
+"""Measures SVG write throughput of a many-layer plot as the number of
+``workers`` passed to ``plot_to_svg`` increases.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_parallel_write.py [max_workers]
+
+``max_workers`` defaults to the number of CPUs. Each line also gives the
+speedup over formatting serially (``workers=1``).
+"""
+
+import multiprocessing
+import sys
+from timeit import default_timer
+
+from penkit.surfaces import make_noise_surface
+from penkit.projection import project_and_occlude_texture
+from penkit.textures import make_grid_texture
+from penkit.write import plot_to_svg
+
+
+def make_plot(layers=6):
+    texture = make_grid_texture(100, 100, 1000)
+    return [
+        project_and_occlude_texture(texture, make_noise_surface(blur=20, seed=seed) * 10, 60)
+        for seed in range(layers)]
+
+
+def main():
+    plot = make_plot()
+    points = sum(len(x) for x, y in plot)
+    print('{} layers ({:,} points)'.format(len(plot), points))
+
+    # Warm up, so the first timing does not include one-off costs.
+    plot_to_svg(plot, 11, 8.5, 'in')
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else multiprocessing.cpu_count()
+
+    for precision in (None, 1e-4):
+        baseline = None
+        serial_time = None
+        for workers in range(1, max_workers + 1):
+            start = default_timer()
+            svg = plot_to_svg(plot, 11, 8.5, 'in', precision=precision, workers=workers)
+            elapsed = default_timer() - start
+            if baseline is None:
+                baseline = svg
+                serial_time = elapsed
+            assert svg == baseline, 'output differs with {} workers'.format(workers)
+            print('  precision={!s:<7} workers={:<3} {:>12,.0f} pts/s  speedup {:.2f}x'.format(
+                precision, workers, points / elapsed, serial_time / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Compares the size and write throughput of full-precision SVG output with
+the compact encoding enabled by the ``precision`` option of ``plot_to_svg``.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_path_encoding.py
+"""
+
+from timeit import default_timer
+
+from penkit.fractal import hilbert_curve
+from penkit.surfaces import make_noise_surface
+from penkit.projection import project_and_occlude_texture
+from penkit.textures import make_grid_texture
+from penkit.write import plot_to_svg
+
+
+def make_plots():
+    yield 'hilbert curve', [hilbert_curve(7, resolution=4)]
+    texture = make_grid_texture(100, 100, 1000)
+    surface = make_noise_surface(blur=20, seed=0) * 10
+    yield 'projected grid', [project_and_occlude_texture(texture, surface, 60)]
+
+
+def main():
+    for name, plot in make_plots():
+        points = sum(len(x) for x, y in plot)
+        print('{} ({:,} points)'.format(name, points))
+        baseline = None
+        for precision in (None, 1e-4, 1e-5):
+            start = default_timer()
+            svg = plot_to_svg(plot, 11, 8.5, 'in', precision=precision)
+            elapsed = default_timer() - start
+            if baseline is None:
+                baseline = len(svg)
+            print('  precision={!s:<7} {:>12,} bytes ({:5.1%}) {:>12,.0f} pts/s'.format(
+                precision, len(svg), len(svg) / float(baseline), points / elapsed))
+
+
+if __name__ == '__main__':
+    main()
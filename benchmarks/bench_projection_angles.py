@@ -0,0 +1,57 @@
+"""Compares rendering turntable frames with one ``project_and_occlude_texture``
+call per angle against ``project_and_occlude_texture_angles``.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_projection_angles.py
+"""
+
+import multiprocessing
+from timeit import default_timer
+
+import numpy as np
+
+from penkit.projection import project_and_occlude_texture, project_and_occlude_texture_angles
+from penkit.surfaces import make_noise_surface
+from penkit.textures import make_grid_texture
+
+FRAMES = 36
+REPEAT = 3
+
+
+def best_time(function):
+    """Returns the result of a function and its fastest time of ``REPEAT`` runs."""
+    times = []
+    for _ in range(REPEAT):
+        start = default_timer()
+        result = function()
+        times.append(default_timer() - start)
+    return result, min(times)
+
+
+def main():
+    texture = make_grid_texture(100, 100, 1000)
+    surface = make_noise_surface((500, 500), blur=20, seed=0) * 10
+    angles = np.linspace(20., 80., FRAMES)
+    print('{} frames, {}x{} surface, {:,} texture points'.format(
+        FRAMES, surface.shape[0], surface.shape[1], len(texture[0])))
+
+    expected, elapsed = best_time(
+        lambda: [project_and_occlude_texture(texture, surface, angle) for angle in angles])
+    print('  {:<24} {:>8.1f} frames/s'.format('per-angle loop', FRAMES / elapsed))
+
+    runs = [('batched', {})]
+    cpus = multiprocessing.cpu_count()
+    if cpus > 1:
+        runs.append(('batched, {} workers'.format(cpus), {'workers': cpus, 'batch_size': 4}))
+
+    for name, kwargs in runs:
+        layers, elapsed = best_time(
+            lambda: project_and_occlude_texture_angles(texture, surface, angles, **kwargs))
+        assert all(np.array_equal(a, b, equal_nan=True)
+                   for layer, other in zip(layers, expected) for a, b in zip(layer, other))
+        print('  {:<24} {:>8.1f} frames/s'.format(name, FRAMES / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Measures how fast ``penkit.raster`` draws a dense plot, compared with
+writing the same plot as SVG.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_raster.py
+"""
+
+from timeit import default_timer
+
+import numpy as np
+
+from penkit.raster import plot_to_png
+from penkit.write import plot_to_svg
+
+
+def make_plot(points):
+    t = np.linspace(0, 2000 * np.pi, points)
+    return [(np.cos(t) * t, np.sin(t) * t)]
+
+
+def main():
+    for points in (1000000, 10000000, 20000000):
+        plot = make_plot(points)
+        print('spiral ({:,} points)'.format(points))
+
+        start = default_timer()
+        png = plot_to_png(plot, 1000, 1000)
+        elapsed = default_timer() - start
+        print('  png {:>12,} bytes {:>8.2f}s {:>12,.0f} pts/s'.format(
+            len(png), elapsed, points / elapsed))
+
+        if points <= 1000000:
+            start = default_timer()
+            svg = plot_to_svg(plot, 1000, 1000)
+            elapsed = default_timer() - start
+            print('  svg {:>12,} bytes {:>8.2f}s {:>12,.0f} pts/s'.format(
+                len(svg), elapsed, points / elapsed))
+
+
+if __name__ == '__main__':
+    main()
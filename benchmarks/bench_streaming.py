@@ -0,0 +1,53 @@
+"""Measures the peak memory of projecting a dense texture and writing it as
+SVG, with the texture generated all at once and as a ``ChunkedLayer``.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_streaming.py
+"""
+
+import os
+import tempfile
+import tracemalloc
+from timeit import default_timer
+
+from penkit.projection import project_and_occlude_texture
+from penkit.surfaces import make_noise_surface
+from penkit.textures import make_lines_texture
+from penkit.write import write_plot
+
+RESOLUTION = 10000
+
+
+def measure(num_lines, surface, chunk_size, filename):
+    tracemalloc.start()
+    start = default_timer()
+    texture = make_lines_texture(num_lines, RESOLUTION, chunk_size=chunk_size)
+    layer = project_and_occlude_texture(texture, surface, 60)
+    write_plot([layer], filename, precision=1e-5)
+    elapsed = default_timer() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    surface = make_noise_surface((1000, 1000), blur=20, seed=0) * 10
+    filename = os.path.join(tempfile.mkdtemp(), 'streaming.svg')
+    try:
+        for num_lines in (100, 1000, 4000):
+            points = num_lines * (RESOLUTION + 1)
+            print('{:,} points'.format(points))
+            for chunk_size in (None, 1000000):
+                if chunk_size is None and num_lines > 1000:
+                    continue
+                elapsed, peak = measure(num_lines, surface, chunk_size, filename)
+                print('  chunk_size={!s:<8} {:>8.1f}s  peak {:>14,} bytes  {:>14,} bytes written'.format(
+                    chunk_size, elapsed, peak, os.path.getsize(filename)))
+    finally:
+        os.remove(filename)
+        os.rmdir(os.path.dirname(filename))
+
+
+if __name__ == '__main__':
+    main()
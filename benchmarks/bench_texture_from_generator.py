@@ -0,0 +1,50 @@
+"""Compares collecting turtle points into a texture through Python lists
+with the preallocated collector in ``texture_from_generator``.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_texture_from_generator.py
+"""
+
+import tracemalloc
+from timeit import default_timer
+
+import numpy as np
+
+from penkit.fractal.l_systems import transform_multiple
+from penkit.turtle import branching_turtle_generator, texture_from_generator, turtle_point_count
+
+PROGRAM = ''.join(transform_multiple('L', {'L': '-RF+LFL+FR-', 'R': '+LF-RFR-FL+'}, 6))
+RESOLUTION = 8
+
+
+def list_texture(generator):
+    return np.array(list(zip(*list(generator))))
+
+
+def measured(function, *args):
+    tracemalloc.start()
+    start = default_timer()
+    result = function(branching_turtle_generator(PROGRAM, 90, resolution=RESOLUTION), *args)
+    elapsed = default_timer() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    size_hint = turtle_point_count(PROGRAM, RESOLUTION)
+    expected, _, _ = measured(list_texture)
+    print('{:,} points'.format(expected.shape[1]))
+    for name, function, args in [
+            ('lists', list_texture, ()),
+            ('chunked', texture_from_generator, ()),
+            ('chunked, size hint', texture_from_generator, (size_hint,))]:
+        texture, elapsed, peak = measured(function, *args)
+        print('{:<20} {:>6.2f}s  peak {:>7.1f} bytes/point  identical={}'.format(
+            name, elapsed, peak / float(texture.shape[1]),
+            np.array_equal(texture, expected, equal_nan=True)))
+
+
+if __name__ == '__main__':
+    main()
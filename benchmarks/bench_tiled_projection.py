@@ -0,0 +1,49 @@
+"""Compares the peak memory and run time of ``project_and_occlude_texture``
+with and without tiling.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_tiled_projection.py
+"""
+
+import tracemalloc
+from timeit import default_timer
+
+import numpy as np
+
+from penkit.projection import project_and_occlude_texture
+from penkit.textures import make_grid_texture
+
+SURFACE_SIZE = 4000
+
+
+def measure(texture, surface, **kwargs):
+    tracemalloc.start()
+    start = default_timer()
+    layer = project_and_occlude_texture(texture, surface, 60, **kwargs)
+    elapsed = default_timer() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return layer, elapsed, peak
+
+
+def main():
+    rng = np.random.RandomState(0)
+    surface = np.cumsum(rng.normal(size=(SURFACE_SIZE, SURFACE_SIZE)), axis=1) / 100.
+    texture = make_grid_texture(200, 200, 2000)
+    print('{0}x{0} surface ({1:,} bytes), {2:,} texture points'.format(
+        SURFACE_SIZE, surface.nbytes, len(texture[0])))
+
+    baseline = None
+    for kwargs in ({}, {'tile_width': 512}, {'tile_width': 128},
+                   {'tile_width': 128, 'dtype': np.float32}):
+        layer, elapsed, peak = measure(texture, surface, **kwargs)
+        if baseline is None:
+            baseline = layer
+        identical = all(np.array_equal(a, b, equal_nan=True) for a, b in zip(layer, baseline))
+        print('  {:<50} {:>7.2f}s  peak {:>14,} bytes  identical={}'.format(
+            str(kwargs), elapsed, peak, identical))
+
+
+if __name__ == '__main__':
+    main()
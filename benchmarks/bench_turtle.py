@@ -0,0 +1,41 @@
+"""Compares interpreting L-system turtle programs a command at a time with
+the numpy interpreter.
+
+Run with penkit installed (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_turtle.py
+"""
+
+from timeit import default_timer
+
+import numpy as np
+
+from penkit.fractal.l_systems import transform_multiple
+from penkit.turtle import turtle_to_texture
+
+SYSTEMS = [
+    ('hilbert', 'L', {'L': '-RF+LFL+FR-', 'R': '+LF-RFR-FL+'}, 7, 90),
+    ('dragon', 'FX', {'X': 'X+YF+', 'Y': '-FX-Y'}, 14, 90),
+    ('tree', 'A', {'F': 'FF', 'A': 'F[+AF-[A]--A][---A]'}, 6, 22.5),
+]
+
+
+def timed(function, *args, **kwargs):
+    start = default_timer()
+    result = function(*args, **kwargs)
+    return result, default_timer() - start
+
+
+def main():
+    for name, axiom, rules, iterations, angle in SYSTEMS:
+        program = ''.join(transform_multiple(axiom, rules, iterations))
+        slow, slow_time = timed(turtle_to_texture, program, angle, vectorized=False)
+        fast, fast_time = timed(turtle_to_texture, program, angle, vectorized=True)
+        print('{:<8} {:>10,} commands  generator {:>7.2f}s  numpy {:>7.3f}s  '
+              'speedup {:>5.0f}x  identical={}'.format(
+                  name, len(program), slow_time, fast_time, slow_time / fast_time,
+                  np.array_equal(slow, fast, equal_nan=True)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,5 @@
 import numpy as np
 from penkit import shapes
-from penkit.preview import show_layer
-from penkit.textures.util import concat, rotate_texture, translate, center
 from penkit.write import write_plot
 
 x_count = 18
@@ -9,14 +7,21 @@ y_count = 12
 grid_spacing = 1.7
 jitter = 0.9
 
-l = ([], [])
+sides = []
+rotations = []
+offsets = []
 for i in range(x_count * y_count):
     x, y = (i % x_count), (i // x_count)
-    polygon = shapes.ngon(np.random.randint(3, 7))
-    polygon = rotate_texture(polygon, np.random.uniform(0, 360))
-    polygon = center(polygon)
-    polygon = translate(polygon, (grid_spacing*x, grid_spacing*y))
-    polygon = translate(polygon, (jitter * np.random.uniform(), jitter * np.random.uniform()))
-    l = concat([l, polygon])
+    sides.append(np.random.randint(3, 7))
+    rotations.append(np.random.uniform(0, 360))
+    offsets.append((grid_spacing*x + jitter * np.random.uniform(),
+                    grid_spacing*y + jitter * np.random.uniform()))
+sides = np.array(sides)
 
-write_plot([l], 'examples/polygon_confetti.svg', height=8.5, width=11.0)
\ No newline at end of file
+# Each polygon used to be drawn with shapes.ngon, which starts from a corner
+# with its first side along the x axis, then rotated clockwise, centred and
+# translated by minus its offset.
+angles = -np.pi / 2 - np.pi / sides - np.radians(rotations)
+l = shapes.ngons(sides, -np.array(offsets), angles=angles)
+
+write_plot([l], 'examples/polygon_confetti.svg', height=8.5, width=11.0)
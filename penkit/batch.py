@@ -0,0 +1,266 @@
+"""The ``batch`` module renders many variants of a plot, one for each
+combination of parameters in a grid, across a pool of processes.
+
+A design is any function which takes keyword arguments and returns a plot
+(or a single layer). For example, to render a plaid texture for every
+combination of two seeds and three values of ``keep_prob``::
+
+    from penkit.batch import render_batch
+
+    def plaid(seed, keep_prob):
+        return [make_plaid_texture(keep_prob=keep_prob, seed=seed)]
+
+    render_batch(plaid, {'seed': [0, 1], 'keep_prob': [0.3, 0.5, 0.7]},
+                 'out/plaid-{seed}-{keep_prob}.svg')
+
+The same can be done from the command line, if ``plaid`` is defined in an
+importable module ``designs``::
+
+    penkit-batch designs:plaid -p seed=0:2 -p keep_prob=0.3,0.5,0.7 \\
+        -o 'out/plaid-{seed}-{keep_prob}.svg'
+
+Outputs which already exist are skipped, so an interrupted batch can be
+resumed by running it again. A job which raises an exception is reported
+as failed without stopping the rest of the batch.
+"""
+
+import argparse
+import ast
+import importlib
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+import traceback
+from collections import namedtuple
+from timeit import default_timer
+
+from penkit.layer import is_layer
+from penkit.write import write_plot
+
+logger = logging.getLogger(__name__)
+
+JOB_OK = 'ok'
+JOB_SKIPPED = 'skipped'
+JOB_FAILED = 'failed'
+
+JobResult = namedtuple('JobResult', ['params', 'filename', 'status', 'elapsed', 'error'])
+JobResult.__doc__ = """The outcome of rendering one combination of parameters.
+
+Attributes:
+    params (dict): the keyword arguments passed to the design function
+    filename (str): the output file
+    status (str): one of ``JOB_OK``, ``JOB_SKIPPED`` or ``JOB_FAILED``
+    elapsed (float): the time taken to render and write the plot, in seconds
+    error (str): the traceback of the exception if the job failed
+"""
+
+
+def parameter_grid(grid):
+    """Expands a parameter grid into every combination of its values.
+
+    Args:
+        grid (dict): maps each parameter name to a list of values
+
+    Returns:
+        list: a dict of keyword arguments for each combination
+
+    Examples:
+        >>> parameter_grid({'seed': [0, 1], 'keep_prob': [0.5]})
+        [{'seed': 0, 'keep_prob': 0.5}, {'seed': 1, 'keep_prob': 0.5}]
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def _render_job(job):
+    """Renders a single plot to a file, catching any exception."""
+    function, params, filename, write_kwargs = job
+    start = default_timer()
+    try:
+        plot = function(**params)
+        if is_layer(plot):
+            plot = [plot]
+
+        directory = os.path.dirname(filename)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # Write to a temporary name so a failed or interrupted job never
+        # leaves a partial file which would be skipped on the next run.
+        partial = filename + '.partial'
+        write_kwargs = dict(write_kwargs)
+        write_kwargs.setdefault('compress', filename.lower().endswith('.svgz'))
+        write_plot(plot, partial, **write_kwargs)
+        os.replace(partial, filename)
+    except Exception:
+        return JobResult(params, filename, JOB_FAILED, default_timer() - start,
+                         traceback.format_exc())
+    return JobResult(params, filename, JOB_OK, default_timer() - start, None)
+
+
+def iter_render_batch(function, grid, output, workers=None, overwrite=False, **kwargs):
+    """Renders a plot for each combination of parameters, yielding the result
+    of each job as it finishes.
+
+    See ``render_batch`` for a description of the arguments.
+
+    Yields:
+        JobResult: the result of each job. Skipped jobs come first; the rest
+        come in the order they finish.
+    """
+    jobs = []
+    for params in parameter_grid(grid):
+        filename = output.format(**params)
+        if not overwrite and os.path.exists(filename):
+            yield JobResult(params, filename, JOB_SKIPPED, 0., None)
+        else:
+            jobs.append((function, params, filename, kwargs))
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    workers = min(workers, len(jobs))
+
+    if workers <= 1:
+        for job in jobs:
+            yield _render_job(job)
+        return
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        for result in pool.imap_unordered(_render_job, jobs):
+            yield result
+    finally:
+        pool.terminate()
+
+
+def render_batch(function, grid, output, workers=None, overwrite=False, **kwargs):
+    """Renders a plot for each combination of parameters and writes it to a
+    file with ``penkit.write.write_plot``.
+
+    Args:
+        function (callable): a function which takes the parameters as keyword
+            arguments and returns a plot or a single layer. It must be
+            importable by name (defined at the top level of a module) so it
+            can be sent to the worker processes.
+        grid (dict): maps each parameter name to a list of values
+        output (str): the output filename, as a ``str.format`` pattern which
+            is filled in with the parameters, e.g. ``'out/plot-{seed}.svg'``
+        workers (int): the number of processes to render in. By default, one
+            per CPU. With one worker, jobs run in the calling process.
+        overwrite (bool): if true, render outputs which already exist
+        **kwargs: passed on to ``write_plot`` (e.g. ``width``, ``precision``)
+
+    Returns:
+        list: the ``JobResult`` of each job
+
+    Examples:
+        >>> import tempfile
+        >>> from penkit.layer import ChunkedLayer
+        >>> def design(n):
+        ...     return ChunkedLayer.from_layer(([0., n, 2., 3.], [0., 1., 2., 3.]), 2)
+        >>> output = os.path.join(tempfile.mkdtemp(), 'plot-{n}.svg')
+        >>> [result.status for result in render_batch(design, {'n': [1]}, output, workers=1)]
+        ['ok']
+        >>> with open(output.format(n=1)) as f:
+        ...     f.read().count('inkscape:groupmode')
+        1
+    """
+    results = []
+    for result in iter_render_batch(function, grid, output, workers, overwrite, **kwargs):
+        if result.status == JOB_FAILED:
+            logger.error('Failed to render %s:\n%s', result.filename, result.error)
+        else:
+            logger.info('%s %s (%.2fs)', result.status, result.filename, result.elapsed)
+        results.append(result)
+    return results
+
+
+def _load_function(name):
+    """Imports a function given as ``module:function``."""
+    module_name, _, function_name = name.partition(':')
+    if not function_name:
+        raise ValueError('Expected module:function, got {!r}'.format(name))
+    sys.path.insert(0, os.getcwd())
+    function = importlib.import_module(module_name)
+    for attribute in function_name.split('.'):
+        function = getattr(function, attribute)
+    return function
+
+
+def _parse_value(text):
+    """Parses a parameter value as a Python literal, or else a string."""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def _parse_param(text):
+    """Parses a ``--param`` argument into a name and list of values.
+
+    Values are given as a comma-separated list or as an integer range
+    ``start:stop`` (excluding ``stop``).
+
+    Examples:
+        >>> _parse_param('seed=0:3')
+        ('seed', [0, 1, 2])
+        >>> _parse_param("keep_prob=0.3,0.5,'x'")
+        ('keep_prob', [0.3, 0.5, 'x'])
+    """
+    name, sep, values = text.partition('=')
+    if not sep or not name:
+        raise argparse.ArgumentTypeError('Expected name=values, got {!r}'.format(text))
+    if values.count(':') == 1 and ',' not in values:
+        start, stop = values.split(':')
+        try:
+            return name, list(range(int(start), int(stop)))
+        except ValueError:
+            pass
+    return name, [_parse_value(value) for value in values.split(',')]
+
+
+def main(args=None):
+    """Runs a batch render from the command line."""
+    parser = argparse.ArgumentParser(
+        prog='penkit-batch',
+        description='Render a plot for each combination of parameters.')
+    parser.add_argument('function', help='the design function, as module:function')
+    parser.add_argument('-p', '--param', action='append', type=_parse_param, default=[],
+                        help='a parameter and its values, as name=v1,v2,... or name=start:stop')
+    parser.add_argument('-o', '--output', required=True,
+                        help='output filename pattern, e.g. out/plot-{seed}.svg')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='number of processes (default: one per CPU)')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='render outputs which already exist')
+    parser.add_argument('--width', type=float, help='page width')
+    parser.add_argument('--height', type=float, help='page height')
+    parser.add_argument('--unit', help='page unit')
+    parser.add_argument('--precision', type=float,
+                        help='write compact path data rounded to this fraction of the width')
+    parser.add_argument('--simplify', type=float,
+                        help='simplify lines to this tolerance, in page units')
+    args = parser.parse_args(args)
+
+    kwargs = dict((name, getattr(args, name))
+                  for name in ('width', 'height', 'unit', 'precision', 'simplify')
+                  if getattr(args, name) is not None)
+    function = _load_function(args.function)
+
+    counts = dict.fromkeys((JOB_OK, JOB_SKIPPED, JOB_FAILED), 0)
+    start = default_timer()
+    for result in iter_render_batch(function, dict(args.param), args.output,
+                                    args.workers, args.overwrite, **kwargs):
+        counts[result.status] += 1
+        print('{:<7} {:>8.2f}s  {}'.format(result.status, result.elapsed, result.filename))
+        if result.error:
+            print(result.error, file=sys.stderr)
+    print('{} rendered, {} skipped, {} failed in {:.2f}s'.format(
+        counts[JOB_OK], counts[JOB_SKIPPED], counts[JOB_FAILED], default_timer() - start))
+    return 1 if counts[JOB_FAILED] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
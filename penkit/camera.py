@@ -0,0 +1,592 @@
+"""The ``camera`` module projects textures on surfaces as seen by a camera
+placed anywhere around the surface, with hidden lines removed.
+
+``penkit.projection`` tilts a surface about the x axis and removes hidden
+lines with a running maximum down each column, which only works for that
+camera. Here the camera can also be rotated about the vertical axis and
+can use a perspective projection, and hidden lines are removed with a
+depth buffer.
+
+The surface is treated as a solid, as it is by ``penkit.projection``: the
+cell centres of the surface are joined into triangles, and walls are
+dropped from its edges to its lowest point. The triangles facing the
+camera are projected and rasterised into a grid of cells over the image,
+which keeps the nearest triangle at the centre of each cell. A texture
+point is hidden if it is behind the plane of the triangle kept by its
+cell, by more than a bias of about a cell that allows for the surface
+curving away from that plane. Optionally, each point can instead be tested
+exactly against every triangle in its cell that covers it. Points are
+tested where they lie on the triangles, so a visible point is level with
+the surface up to rounding.
+
+Surfaces and textures follow the same conventions as
+``penkit.projection``: the texture spans ``[0, 1]`` in ``x`` and ``y``,
+and the surface gives the height above each point. ``ChunkedLayer``
+textures are projected lazily, a chunk at a time. An ``ImplicitSurface``
+is evaluated at each texture point, and sampled on its grid for the depth
+buffer.
+"""
+
+import numpy as np
+
+from penkit.layer import ChunkedLayer, layer_coordinates
+from penkit.projection import DEFAULT_ANGLE, _occluded_layer, map_texture_to_surface
+from penkit.surfaces import surface_grid
+
+# Points this many depth buffer cells behind the surface are still drawn,
+# to allow for the surface curving away from the plane it is tested against
+DEFAULT_DEPTH_BIAS = 1.
+
+# The same, when points are tested exactly, to allow for rounding
+EXACT_DEPTH_BIAS = .01
+
+# The most (point, triangle) pairs, or rows of triangles, handled at a time
+RASTER_BATCH_SIZE = 2 ** 20
+
+# The grid of the depth buffer has square cells, and is at most this many
+# times longer than it is wide
+MAX_GRID_ASPECT = 16.
+
+
+class Camera(object):
+    """A camera looking at the centre of a surface.
+
+    With the default azimuth and no ``distance``, this is the camera used
+    by ``penkit.projection``. The points removed as hidden then agree with
+    ``penkit.projection.project_and_occlude_texture`` except near outlines,
+    as the surface between cell centres is made of steps there and of
+    triangles here, and the depth buffer is only exact to within a cell.
+    On smooth surfaces, this is about 3% of the points, or 1% when they are
+    tested exactly.
+
+    Args:
+        elevation (float): the angle between the camera and the vertical, in
+            degrees (0 = overhead, 90 = side view)
+        azimuth (float): the rotation of the camera about the vertical axis,
+            in degrees counterclockwise
+        distance (float): if provided, the distance from the camera to the
+            centre of the surface, in texture widths, for a perspective
+            projection. By default, the projection is orthographic.
+    """
+
+    def __init__(self, elevation=DEFAULT_ANGLE, azimuth=0., distance=None):
+        self.elevation = elevation
+        self.azimuth = azimuth
+        self.distance = distance
+
+    def __repr__(self):
+        return 'Camera(elevation={!r}, azimuth={!r}, distance={!r})'.format(
+            self.elevation, self.azimuth, self.distance)
+
+    def project(self, x, y, z):
+        """Projects points to the image plane.
+
+        Args:
+            x (np.array): the x coordinates of the points on the texture
+            y (np.array): the y coordinates of the points on the texture
+            z (np.array): the height of the points
+
+        Returns:
+            tuple: the x and y image coordinates of the points, and their
+            depth (distance from the camera along its view direction, up to
+            a constant). Points behind a perspective camera have ``nan``
+            coordinates.
+        
+        Examples:
+            >>> Camera(elevation=0).project(np.array([.25]), np.array([.75]), np.array([.1]))
+            (array([0.25]), array([0.75]), array([-0.1]))
+        """
+        azimuth = np.radians(self.azimuth)
+        elevation = np.radians(self.elevation)
+
+        # Coordinates relative to the centre of the surface.
+        x = np.asarray(x, dtype=float) - .5
+        y = np.asarray(y, dtype=float) - .5
+        image_x = x * np.cos(azimuth) + y * np.sin(azimuth)
+        rotated_y = y * np.cos(azimuth) - x * np.sin(azimuth)
+
+        image_y = rotated_y * np.cos(elevation) + z * np.sin(elevation)
+        depth = rotated_y * np.sin(elevation) - z * np.cos(elevation)
+
+        if self.distance is not None:
+            depth = depth + self.distance
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scale = np.where(depth > 0, self.distance / depth, np.nan)
+            image_x = image_x * scale
+            image_y = image_y * scale
+
+        # Move the centre back to where penkit.projection draws it.
+        return image_x + .5, image_y + .5 * np.cos(elevation), depth
+
+
+def _surface_points(surface):
+    """Returns the texture coordinates and heights of the cell centres of a
+    surface, flattened."""
+    surface_h, surface_w = surface.shape
+    y, x = np.meshgrid(
+        (np.arange(surface_h) + .5) / surface_h,
+        (np.arange(surface_w) + .5) / surface_w, indexing='ij')
+    return x.reshape(-1), y.reshape(-1), np.asarray(surface, dtype=float).reshape(-1)
+
+
+def _surface_triangles(shape):
+    """Joins the cell centres of a surface into triangles.
+
+    Each square of four neighbouring centres is split along the diagonal
+    from its first to its last corner, as ``_triangle_points`` assumes. The
+    corners of each triangle go counterclockwise seen from above.
+
+    Returns:
+        np.array: a ``(T, 3)`` array of indices into the flattened centres
+    """
+    surface_h, surface_w = shape
+    first = (np.arange(surface_h - 1)[:, np.newaxis] * surface_w +
+             np.arange(surface_w - 1)).reshape(-1)
+    last = first + surface_w + 1
+    return np.concatenate([
+        np.column_stack([first, first + 1, last]),
+        np.column_stack([first, last, first + surface_w])])
+
+
+def _solid_points(surface):
+    """Returns the cell centres of a surface and the triangles of a solid
+    with the surface as its top, and walls down to its lowest point. The
+    corners of each triangle go counterclockwise seen from outside.
+
+    Returns:
+        tuple: the x, y and z coordinates of the points, and a ``(T, 3)``
+        array of the indices of the corners of each triangle
+    """
+    surface_h, surface_w = surface.shape
+    x, y, z = _surface_points(surface)
+
+    # The edge of the surface, once around
+    index = np.arange(surface_h * surface_w).reshape(surface_h, surface_w)
+    edge = np.concatenate([
+        index[0, :-1], index[:-1, -1], index[-1, :0:-1], index[:0:-1, 0]])
+    if not len(edge):
+        edge = index.reshape(-1)
+    top = edge
+    bottom = len(x) + np.arange(len(edge))
+    next_top = np.roll(top, -1)
+    next_bottom = np.roll(bottom, -1)
+    walls = np.concatenate([
+        np.column_stack([top, next_bottom, next_top]),
+        np.column_stack([top, bottom, next_bottom])])
+
+    x = np.concatenate([x, x[edge]])
+    y = np.concatenate([y, y[edge]])
+    z = np.concatenate([z, np.full(len(edge), z.min())])
+    return x, y, z, np.concatenate([_surface_triangles(surface.shape), walls])
+
+
+def _triangle_points(surface, texture_x, texture_y):
+    """Places texture points on the triangles joining the cell centres of a
+    surface (see ``_surface_triangles``).
+
+    Points between the outer cell centres and the edge of the texture are
+    moved to the nearest point on the outer triangles.
+
+    Returns:
+        tuple: the x, y and z coordinates of the points
+    """
+    surface_h, surface_w = surface.shape
+    separators = np.isnan(texture_x) | np.isnan(texture_y)
+    column = np.clip(np.nan_to_num(texture_x * surface_w - .5), 0, surface_w - 1)
+    row = np.clip(np.nan_to_num(texture_y * surface_h - .5), 0, surface_h - 1)
+    left = np.clip(np.floor(column), 0, max(surface_w - 2, 0)).astype(np.intp)
+    top = np.clip(np.floor(row), 0, max(surface_h - 2, 0)).astype(np.intp)
+    fraction_x = column - left
+    fraction_y = row - top
+    right = np.minimum(left + 1, surface_w - 1)
+    bottom = np.minimum(top + 1, surface_h - 1)
+
+    first = surface[top, left]
+    last = surface[bottom, right]
+    # Below the diagonal, the triangle through the next corner in x.
+    upper = fraction_x >= fraction_y
+    middle = np.where(upper, surface[top, right], surface[bottom, left])
+    along = np.where(upper, fraction_x, fraction_y)
+    across = np.where(upper, fraction_y, fraction_x)
+    heights = first + along * (middle - first) + across * (last - middle)
+    return ((column + .5) / surface_w + np.where(separators, np.nan, 0.),
+            (row + .5) / surface_h + np.where(separators, np.nan, 0.),
+            np.where(separators, np.nan, heights))
+
+
+def _triangle_planes(corners_x, corners_y, corners_depth):
+    """Finds the planes of triangles in the image.
+
+    Args:
+        corners_x (np.array): a ``(T, 3)`` array of the x image coordinates
+            of the corners of each triangle
+        corners_y (np.array): the y image coordinates of the corners
+        corners_depth (np.array): the depth of the corners
+
+    Returns:
+        tuple: a ``(T, 3, 3)`` array giving, for each triangle, the
+        barycentric weights of its first two corners and the depth as
+        ``[x, y, 1]`` coefficients (see ``_plane_depth``), and twice the
+        signed area of each triangle
+    """
+    x0, x1, x2 = corners_x.T
+    y0, y1, y2 = corners_y.T
+    d0, d1, d2 = corners_depth.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        area = (y1 - y2) * (x0 - x2) + (x2 - x1) * (y0 - y2)
+        a = np.stack([(y1 - y2) / area, (x2 - x1) / area], axis=-1)
+        b = np.stack([(y2 - y0) / area, (x0 - x2) / area], axis=-1)
+    depth = a * (d0 - d2)[:, np.newaxis] + b * (d1 - d2)[:, np.newaxis]
+    corner = np.stack([x2, y2], axis=-1)
+    planes = np.stack([a, b, depth], axis=1)
+    offsets = -(planes * corner[:, np.newaxis]).sum(axis=-1)
+    offsets[:, 2] += d2
+    return np.concatenate([planes, offsets[..., np.newaxis]], axis=-1), area
+
+
+def _plane_depth(planes, x, y):
+    """Returns the depth of the planes of triangles (see
+    ``_triangle_planes``) at image points, and whether each point is inside
+    its triangle."""
+    values = planes[:, :, 0] * x[:, np.newaxis] + planes[:, :, 1] * y[:, np.newaxis]
+    values += planes[:, :, 2]
+    a, b, depth = values.T
+    return depth, (a >= -1e-9) & (b >= -1e-9) & (a + b <= 1 + 1e-9)
+
+
+def _covered_depth(planes, x, y):
+    """Returns the depth of the planes of triangles at image points, or
+    ``inf`` where a point is outside its triangle."""
+    depth, inside = _plane_depth(planes, x, y)
+    depth[~inside] = np.inf
+    return depth
+
+
+class DepthBuffer(object):
+    """The triangles of a projected surface, seen as a solid, rasterised into
+    a grid of cells over the image, for finding the depth of the nearest
+    surface at any image point.
+
+    Each cell keeps the nearest triangle covering its centre, found with a
+    scatter-min of the depths of the triangles there. The depth at a point
+    is that of the plane of the triangle kept by its cell, which is exact
+    if the point is on that triangle and close to it on the triangles
+    around it. With ``exact``, the triangles are instead listed in every
+    cell they may overlap and each point is tested against all of those
+    that cover it. This is exact everywhere, but several times slower.
+
+    Args:
+        surface (surface): the surface to project
+        camera (Camera): the camera to project with
+        resolution (int): the number of cells across the larger dimension of
+            the image. By default, there are about as many cells as points
+            on the surface.
+        exact (bool): if true, test points against every triangle they may
+            be in, rather than against the triangle kept by their cell
+    """
+
+    def __init__(self, surface, camera, resolution=None, exact=False):
+        surface = surface_grid(surface)
+        x, y, z, triangles = _solid_points(surface)
+        image_x, image_y, depth = camera.project(x, y, z)
+        in_view = ~np.isnan(image_x)
+        self.origin = image_x[in_view].min(), image_y[in_view].min()
+        width = image_x[in_view].max() - self.origin[0]
+        height = image_y[in_view].max() - self.origin[1]
+
+        if resolution is None:
+            aspect = min(max(width, height) / (min(width, height) or 1.), MAX_GRID_ASPECT)
+            resolution = int(np.ceil(np.sqrt(surface.size * aspect)))
+        self.cell_size = max(width, height) / resolution or 1.
+        self.shape = (int(height / self.cell_size) + 1, int(width / self.cell_size) + 1)
+        self.exact = exact
+
+        # Only triangles facing the camera can be the nearest surface, as the
+        # surface is a solid.
+        corners_x, corners_y = image_x[triangles], image_y[triangles]
+        planes, area = _triangle_planes(corners_x, corners_y, depth[triangles])
+        with np.errstate(invalid='ignore'):
+            drawn = area > 0
+        self.planes = planes[drawn]
+
+        # The cells the bounding box of each triangle overlaps, or for the
+        # raster, the cells whose centres are within it
+        offset, round_low = (0., np.floor) if exact else (-.5, np.ceil)
+        low_column, low_row = self._cells(
+            corners_x[drawn].min(axis=1), corners_y[drawn].min(axis=1), offset, round_low)
+        high_column, high_row = self._cells(
+            corners_x[drawn].max(axis=1), corners_y[drawn].max(axis=1), offset)
+        self.columns = high_column - low_column + 1
+        self.low_row = low_row
+        self.rows = np.where(self.columns > 0, np.maximum(high_row - low_row + 1, 0), 0)
+        self.counts = np.maximum(self.columns, 0) * self.rows
+        self.first_cell = low_row * self.shape[1] + low_column
+
+        if exact:
+            self._bin_triangles()
+        else:
+            self._rasterize_triangles()
+
+    def _cells(self, image_x, image_y, offset=0., round=np.floor):
+        """Returns the column and row of the cells containing image points,
+        or with ``offset`` and ``round``, of other cells nearby."""
+        column = round((image_x - self.origin[0]) / self.cell_size + offset)
+        row = round((image_y - self.origin[1]) / self.cell_size + offset)
+        return (np.clip(column, 0, self.shape[1] - 1).astype(np.intp),
+                np.clip(row, 0, self.shape[0] - 1).astype(np.intp))
+
+    def _triangle_cells(self, begin, end):
+        """Lists the cells within the bounding boxes of a range of triangles.
+
+        Returns:
+            tuple: the triangle and the flattened index of each cell
+        """
+        counts = self.counts[begin:end]
+        columns = np.repeat(self.columns[begin:end], counts)
+        position = np.arange(len(columns)) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell = (np.repeat(self.first_cell[begin:end], counts) +
+                position // columns * self.shape[1] + position % columns)
+        return np.repeat(np.arange(begin, end), counts), cell
+
+    def _triangle_batches(self, sizes):
+        """Splits the triangles into ranges whose ``sizes`` add up to about
+        ``RASTER_BATCH_SIZE``."""
+        ends = np.cumsum(sizes)
+        if not len(ends):
+            return []
+        batches = np.searchsorted(ends, np.arange(RASTER_BATCH_SIZE, ends[-1], RASTER_BATCH_SIZE))
+        return zip(np.append(0, batches), np.append(batches, len(ends)))
+
+    def _bin_triangles(self):
+        """Lists the triangles overlapping each cell, for ``exact`` depths."""
+        triangles, cells = [], []
+        for begin, end in self._triangle_batches(self.counts):
+            triangle, cell = self._triangle_cells(begin, end)
+            triangles.append(triangle)
+            cells.append(cell)
+        triangle = np.concatenate(triangles or [np.zeros(0, dtype=np.intp)])
+        cell = np.concatenate(cells or [np.zeros(0, dtype=np.intp)])
+        order = np.argsort(cell, kind='stable')
+        self.cell_triangles = triangle[order]
+        self.cell_starts = np.searchsorted(cell[order], np.arange(self.shape[0] * self.shape[1] + 1))
+
+    def _rasterize_triangles(self):
+        """Finds the nearest triangle covering the centre of each cell, or -1
+        where there is none."""
+        nearest = np.full(self.shape[0] * self.shape[1], np.inf)
+        self.cell_triangle = np.full(len(nearest), -1, dtype=np.intp)
+        for begin, end in self._triangle_batches(self.rows):
+            triangle, row, low_column, columns = self._triangle_spans(begin, end)
+            starts = np.cumsum(columns) - columns
+            position = np.arange(columns.sum()) - np.repeat(starts, columns)
+            column = np.repeat(low_column, columns) + position
+            row = np.repeat(row, columns)
+            triangle = np.repeat(triangle, columns)
+            cell = row * self.shape[1] + column
+            depth, _ = _plane_depth(
+                self.planes[triangle],
+                self.origin[0] + (column + .5) * self.cell_size,
+                self.origin[1] + (row + .5) * self.cell_size)
+            np.minimum.at(nearest, cell, depth)
+            # Of the triangles as near as the nearest, any one will do.
+            nearer = depth == nearest[cell]
+            self.cell_triangle[cell[nearer]] = triangle[nearer]
+
+    def _triangle_spans(self, begin, end):
+        """Finds the cell centres covered by a range of triangles, a row at a
+        time.
+
+        Returns:
+            tuple: for each row of each triangle, the triangle, the row, and
+            the first column and number of columns whose centres it covers
+        """
+        rows = self.rows[begin:end]
+        triangle = np.repeat(np.arange(begin, end), rows)
+        row = (np.repeat(self.low_row[begin:end], rows) + np.arange(len(triangle)) -
+               np.repeat(np.cumsum(rows) - rows, rows))
+        y = self.origin[1] + (row + .5) * self.cell_size
+
+        # Along a row, each barycentric weight is ``slope * x + offset``, and
+        # must not be negative.
+        planes = self.planes[begin:end]
+        slope_a, slope_b = (np.repeat(planes[:, i, 0], rows) for i in (0, 1))
+        offset_a, offset_b = (np.repeat(planes[:, i, 1], rows) * y + np.repeat(planes[:, i, 2], rows)
+                              for i in (0, 1))
+        left = np.full(len(row), -np.inf)
+        right = np.full(len(row), np.inf)
+        for slope, offset in ((slope_a, offset_a), (slope_b, offset_b),
+                              (-slope_a - slope_b, 1 - offset_a - offset_b)):
+            offset = offset + 1e-9
+            with np.errstate(divide='ignore', invalid='ignore'):
+                bound = -offset / slope
+            left = np.where(slope > 0, np.maximum(left, bound), left)
+            right = np.where(slope < 0, np.minimum(right, bound), right)
+            right[(slope == 0) & (offset < 0)] = -np.inf
+
+        low_column = np.maximum(np.ceil((left - self.origin[0]) / self.cell_size - .5), 0)
+        high_column = np.minimum(np.floor((right - self.origin[0]) / self.cell_size - .5),
+                                 self.shape[1] - 1)
+        columns = np.maximum(high_column - low_column + 1, 0).astype(np.intp)
+        return triangle, row, low_column.astype(np.intp), columns
+
+    def depth_at(self, image_x, image_y):
+        """Finds the depth of the nearest surface at image points.
+
+        Args:
+            image_x (np.array): the x image coordinates of the points
+            image_y (np.array): the y image coordinates of the points
+
+        Returns:
+            np.array: the depth of the nearest triangle covering each point
+            (or with ``exact`` off, of the plane of the nearest triangle at
+            the centre of its cell), or ``inf`` where there is none
+        """
+        result = np.full(len(image_x), np.inf)
+        if self.exact:
+            return self._exact_depth_at(image_x, image_y, result)
+
+        column, row = self._cells(image_x, image_y)
+        triangle = self.cell_triangle[row * self.shape[1] + column]
+        kept = np.flatnonzero(triangle >= 0)
+        result[kept] = _plane_depth(self.planes[triangle[kept]], image_x[kept], image_y[kept])[0]
+        return result
+
+    def _exact_depth_at(self, image_x, image_y, result):
+        """Finds the depth of the nearest surface at image points from every
+        triangle in their cells; see ``depth_at``."""
+        column, row = self._cells(image_x, image_y)
+        cell = row * self.shape[1] + column
+        first = self.cell_starts[cell]
+        counts = self.cell_starts[cell + 1] - first
+        ends = np.cumsum(counts)
+        if not len(ends):
+            return result
+        batches = np.searchsorted(ends, np.arange(RASTER_BATCH_SIZE, ends[-1], RASTER_BATCH_SIZE))
+        for begin, end in zip(np.append(0, batches), np.append(batches, len(ends))):
+            tested = np.flatnonzero(counts[begin:end]) + begin
+            if not len(tested):
+                continue
+            point = np.repeat(tested, counts[tested])
+            starts = np.cumsum(counts[tested]) - counts[tested]
+            position = np.arange(len(point)) - np.repeat(starts, counts[tested])
+            triangle = self.cell_triangles[first[point] + position]
+            depth = _covered_depth(self.planes[triangle], image_x[point], image_y[point])
+            result[tested] = np.minimum.reduceat(depth, starts)
+        return result
+
+    def visible(self, image_x, image_y, depth, bias=None):
+        """Tests whether image points are in front of the surface.
+
+        Args:
+            image_x (np.array): the x image coordinates of the points
+            image_y (np.array): the y image coordinates of the points
+            depth (np.array): the depth of the points
+            bias (float): how far behind the surface a point may be and still
+                be visible, in cells. Defaults to ``DEFAULT_DEPTH_BIAS``, or
+                ``EXACT_DEPTH_BIAS`` if the buffer is ``exact``.
+
+        Returns:
+            np.array: a boolean array which is true for visible points.
+            Points with ``nan`` coordinates are not visible.
+        """
+        if bias is None:
+            bias = EXACT_DEPTH_BIAS if self.exact else DEFAULT_DEPTH_BIAS
+        in_view = ~(np.isnan(image_x) | np.isnan(image_y) | np.isnan(depth))
+        result = np.zeros(len(in_view), dtype=bool)
+        surface_depth = self.depth_at(image_x[in_view], image_y[in_view])
+        result[in_view] = depth[in_view] <= surface_depth + bias * self.cell_size
+        return result
+
+
+def project_texture(texture, surface, camera):
+    """Maps a texture onto a surface and projects it with a camera, without
+    removing hidden lines.
+
+    Args:
+        texture (texture): the texture to project
+        surface (surface): the surface to project onto
+        camera (Camera): the camera to project with
+
+    Returns:
+        layer: A layer.
+    """
+    if isinstance(texture, ChunkedLayer):
+        return texture.map(lambda chunk: project_texture(chunk, surface, camera))
+    image_x, image_y, _ = _project_texture_points(texture, surface, camera)
+    return _occluded_layer(texture, image_x, image_y)
+
+
+def _project_texture_points(texture, surface, camera):
+    """Projects the points of a texture mapped onto a surface."""
+    texture_x, texture_y = layer_coordinates(texture)
+    texture_z = map_texture_to_surface(texture, surface)
+    return camera.project(texture_x, texture_y, texture_z)
+
+
+def project_and_occlude_texture(texture, surface, camera, resolution=None,
+                                bias=None, exact=False):
+    """Maps a texture onto a surface and projects it with a camera, with
+    hidden lines removed.
+
+    Args:
+        texture (texture): the texture to project
+        surface (surface): the surface to project onto
+        camera (Camera): the camera to project with
+        resolution (int): the resolution of the depth buffer (see
+            ``DepthBuffer``)
+        bias (float): how far behind the surface a point may be and still be
+            visible, in depth buffer cells (see ``DepthBuffer.visible``)
+        exact (bool): if true, test each point exactly against the triangles
+            of the surface (see ``DepthBuffer``)
+
+    Returns:
+        layer: A layer.
+
+    Examples:
+        With the camera of ``penkit.projection``, the same points are hidden
+        except for a few near outlines, and fewer still if they are tested
+        exactly:
+
+        >>> from penkit import projection
+        >>> from penkit.surfaces import make_sine_surface
+        >>> from penkit.textures import make_grid_texture
+        >>> texture = make_grid_texture(20, 20, 200)
+        >>> surface = make_sine_surface((200, 200), scale=2) * .5
+        >>> points = ~np.isnan(texture[0])
+        >>> expected = np.isnan(projection.project_and_occlude_texture(texture, surface, 60)[1])
+        >>> def hidden(camera, **kwargs):
+        ...     layer = project_and_occlude_texture(texture, surface, camera, **kwargs)
+        ...     return np.isnan(layer[1][points])
+        >>> float(hidden(Camera(60)).mean()) > .3
+        True
+        >>> float(np.mean(hidden(Camera(60)) != expected[points])) < .05
+        True
+        >>> float(np.mean(hidden(Camera(60), exact=True) != expected[points])) < .01
+        True
+
+        Turning the camera a full circle about the surface changes nothing,
+        and neither does rasterising at a higher resolution, except near
+        outlines:
+
+        >>> bool((hidden(Camera(60, azimuth=360)) == hidden(Camera(60))).all())
+        True
+        >>> float(np.mean(hidden(Camera(60), resolution=800) != hidden(Camera(60)))) < .05
+        True
+    """
+    buffer = DepthBuffer(surface, camera, resolution, exact)
+    if isinstance(texture, ChunkedLayer):
+        return texture.map(lambda chunk: _occlude_texture(chunk, surface, camera, buffer, bias))
+    return _occlude_texture(texture, surface, camera, buffer, bias)
+
+
+def _occlude_texture(texture, surface, camera, buffer, bias):
+    """Projects a texture and removes the points hidden in a depth buffer."""
+    image_x, image_y, _ = _project_texture_points(texture, surface, camera)
+
+    # Test each point where it lies on the triangles of the depth buffer.
+    grid = np.asarray(surface_grid(surface), dtype=float)
+    points = _triangle_points(grid, *layer_coordinates(texture))
+    hidden = ~buffer.visible(*camera.project(*points), bias=bias)
+
+    image_y = np.where(hidden, np.nan, image_y)
+    return _occluded_layer(texture, image_x, image_y)
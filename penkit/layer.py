@@ -0,0 +1,516 @@
+"""The ``layer`` module provides ``Layer``, an array-backed alternative to
+the ``(x, y)`` tuple representation of layers.
+
+A tuple layer separates its polylines with ``nan`` values, so every
+operation on it has to scan for separators. A ``Layer`` instead keeps all
+of its points in one contiguous ``(N, 2)`` array and records where each
+polyline starts in an integer offset array, so per-polyline operations only
+touch the offsets. Functions in ``penkit.write``, ``penkit.textures.util``
+and ``penkit.projection`` accept either form, and return a ``Layer`` when
+given one.
+
+A ``ChunkedLayer`` is a layer which is produced a piece at a time, for
+layers too large to hold in memory. The writers, projections and texture
+generators can stream it chunk by chunk.
+"""
+
+import numpy as np
+
+
+class Layer(object):
+    """A layer stored as a point buffer and polyline offsets.
+
+    Attributes:
+        points (np.array): an ``(N, 2)`` array of the ``x, y`` coordinates of
+            every point, with no separators
+        offsets (np.array): an integer array with one more entry than there
+            are polylines. Polyline ``i`` consists of the points
+            ``points[offsets[i]:offsets[i + 1]]``.
+
+    A ``Layer`` can be unpacked like a tuple layer (``x, y = layer``), which
+    yields the ``nan``-separated coordinate arrays.
+
+    Examples:
+        >>> layer = Layer.from_tuple(([0., 1., np.nan, 2.], [0., 1., np.nan, 3.]))
+        >>> layer.offsets
+        array([0, 2, 3])
+        >>> layer.to_tuple()
+        (array([ 0.,  1., nan,  2.]), array([ 0.,  1., nan,  3.]))
+
+        Runs of separators, and separators at either end, are dropped, so the
+        layer draws the same path as the tuple:
+
+        >>> from penkit.write import layer_to_path
+        >>> x = np.array([np.nan, 0., 1., np.nan, np.nan, 2.])
+        >>> y = np.array([np.nan, 0., 1., np.nan, np.nan, 3.])
+        >>> Layer.from_tuple((x, y)).offsets
+        array([0, 2, 3])
+        >>> layer_to_path(Layer.from_tuple((x, y))) == layer_to_path((x, y))
+        True
+    """
+
+    __slots__ = ('points', 'offsets', '_bounds')
+
+    def __init__(self, points, offsets, bounds=None):
+        points = np.asarray(points)
+        if points.dtype.kind != 'f':
+            points = points.astype(float)
+        self.points = np.ascontiguousarray(points).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self._bounds = bounds
+
+    @classmethod
+    def from_starts(cls, points, starts):
+        """Makes a layer from points and a mask of where polylines start.
+
+        Args:
+            points (np.array): an ``(N, 2)`` array of points
+            starts (np.array): a boolean array which is true for the first
+                point of each polyline
+
+        Returns:
+            Layer: A layer.
+        """
+        offsets = np.append(np.flatnonzero(starts), len(starts))
+        return cls(points, offsets)
+
+    @classmethod
+    def from_tuple(cls, layer):
+        """Converts a ``nan``-separated ``(x, y)`` layer into a ``Layer``.
+
+        Floating point coordinates keep their type; others become ``float``.
+
+        Args:
+            layer (layer): the layer to convert
+
+        Returns:
+            Layer: A layer.
+        """
+        if isinstance(layer, Layer):
+            return layer
+        x, y = (np.asarray(axis) for axis in layer)
+        if x.dtype.kind != 'f' or y.dtype != x.dtype:
+            x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        visible = ~(np.isnan(x) | np.isnan(y))
+        starts = visible.copy()
+        starts[1:] &= ~visible[:-1]
+        return cls.from_starts(np.column_stack([x[visible], y[visible]]), starts[visible])
+
+    def to_tuple(self):
+        """Converts the layer into ``nan``-separated ``(x, y)`` arrays.
+
+        Returns:
+            layer: A tuple layer.
+        """
+        num_points = self.num_points
+        num_segments = self.num_segments
+        positions = np.arange(num_points) + np.repeat(
+            np.arange(num_segments), np.diff(self.offsets))
+
+        size = num_points + max(num_segments - 1, 0)
+        x = np.full(size, np.nan)
+        y = np.full(size, np.nan)
+        x[positions] = self.points[:, 0]
+        y[positions] = self.points[:, 1]
+        return x, y
+
+    def __iter__(self):
+        return iter(self.to_tuple())
+
+    def __repr__(self):
+        return '<Layer: {} points in {} polylines>'.format(self.num_points, self.num_segments)
+
+    @property
+    def x(self):
+        """np.array: the x coordinates of the points, without separators."""
+        return self.points[:, 0]
+
+    @property
+    def y(self):
+        """np.array: the y coordinates of the points, without separators."""
+        return self.points[:, 1]
+
+    @property
+    def num_points(self):
+        """int: the number of points in the layer."""
+        return len(self.points)
+
+    @property
+    def num_segments(self):
+        """int: the number of polylines in the layer."""
+        return len(self.offsets) - 1
+
+    @property
+    def starts(self):
+        """np.array: a boolean mask of the points which start a polyline."""
+        starts = np.zeros(self.num_points, dtype=bool)
+        starts[self.offsets[:-1][np.diff(self.offsets) > 0]] = True
+        return starts
+
+    @property
+    def bounds(self):
+        """tuple: the extent of the layer as ``(min_x, max_x, min_y, max_y)``.
+
+        Computed on first access and cached, since layers are not modified in
+        place. The bounds of an empty layer are ``nan``.
+
+        Examples:
+            >>> Layer.from_tuple((np.array([]), np.array([]))).bounds
+            (nan, nan, nan, nan)
+        """
+        if self._bounds is None and not self.num_points:
+            self._bounds = (np.nan,) * 4
+        if self._bounds is None:
+            min_x, min_y = self.points.min(axis=0)
+            max_x, max_y = self.points.max(axis=0)
+            self._bounds = (min_x, max_x, min_y, max_y)
+        return self._bounds
+
+    def segments(self):
+        """Returns each polyline as an ``(n, 2)`` view of ``points``.
+
+        Returns:
+            list: the polylines of the layer
+        """
+        return np.split(self.points, self.offsets[1:-1])
+
+    def iter_chunks(self, chunk_size):
+        """Splits the layer into consecutive runs of points.
+
+        Args:
+            chunk_size (int): the maximum number of points in each chunk
+
+        Yields:
+            pair: an ``(n, 2)`` view of the next points, and a boolean mask
+            of which of them start a polyline
+        """
+        offsets = self.offsets
+        for begin in range(0, self.num_points, chunk_size):
+            points = self.points[begin:begin + chunk_size]
+            first, last = np.searchsorted(offsets, [begin, begin + len(points)])
+            starts = np.zeros(len(points), dtype=bool)
+            starts[offsets[first:last] - begin] = True
+            yield points, starts
+
+    def segment_range(self, start, stop):
+        """Returns the layer made of polylines ``start`` to ``stop - 1``.
+
+        The result shares its points with this layer, so this is cheap even
+        for memory-mapped layers.
+
+        Args:
+            start (int): the index of the first polyline
+            stop (int): one past the index of the last polyline
+
+        Returns:
+            Layer: A layer.
+        """
+        start, stop, _ = slice(start, stop).indices(self.num_segments)
+        stop = max(start, stop)
+        offsets = self.offsets[start:stop + 1]
+        return Layer(self.points[offsets[0]:offsets[-1]], offsets - offsets[0])
+
+    def with_points(self, points):
+        """Returns a layer with the same polylines but new coordinates.
+
+        Args:
+            points (np.array): an ``(N, 2)`` array of replacement points
+
+        Returns:
+            Layer: A layer.
+        """
+        return Layer(points, self.offsets)
+
+    def filter(self, keep):
+        """Returns a layer with only some of the points.
+
+        Polylines are split wherever points are removed from their middle.
+
+        Args:
+            keep (np.array): a boolean mask of the points to keep
+
+        Returns:
+            Layer: A layer.
+
+        Examples:
+            >>> layer = Layer.from_tuple(([0., 1., 2., 3.], [0., 1., 2., 3.]))
+            >>> layer.filter(np.array([True, True, False, True])).to_tuple()
+            (array([ 0.,  1., nan,  3.]), array([ 0.,  1., nan,  3.]))
+        """
+        starts = self.starts
+        starts[1:] |= ~keep[:-1]
+        return Layer.from_starts(self.points[keep], starts[keep])
+
+
+class ChunkedLayer(object):
+    """A layer made of a sequence of smaller layers (chunks), which are
+    produced as they are needed.
+
+    Each chunk is a tuple layer or a ``Layer``, and polylines do not cross
+    from one chunk to the next. The chunks are produced again each time the
+    layer is read, so a chunked layer can be read several times (for
+    example once to find its bounds and again to write it) while only one
+    chunk is in memory at a time.
+
+    Args:
+        chunks (callable): a function of no arguments which returns an
+            iterable of the chunks, in order
+        bounds (tuple): the bounds of the layer, if known. Otherwise they
+            are computed by reading the layer when first needed.
+
+    Examples:
+        >>> layer = ChunkedLayer.from_layer(([0., 1., np.nan, 2., 3.], [0., 1., np.nan, 2., 3.]), 2)
+        >>> [chunk.x for chunk in layer.chunks()]
+        [array([0., 1.]), array([2., 3.])]
+    """
+
+    __slots__ = ('_chunks', '_bounds')
+
+    def __init__(self, chunks, bounds=None):
+        self._chunks = chunks
+        self._bounds = bounds
+
+    @classmethod
+    def from_layer(cls, layer, chunk_size):
+        """Splits a layer into chunks of whole polylines.
+
+        Args:
+            layer (layer): a ``Layer`` or a tuple layer
+            chunk_size (int): the most points in each chunk. A polyline with
+                more points than this is a chunk of its own.
+
+        Returns:
+            ChunkedLayer: A chunked layer.
+        """
+        layer = as_layer(layer)
+
+        def chunks():
+            offsets = layer.offsets
+            start = 0
+            while start < layer.num_segments:
+                stop = np.searchsorted(offsets, offsets[start] + chunk_size, side='right') - 1
+                stop = max(stop, start + 1)
+                yield layer.segment_range(start, stop)
+                start = stop
+
+        return cls(chunks, layer.bounds if layer.num_points else None)
+
+    def chunks(self):
+        """Returns an iterator over the chunks of the layer."""
+        return iter(self._chunks())
+
+    def map(self, function, bounds=None):
+        """Returns a chunked layer made by applying a function to each chunk.
+
+        The function is applied lazily, as the chunks are read.
+
+        Args:
+            function (callable): a function taking and returning a layer.
+                It must not join polylines across chunks.
+            bounds (tuple): the bounds of the result, if known
+
+        Returns:
+            ChunkedLayer: A chunked layer.
+        """
+        return ChunkedLayer(lambda: (function(chunk) for chunk in self.chunks()), bounds)
+
+    @property
+    def bounds(self):
+        """tuple: the extent of the layer as ``(min_x, max_x, min_y, max_y)``.
+
+        Computed by reading the layer on first access, unless given. The
+        bounds of an empty layer are ``nan``.
+        """
+        if self._bounds is None:
+            bounds = [layer_bounds(chunk) for chunk in self.chunks() if _has_points(chunk)]
+            if not bounds:
+                self._bounds = (np.nan,) * 4
+            else:
+                self._bounds = (
+                    min(b[0] for b in bounds), max(b[1] for b in bounds),
+                    min(b[2] for b in bounds), max(b[3] for b in bounds))
+        return self._bounds
+
+    def to_layer(self):
+        """Reads every chunk into a single ``Layer``.
+
+        Returns:
+            Layer: A layer.
+        """
+        return concat_layers(list(self.chunks()))
+
+    def to_tuple(self):
+        """Reads every chunk into ``nan``-separated ``(x, y)`` arrays.
+
+        Returns:
+            layer: A tuple layer.
+        """
+        return self.to_layer().to_tuple()
+
+    def __iter__(self):
+        return iter(self.to_tuple())
+
+    def __repr__(self):
+        return '<ChunkedLayer>'
+
+
+def chain_layers(layers):
+    """Joins layers into a ``ChunkedLayer`` whose chunks are the chunks of
+    each layer in turn, keeping their polylines separate.
+
+    Args:
+        layers (list): layers of any kind
+
+    Returns:
+        ChunkedLayer: A chunked layer.
+    """
+    layers = list(layers)
+    bounds = None
+    if all(not isinstance(layer, ChunkedLayer) or layer._bounds is not None
+           for layer in layers):
+        all_bounds = [layer_bounds(layer) for layer in layers if isinstance(layer, ChunkedLayer)
+                      or _has_points(layer)]
+        if all_bounds:
+            bounds = (min(b[0] for b in all_bounds), max(b[1] for b in all_bounds),
+                      min(b[2] for b in all_bounds), max(b[3] for b in all_bounds))
+    return ChunkedLayer(
+        lambda: (chunk for layer in layers for chunk in layer_chunks(layer)), bounds)
+
+
+def _has_points(layer):
+    """Returns true if a layer has any points which are not separators."""
+    if isinstance(layer, Layer):
+        return layer.num_points > 0
+    x, y = layer
+    return bool(np.any(~(np.isnan(x) | np.isnan(y))))
+
+
+def _is_coordinates(value):
+    """Tests whether a value is a 1-D array-like of numbers."""
+    if isinstance(value, (Layer, ChunkedLayer, tuple)):
+        return False
+    try:
+        array = np.asarray(value)
+    except ValueError:
+        return False
+    return array.ndim == 1 and array.dtype.kind in 'biuf'
+
+
+def is_layer(value):
+    """Tests whether a value is a single layer rather than a plot.
+
+    A tuple is a layer if it is an ``(x, y)`` pair of coordinate arrays;
+    any other tuple is taken to be a plot of layers.
+
+    Args:
+        value: a layer of any kind, or a plot (a list or tuple of layers)
+
+    Returns:
+        bool: true for a ``Layer``, ``ChunkedLayer`` or tuple layer
+
+    Examples:
+        >>> layer = ([0., 1.], [0., 1.])
+        >>> is_layer(layer), is_layer([layer]), is_layer((layer, layer))
+        (True, False, False)
+    """
+    if isinstance(value, (Layer, ChunkedLayer)):
+        return True
+    return (isinstance(value, tuple) and len(value) == 2 and
+            all(_is_coordinates(axis) for axis in value))
+
+
+def layer_chunks(layer):
+    """Returns the chunks of a ``ChunkedLayer``, or else the layer itself as
+    a single chunk.
+
+    Args:
+        layer (layer): a layer of any kind
+
+    Returns:
+        iterable: the chunks of the layer
+    """
+    if isinstance(layer, ChunkedLayer):
+        return layer.chunks()
+    return [layer]
+
+
+def layer_bounds(layer):
+    """Returns the extent of a layer as ``(min_x, max_x, min_y, max_y)``.
+
+    Args:
+        layer (layer): a ``Layer``, ``ChunkedLayer`` or tuple layer
+
+    Returns:
+        tuple: the bounds of the layer
+    """
+    if isinstance(layer, (Layer, ChunkedLayer)):
+        return layer.bounds
+    x, y = layer
+    return np.nanmin(x), np.nanmax(x), np.nanmin(y), np.nanmax(y)
+
+
+def layer_coordinates(layer):
+    """Returns the ``x`` and ``y`` coordinate arrays of a layer.
+
+    For a tuple layer these include the ``nan`` separators; for a ``Layer``
+    they are the separator-free columns of ``points``.
+
+    Args:
+        layer (layer): a ``Layer`` or a tuple layer
+
+    Returns:
+        pair: the x and y arrays
+    """
+    if isinstance(layer, Layer):
+        return layer.x, layer.y
+    return layer
+
+
+def replace_coordinates(layer, x, y):
+    """Returns a layer of the same kind as ``layer`` with new coordinates.
+
+    Args:
+        layer (layer): a ``Layer`` or a tuple layer
+        x (np.array): the new x coordinates, as from ``layer_coordinates``
+        y (np.array): the new y coordinates, as from ``layer_coordinates``
+
+    Returns:
+        layer: A layer.
+    """
+    if isinstance(layer, Layer):
+        return layer.with_points(np.column_stack([x, y]))
+    return x, y
+
+
+def as_layer(layer):
+    """Returns the given layer as a ``Layer``, converting it if needed.
+
+    Args:
+        layer (layer): a ``Layer``, ``ChunkedLayer`` or tuple layer
+
+    Returns:
+        Layer: A layer.
+    """
+    if isinstance(layer, ChunkedLayer):
+        return layer.to_layer()
+    return Layer.from_tuple(layer)
+
+
+def concat_layers(layers):
+    """Joins layers into a single ``Layer``, keeping their polylines separate.
+
+    Args:
+        layers (list): ``Layer`` objects or tuple layers
+
+    Returns:
+        Layer: A layer.
+    """
+    layers = [as_layer(layer) for layer in layers]
+    if not layers:
+        return Layer(np.empty((0, 2)), [0])
+    points = np.concatenate([layer.points for layer in layers])
+    starts = np.cumsum([0] + [layer.num_points for layer in layers[:-1]])
+    offsets = np.concatenate(
+        [layer.offsets[:-1] + start for layer, start in zip(layers, starts)] +
+        [[len(points)]])
+    return Layer(points, offsets)
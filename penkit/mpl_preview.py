@@ -1,48 +1,103 @@
 """Preview plots with matplotlib.
 
 Alternative to the ``preview`` module for non-Jupyter environments.
+
+Each layer is drawn as a single ``LineCollection`` with one line per
+polyline, in its colour from ``penkit.write.PLOT_COLORS``. Points which are
+closer together than the figure can show are dropped first, so large plots
+stay responsive. Detail dropped this way does not reappear when zooming in;
+pass ``tolerance=None`` to draw every point.
 """
 
 import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection
+
+from penkit.layer import as_layer, layer_bounds, layer_chunks
+from penkit.simplify import decimate_layer
+from penkit.write import PLOT_COLORS
+
+# Points closer than this many pixels of the figure are merged
+DECIMATION_TOLERANCE = 0.5
+
+
+def _pixel_size(ax, bounds):
+    """Returns the size of a screen pixel in data units, if data with the
+    given bounds is fit to the axis with equal aspect."""
+    extent = ax.get_window_extent()
+    min_x, max_x, min_y, max_y = bounds
+    return max((max_x - min_x) / extent.width, (max_y - min_y) / extent.height)
+
+
+def _plot_bounds(plot):
+    """Returns the bounds enclosing every layer of a plot."""
+    bounds = np.array([layer_bounds(layer) for layer in plot])
+    return bounds[:, 0].min(), bounds[:, 1].max(), bounds[:, 2].min(), bounds[:, 3].max()
+
 
+def _add_layer(ax, layer, color, cell_size):
+    """Adds a layer to an axis as a ``LineCollection``."""
+    for chunk in layer_chunks(layer):
+        chunk = as_layer(chunk)
+        if cell_size:
+            chunk, _ = decimate_layer(chunk, cell_size)
+        lines = [line for line in chunk.segments() if len(line) > 1]
+        ax.add_collection(LineCollection(lines, colors=color))
 
-def draw_layer(ax, layer):
+
+def _finish_axis(ax):
+    """Fits the axis to its contents and hides the frame."""
+    ax.autoscale_view()
+    ax.set_aspect('equal', 'datalim')
+    ax.axis('off')
+
+
+def draw_layer(ax, layer, color=PLOT_COLORS[0], tolerance=DECIMATION_TOLERANCE):
     """Draws a layer on the given matplotlib axis.
 
     Args:
         ax (axis): the matplotlib axis to draw on
         layer (layer): the layers to plot
+        color (str): the colour of the lines
+        tolerance (float): points closer together than this many pixels are
+            merged before drawing. Pass ``None`` to draw every point.
     """
-    ax.set_aspect('equal', 'datalim')
-    ax.plot(*layer)
-    ax.axis('off')
+    cell_size = tolerance and tolerance * _pixel_size(ax, layer_bounds(layer))
+    _add_layer(ax, layer, color, cell_size)
+    _finish_axis(ax)
 
 
-def draw_plot(ax, plot):
+def draw_plot(ax, plot, tolerance=DECIMATION_TOLERANCE):
     """Draws a plot on the given matplotlib axis.
 
     Args:
         ax (axis): the matplotlib axis to draw on
         plot (list): the layers to plot
+        tolerance (float): points closer together than this many pixels are
+            merged before drawing. Pass ``None`` to draw every point.
     """
-    for layer in plot:
-        show_layer(ax, layer)
+    cell_size = tolerance and tolerance * _pixel_size(ax, _plot_bounds(plot))
+    for i, layer in enumerate(plot):
+        _add_layer(ax, layer, PLOT_COLORS[i % len(PLOT_COLORS)], cell_size)
+    _finish_axis(ax)
 
 
-def show_layer(layer):
+def show_layer(layer, **kwargs):
     """Shortcut for ``show_plot`` when only one layer is needed.
 
     Args:
         layer (layer): the layer to plot
     """
-    show_plot([layer])
+    show_plot([layer], **kwargs)
 
 
-def show_plot(plot):
+def show_plot(plot, tolerance=DECIMATION_TOLERANCE):
     """Draws a preview of the given plot with matplotlib.
 
     Args:
         plot (list): the plot as a list of layers
+        tolerance (float): points closer together than this many pixels are
+            merged before drawing. Pass ``None`` to draw every point.
     """
     fig, ax = plt.subplots()
-    draw_plot(ax, plot)
+    draw_plot(ax, plot, tolerance=tolerance)
@@ -0,0 +1,154 @@
+"""The ``plotfile`` module stores plots in penkit's binary plot format.
+
+Unlike an SVG, a plot file keeps the layer structure of the plot and can
+be memory-mapped when it is loaded, so a plot larger than RAM can be
+sliced, previewed, or written out as SVG or G-code without being read in
+full.
+
+A plot file consists of:
+
+- the 8-byte magic string ``\\x89PENKIT\\n``
+- the length of the header, as a little-endian 64-bit unsigned integer
+- a JSON header describing each layer
+- for each layer, its points as little-endian ``float64`` ``(x, y)`` pairs
+  and its polyline offsets as little-endian ``int64`` values (see
+  ``penkit.layer.Layer``). Each array begins on a 64-byte boundary.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+from penkit.layer import Layer, as_layer
+
+MAGIC = b'\x89PENKIT\n'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+POINTS_DTYPE = np.dtype('<f8')
+OFFSETS_DTYPE = np.dtype('<i8')
+
+# Number of points copied to the file at a time when saving
+WRITE_CHUNK_SIZE = 1000000
+
+
+def _align(position):
+    """Rounds a file position up to the next multiple of ``ALIGNMENT``."""
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def _write_array(outfile, array, dtype, position):
+    """Writes an array at the given file position, a chunk at a time."""
+    outfile.seek(position)
+    for begin in range(0, len(array), WRITE_CHUNK_SIZE):
+        chunk = np.ascontiguousarray(array[begin:begin + WRITE_CHUNK_SIZE], dtype=dtype)
+        outfile.write(chunk.tobytes())
+
+
+def save_plot(plot, filename):
+    """Saves a plot to a binary plot file.
+
+    Args:
+        plot (list): the layers of the plot, as tuples or ``Layer`` objects
+        filename (str): the name of the file to write
+    """
+    layers = [as_layer(layer) for layer in plot]
+
+    entries = []
+    position = 0
+    for layer in layers:
+        points_position = _align(position)
+        offsets_position = _align(points_position + layer.num_points * 2 * POINTS_DTYPE.itemsize)
+        position = offsets_position + len(layer.offsets) * OFFSETS_DTYPE.itemsize
+        entries.append({
+            'num_points': layer.num_points,
+            'num_segments': layer.num_segments,
+            'bounds': [float(b) for b in layer.bounds] if layer.num_points else None,
+            'points': points_position,
+            'offsets': offsets_position,
+        })
+
+    header = json.dumps({'version': FORMAT_VERSION, 'layers': entries}).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    with open(filename, 'wb') as outfile:
+        outfile.write(MAGIC)
+        outfile.write(struct.pack('<Q', len(header)))
+        outfile.write(header)
+        for layer, entry in zip(layers, entries):
+            _write_array(outfile, layer.points, POINTS_DTYPE, data_start + entry['points'])
+            _write_array(outfile, layer.offsets, OFFSETS_DTYPE, data_start + entry['offsets'])
+        outfile.truncate(data_start + position)
+
+
+def _read_header(infile):
+    """Reads the header of a plot file.
+
+    Returns:
+        tuple: the header as a dict, and the file position where data begins
+    """
+    if infile.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a penkit plot file: {}'.format(infile.name))
+    header_length, = struct.unpack('<Q', infile.read(8))
+    header = json.loads(infile.read(header_length).decode('utf-8'))
+    if header['version'] > FORMAT_VERSION:
+        raise ValueError('Unsupported plot file version: {}'.format(header['version']))
+    return header, _align(len(MAGIC) + 8 + header_length)
+
+
+def _read_array(infile, filename, dtype, position, shape, mmap):
+    """Reads an array from a plot file, memory-mapping it if requested."""
+    count = int(np.prod(shape))
+    if not count:
+        return np.empty(shape, dtype=dtype)
+    if mmap:
+        return np.memmap(filename, dtype=dtype, mode='r', offset=position, shape=shape)
+    infile.seek(position)
+    return np.fromfile(infile, dtype=dtype, count=count).reshape(shape)
+
+
+def load_plot(filename, mmap=True):
+    """Loads a plot from a binary plot file.
+
+    Args:
+        filename (str): the name of the file to read
+        mmap (bool): if true (the default), the layers' arrays are read-only
+            memory maps of the file, so data is only read from disk as it
+            is used
+
+    Returns:
+        list: the plot, as a list of ``Layer`` objects
+
+    Examples:
+        A saved plot loads with the same layers, memory-mapped or not:
+
+        >>> import os
+        >>> import tempfile
+        >>> plot = [([0., 1., np.nan, 2.], [0., 1., np.nan, 3.]), ([], [])]
+        >>> filename = os.path.join(tempfile.mkdtemp(), 'plot.penkit')
+        >>> save_plot(plot, filename)
+        >>> mapped, read = load_plot(filename), load_plot(filename, mmap=False)
+        >>> mapped[0].points.flags.writeable, read[0].points.flags.writeable
+        (False, True)
+        >>> mapped[0].to_tuple()
+        (array([ 0.,  1., nan,  2.]), array([ 0.,  1., nan,  3.]))
+        >>> all(np.array_equal(a, b, equal_nan=True)
+        ...     for layers in (mapped, read)
+        ...     for layer, expected in zip(layers, plot)
+        ...     for a, b in zip(layer.to_tuple(), expected))
+        True
+    """
+    plot = []
+    with open(filename, 'rb') as infile:
+        header, data_start = _read_header(infile)
+        for entry in header['layers']:
+            points = _read_array(
+                infile, filename, POINTS_DTYPE, data_start + entry['points'],
+                (entry['num_points'], 2), mmap)
+            offsets = _read_array(
+                infile, filename, OFFSETS_DTYPE, data_start + entry['offsets'],
+                (entry['num_segments'] + 1,), mmap)
+            bounds = tuple(entry['bounds']) if entry['bounds'] else None
+            plot.append(Layer(points, offsets, bounds))
+    return plot
@@ -3,6 +3,8 @@ import re
 import numpy as np
 import svgpathtools
 
+from penkit.layer import as_layer, layer_chunks
+
 
 try:
     import matplotlib.pyplot as plt
@@ -44,6 +46,48 @@ class PolargraphGCode:
                 last = line.end
         
         yield 0, 0.0, 0.0, self.max_speed
+
+    def plot_to_polargraph(self, plot, chunk_size=100000):
+        """Like ``svg_to_polargraph``, but reads lines directly from the layers
+        of a plot, a chunk of points at a time. This works on memory-mapped
+        plots from ``penkit.plotfile.load_plot`` without reading them into RAM,
+        and streams ``penkit.layer.ChunkedLayer`` layers a chunk at a time.
+
+        Coordinates are used as they are, so the plot should be in machine
+        units with y increasing downward, as in the SVG.
+        """
+        last = None
+        previous = None
+        layers = (as_layer(chunk) for layer in plot for chunk in layer_chunks(layer))
+        for layer in layers:
+            for points, starts in layer.iter_chunks(chunk_size):
+                x = points[:, 0]
+                y = points[:, 1]
+                a = np.sqrt(x ** 2 + y ** 2) - self.diagonal
+                b = np.sqrt((self.width - x) ** 2 + y ** 2) - self.diagonal
+
+                for x_end, y_end, a_end, b_end, start in zip(
+                        x.tolist(), y.tolist(), a.tolist(), b.tolist(), starts.tolist()):
+                    end = (x_end, y_end, a_end, b_end)
+                    if start:
+                        previous = end
+                        continue
+
+                    x_start, y_start, a_start, b_start = previous
+                    previous = end
+                    if (x_start, y_start) != last:
+                        yield 0, a_start, b_start, self.max_speed
+
+                    proj_dist = sqrt((a_start - a_end)**2 + (b_start - b_end)**2)
+                    orig_dist = sqrt((x_end - x_start)**2 + (y_end - y_start)**2)
+                    if orig_dist > 0:
+                        speed = int(self.speed * (proj_dist / orig_dist))
+
+                        yield 1, a_end, b_end, speed
+
+                        last = (x_end, y_end)
+
+        yield 0, 0.0, 0.0, self.max_speed
     
     def polargraph_time(self, commands):
         time = 0
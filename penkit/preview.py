@@ -1,15 +1,28 @@
 """Functions for displaying plots inline inside a Jupyter notebook.
 
 These functions are useful for iterative development of plots.
+
+Previews are drawn at screen resolution: points which would not visibly
+change the preview are removed before it is sent to the browser, so the
+cost of a preview depends on its size rather than on the size of the plot.
+Use ``penkit.write.write_plot`` for full-resolution output.
+
+For plots too dense even for that, ``show_plot(plot, backend='raster')``
+draws the plot as a PNG image instead (see ``penkit.raster``).
 """
 
-from IPython.display import SVG
+from IPython.display import SVG, Image
 
-from penkit.write import plot_to_svg
+from penkit.raster import plot_to_png
+from penkit.simplify import decimate_plot
+from penkit.write import plot_scale, plot_to_svg
 
 PREVIEW_WIDTH = 330
 PREVIEW_HEIGHT = 255
 
+# The largest deviation from the original lines allowed in a preview, in pixels
+PREVIEW_TOLERANCE = 0.25
+
 def show_layer(layer, *args, **kwargs):
     """Shortcut for ``show_plot`` when the plot has only one layer.
 
@@ -24,15 +37,35 @@ def show_layer(layer, *args, **kwargs):
     return show_plot([layer], *args, **kwargs)
 
 
-def show_plot(plot, width=PREVIEW_WIDTH, height=PREVIEW_HEIGHT, stroke_thickness_pct=0.003):
+def show_plot(plot, width=PREVIEW_WIDTH, height=PREVIEW_HEIGHT, stroke_thickness_pct=0.003,
+              tolerance=PREVIEW_TOLERANCE, backend='svg'):
     """Preview a plot in a jupyter notebook.
 
     Args:
         plot (list): the plot to display (list of layers)
         width (int): the width of the preview
         height (int): the height of the preview
+        tolerance (float): the largest deviation from the plot's lines
+            allowed in the preview, in pixels. Pass ``None`` to preview the
+            plot at full resolution.
+        backend (str): ``'svg'`` to preview the plot as an SVG, or
+            ``'raster'`` to draw it as a PNG image, which has no cost in the
+            browser however many points the plot has
     
     Returns:
         An object that renders in Jupyter as the provided plot
     """
-    return SVG(data=plot_to_svg(plot, width, height, stroke_thickness_pct=stroke_thickness_pct))
+    if backend == 'raster':
+        return Image(data=plot_to_png(plot, width, height, stroke_thickness_pct))
+    if backend != 'svg':
+        raise ValueError('Unknown preview backend: {!r}'.format(backend))
+
+    if not tolerance:
+        return SVG(data=plot_to_svg(plot, width, height, stroke_thickness_pct=stroke_thickness_pct))
+
+    # Drop runs of points within a pixel cell first, which is cheap, so the
+    # line simplification in plot_to_svg only sees screen-sized detail.
+    plot, _ = decimate_plot(plot, tolerance * plot_scale(plot, width, height))
+    return SVG(data=plot_to_svg(
+        plot, width, height, stroke_thickness_pct=stroke_thickness_pct,
+        simplify=tolerance, precision=tolerance / (4. * width)))
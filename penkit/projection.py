@@ -1,36 +1,120 @@
 """The ``projection`` module provides functions for rotating 2D objects
 (surfaces and textures) in 3D space and projecting them back to 2D.
+
+Textures may be given as ``(x, y)`` tuples or as ``penkit.layer.Layer``
+objects; the resulting layers are of the same kind. A
+``penkit.layer.ChunkedLayer`` texture is projected lazily, a chunk at a
+time, into a ``ChunkedLayer``.
+
+To map several textures onto the same surface at the same angle, prepare
+the surface once with ``prepare_surface`` and pass the result to
+``project_and_occlude_texture`` in place of the surface.
+
+Surfaces may also be ``penkit.surfaces.ImplicitSurface`` objects, which
+are evaluated at the exact position of each texture point, or memory-mapped
+arrays (see ``penkit.surfaces.load_heightmap``), which are read a band of
+rows at a time rather than loaded into memory.
 """
 
+import functools
+import hashlib
+import multiprocessing
+import weakref
+from collections import OrderedDict
+
 import numpy as np
 
+from penkit.layer import ChunkedLayer, Layer, layer_coordinates, replace_coordinates
+from penkit.surfaces import ImplicitSurface
+
 DEFAULT_ANGLE = 45
 
+# Size of the default cache of prepared surfaces
+DEFAULT_CACHE_BYTES = 512 * 2 ** 20
+
+# Number of surface values projected at once for a batch of angles. Batches
+# small enough to stay in cache are faster than larger ones.
+ANGLE_BATCH_ELEMENTS = 2 ** 20
+
+# Memory-mapped surfaces are read in bands of rows of about this many bytes
+# (as float64)
+SURFACE_BAND_BYTES = 64 * 2 ** 20
+
 
 def map_texture_to_surface(texture, surface):
     """Returns values on a surface for points on a texture.
 
     Args:
         texture (texture): the texture to trace over the surface
-        surface (surface): the surface to trace along
+        surface (surface): the surface to trace along. An
+            ``ImplicitSurface`` is evaluated at each point of the texture.
 
     Returns:
         an array of surface heights for each point in the
         texture. Line separators (i.e. values that are ``nan`` in
         the texture) will be ``nan`` in the output, so the output
         will have the same dimensions as the x/y axes in the
-        input texture.
+        input texture. For a ``Layer``, there is one height per point.
     """
-    texture_x, texture_y = texture
-    surface_h, surface_w = surface.shape
+    if isinstance(surface, ImplicitSurface):
+        return surface(*layer_coordinates(texture))
+
+    surface_x, surface_y = _surface_indices(texture, surface.shape)
+    if isinstance(surface, np.memmap):
+        return _map_points_by_band(surface, surface_x, surface_y, _band_rows(surface))
+
+    surface_z = surface[surface_y, surface_x]
+    return surface_z
+
+
+def _band_rows(surface):
+    """Returns the number of rows of a surface to read at a time."""
+    return max(1, SURFACE_BAND_BYTES // (8 * surface.shape[1]))
+
+
+def _group_by_tile(tile, num_tiles):
+    """Groups points by the tile they fall in.
+
+    Returns:
+        tuple: the indices of the points in order of tile, and the position
+        in that order where each tile's points start (with an extra entry
+        for the end)
+    """
+    # A stable sort of small integers is a radix sort, so this is linear in
+    # the number of points.
+    if num_tiles <= np.iinfo(np.uint16).max:
+        tile = tile.astype(np.uint16)
+    order = np.argsort(tile, kind='stable')
+    return order, np.searchsorted(tile[order], np.arange(num_tiles + 1))
+
+
+def _map_points_by_band(surface, surface_x, surface_y, band_rows):
+    """Looks up surface cells a band of rows at a time, so the surface is
+    read in order."""
+    num_bands = -(-surface.shape[0] // band_rows)
+    order, band_starts = _group_by_tile(surface_y // band_rows, num_bands)
+
+    surface_z = np.empty(len(surface_x), dtype=surface.dtype)
+    for i in range(num_bands):
+        points = order[band_starts[i]:band_starts[i + 1]]
+        if len(points):
+            start = i * band_rows
+            band = np.asarray(surface[start:start + band_rows])
+            surface_z[points] = band[surface_y[points] - start, surface_x[points]]
+    return surface_z
+
+
+def _surface_indices(texture, shape):
+    """Returns the column and row of the surface cell under each point of a
+    texture."""
+    texture_x, texture_y = layer_coordinates(texture)
+    surface_h, surface_w = shape
 
     surface_x = np.clip(
         np.int32(surface_w * texture_x - 1e-9), 0, surface_w - 1)
     surface_y = np.clip(
         np.int32(surface_h * texture_y - 1e-9), 0, surface_h - 1)
-
-    surface_z = surface[surface_y, surface_x]
-    return surface_z
+    return surface_x, surface_y
 
 
 def project_texture(texture_xy, texture_z, angle=DEFAULT_ANGLE):
@@ -48,7 +132,8 @@ def project_texture(texture_xy, texture_z, angle=DEFAULT_ANGLE):
 
     Args:
         texture_xy (texture): the texture to project
-        texture_z (np.array): the Z-values to use in the projection
+        texture_z (np.array): the Z-values to use in the projection, as returned
+            by ``map_texture_to_surface``
         angle (float): the angle to project at, in degrees (0 = overhead, 90 = side view)
 
     Returns:
@@ -56,27 +141,52 @@ def project_texture(texture_xy, texture_z, angle=DEFAULT_ANGLE):
     """
     z_coef = np.sin(np.radians(angle))
     y_coef = np.cos(np.radians(angle))
-    surface_x, surface_y = texture
-    return (surface_x, -surface_y * y_coef + surface_z * z_coef)
+    surface_x, surface_y = layer_coordinates(texture_xy)
+    return replace_coordinates(
+        texture_xy, surface_x, -surface_y * y_coef + texture_z * z_coef)
 
 
-def project_surface(surface, angle=DEFAULT_ANGLE):
+def project_surface(surface, angle=DEFAULT_ANGLE, out=None):
     """Returns the height of the surface when projected at the given angle.
 
     Args:
         surface (surface): the surface to project
         angle (float): the angle at which to project the surface
+        out (np.array): an array to write the projected surface to, e.g. a
+            memory-mapped array for a surface larger than memory
+            (optional). The surface is then projected a band of rows at a
+            time, as it is if it is memory-mapped.
 
     Returns:
-        surface: A projected surface.
+        surface: A projected surface. The projection of an
+        ``ImplicitSurface`` is another ``ImplicitSurface``.
     """
+    if isinstance(surface, ImplicitSurface):
+        return ImplicitSurface(
+            functools.partial(_projected_height, function=surface.function, angle=angle),
+            surface.dims)
+
     z_coef = np.sin(np.radians(angle))
     y_coef = np.cos(np.radians(angle))
 
-    surface_height, surface_width = surface.shape
-    slope = np.tile(np.linspace(0., 1., surface_height), [surface_width, 1]).T
+    slope = np.linspace(0., 1., surface.shape[0])[:, np.newaxis]
+    if out is None and not isinstance(surface, np.memmap):
+        return slope * y_coef + surface * z_coef
+
+    if out is None:
+        out = np.empty(surface.shape)
+    band_rows = _band_rows(surface)
+    for start in range(0, surface.shape[0], band_rows):
+        stop = start + band_rows
+        out[start:stop] = slope[start:stop] * y_coef + surface[start:stop] * z_coef
+    return out
 
-    return slope * y_coef + surface * z_coef
+
+def _projected_height(x, y, function, angle):
+    """Evaluates an implicit surface projected like ``project_surface``."""
+    z_coef = np.sin(np.radians(angle))
+    y_coef = np.cos(np.radians(angle))
+    return y * y_coef + function(x, y) * z_coef
 
 
 def project_texture_on_surface(texture, surface, angle=DEFAULT_ANGLE):
@@ -91,9 +201,17 @@ def project_texture_on_surface(texture, surface, angle=DEFAULT_ANGLE):
         layer: A layer.
     """
     projected_surface = project_surface(surface, angle)
-    texture_x, _ = texture
+    if isinstance(texture, ChunkedLayer):
+        return texture.map(lambda chunk: _map_to_projected_surface(chunk, projected_surface))
+    return _map_to_projected_surface(texture, projected_surface)
+
+
+def _map_to_projected_surface(texture, projected_surface):
+    """Replaces the y coordinates of a texture with heights on a projected
+    surface."""
+    texture_x, _ = layer_coordinates(texture)
     texture_y = map_texture_to_surface(texture, projected_surface)
-    return texture_x, texture_y
+    return replace_coordinates(texture, texture_x, texture_y)
 
 
 def _make_occlusion_mask(projected_surface):
@@ -125,19 +243,469 @@ def _remove_hidden_parts(projected_surface):
     return surface
 
 
-def project_and_occlude_texture(texture, surface, angle=DEFAULT_ANGLE):
+def _project_and_occlude_columns(surface, angle, start, stop, dtype):
+    """Projects columns ``start:stop`` of a surface and removes their hidden
+    parts.
+
+    Occlusion runs down each column independently, so the result for each
+    column is the same as for the whole surface.
+    """
+    z_coef = np.sin(np.radians(angle))
+    y_coef = np.cos(np.radians(angle))
+
+    slope = np.linspace(0., 1., surface.shape[0], dtype=dtype)[:, np.newaxis]
+    projected = np.asarray(surface[:, start:stop], dtype=dtype) * dtype(z_coef)
+    projected += slope * dtype(y_coef)
+
+    visible_max = np.maximum.accumulate(projected)
+    projected[projected != visible_max] = np.nan
+    return projected
+
+
+def _project_and_occlude_tiled(texture, surface, angle, tile_width, dtype):
+    """Looks up the height of each texture point on the projected, occluded
+    surface, one tile of surface columns at a time.
+
+    Returns:
+        np.array: the projected y coordinate of each texture point
+    """
+    surface_w = surface.shape[1]
+    surface_x, surface_y = _surface_indices(texture, surface.shape)
+    num_tiles = -(-surface_w // tile_width)
+    order, tile_starts = _group_by_tile(surface_x // tile_width, num_tiles)
+
+    texture_z = np.empty(len(surface_x), dtype=dtype)
+    for i in range(num_tiles):
+        points = order[tile_starts[i]:tile_starts[i + 1]]
+        if not len(points):
+            continue
+        start = i * tile_width
+        projected = _project_and_occlude_columns(
+            surface, angle, start, start + tile_width, dtype)
+        texture_z[points] = projected[surface_y[points], surface_x[points] - start]
+    return texture_z
+
+
+def _project_and_occlude_bands(texture, surface, angle, band_rows, dtype):
+    """Looks up the height of each texture point on the projected, occluded
+    surface, one band of surface rows at a time.
+
+    The running maximum of each column is carried from one band to the
+    next, so the surface is read once, in order, and the result is the same
+    as for the whole surface.
+
+    Returns:
+        np.array: the projected y coordinate of each texture point
+    """
+    z_coef = np.sin(np.radians(angle))
+    y_coef = np.cos(np.radians(angle))
+
+    surface_h, surface_w = surface.shape
+    surface_x, surface_y = _surface_indices(texture, surface.shape)
+    num_bands = -(-surface_h // band_rows)
+    order, band_starts = _group_by_tile(surface_y // band_rows, num_bands)
+
+    slope = np.linspace(0., 1., surface_h, dtype=dtype)[:, np.newaxis]
+    running_max = np.full(surface_w, -np.inf, dtype=dtype)
+    texture_z = np.empty(len(surface_x), dtype=dtype)
+    for i in range(num_bands):
+        start = i * band_rows
+        stop = start + band_rows
+        projected = np.asarray(surface[start:stop], dtype=dtype) * dtype(z_coef)
+        projected += slope[start:stop] * dtype(y_coef)
+
+        visible_max = np.maximum.accumulate(projected)
+        np.maximum(visible_max, running_max, out=visible_max)
+        running_max = visible_max[-1]
+
+        points = order[band_starts[i]:band_starts[i + 1]]
+        if len(points):
+            rows = surface_y[points] - start
+            columns = surface_x[points]
+            z = projected[rows, columns]
+            z[z != visible_max[rows, columns]] = np.nan
+            texture_z[points] = z
+    return texture_z
+
+
+class PreparedSurface(object):
+    """A surface projected at an angle, with its hidden parts removed.
+
+    This is the part of ``project_and_occlude_texture`` which depends only
+    on the surface, so mapping a texture onto a prepared surface only costs
+    a lookup per texture point.
+
+    An ``ImplicitSurface`` is projected and occluded on its grid, which
+    decides which texture points are hidden. The heights of the visible
+    points are evaluated exactly.
+
+    Attributes:
+        projected (np.array): the projected surface, ``nan`` where hidden
+        angle (float): the angle the surface was projected at
+        implicit (ImplicitSurface): the projected implicit surface, if the
+            surface was implicit
+    """
+
+    __slots__ = ('projected', 'angle', 'implicit')
+
+    def __init__(self, surface, angle=DEFAULT_ANGLE, dtype=np.float64):
+        self.implicit = None
+        if isinstance(surface, ImplicitSurface):
+            self.implicit = project_surface(surface, angle)
+            surface = surface.grid
+        self.projected = _project_and_occlude_columns(
+            surface, angle, 0, surface.shape[1], np.dtype(dtype).type)
+        self.angle = angle
+
+    @property
+    def nbytes(self):
+        """int: the memory used by the projected surface."""
+        return self.projected.nbytes
+
+    def map_texture(self, texture):
+        """Maps a texture onto the surface, like ``project_and_occlude_texture``.
+
+        Args:
+            texture (texture): the texture to map
+
+        Returns:
+            layer: A layer.
+        """
+        texture_x, _ = layer_coordinates(texture)
+        texture_y = map_texture_to_surface(texture, self.projected)
+        if self.implicit is not None:
+            exact_y = map_texture_to_surface(texture, self.implicit)
+            texture_y = np.where(np.isnan(texture_y), np.nan, exact_y).astype(
+                self.projected.dtype, copy=False)
+        return _occluded_layer(texture, texture_x, texture_y)
+
+
+class SurfaceCache(object):
+    """A least-recently-used cache of prepared surfaces, limited in size.
+
+    Surfaces are looked up by identity: preparing the same array object at
+    the same angle twice returns the cached result, and entries are dropped
+    when their array is garbage collected. A surface modified in place is
+    not noticed, so call ``clear`` after doing so, or look surfaces up by
+    content instead, which costs a hash of the surface on every lookup but
+    also matches equal copies.
+
+    Args:
+        max_bytes (int): the most memory the cached surfaces may use
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, surface, angle=DEFAULT_ANGLE, dtype=np.float64, by_content=False):
+        """Returns a prepared surface, from the cache if possible.
+
+        Args:
+            surface (surface): the surface to prepare
+            angle (float): the angle to project at, in degrees
+            dtype (np.dtype): the floating point type of the projected surface
+            by_content (bool): if true, look the surface up by a hash of its
+                contents rather than by identity
+
+        Returns:
+            PreparedSurface: the prepared surface
+        """
+        dtype = np.dtype(dtype)
+        if by_content:
+            data = np.ascontiguousarray(surface)
+            digest = hashlib.blake2b(memoryview(data).cast('B')).hexdigest()
+            key = ('content', digest, data.shape, data.dtype.str, angle, dtype.str)
+        else:
+            key = ('identity', id(surface), angle, dtype.str)
+
+        entry = self._entries.get(key)
+        if entry is not None and (entry[1] is None or entry[1]() is surface):
+            self._entries.move_to_end(key)
+            return entry[0]
+
+        prepared = PreparedSurface(surface, angle, dtype)
+        if prepared.nbytes <= self.max_bytes:
+            # The weak reference does not keep the surface alive; its callback
+            # evicts the entry when the surface is collected, and lookups
+            # check it in case the id has been reused before then.
+            ref = None if by_content else weakref.ref(
+                surface, lambda _, key=key: self._discard(key))
+            self._discard(key)
+            self._entries[key] = (prepared, ref)
+            self.nbytes += prepared.nbytes
+            while self.nbytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+        return prepared
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[0].nbytes
+
+    def clear(self):
+        """Removes every surface from the cache."""
+        self._entries.clear()
+        self.nbytes = 0
+
+
+surface_cache = SurfaceCache()
+
+
+def _caching(cache):
+    """Tests whether a ``cache`` argument asks for caching. An empty
+    ``SurfaceCache`` does, although it is falsy."""
+    return cache is not None and cache is not False
+
+
+def prepare_surface(surface, angle=DEFAULT_ANGLE, dtype=np.float64, cache=True,
+                    by_content=False):
+    """Projects a surface and removes its hidden parts, for mapping textures
+    onto with ``project_and_occlude_texture``.
+
+    Args:
+        surface (surface): the surface to prepare
+        angle (float): the angle to project at, in degrees (0 = overhead, 90 = side view)
+        dtype (np.dtype): the floating point type of the projected surface
+        cache (SurfaceCache): the cache to use. By default, the module's
+            ``surface_cache`` is used; pass ``False`` to skip caching.
+        by_content (bool): if true, look the surface up in the cache by a hash
+            of its contents rather than by identity
+
+    Returns:
+        PreparedSurface: the prepared surface
+    """
+    if not _caching(cache):
+        return PreparedSurface(surface, angle, dtype)
+    if cache is True:
+        cache = surface_cache
+    return cache.get(surface, angle, dtype, by_content)
+
+
+def project_and_occlude_texture(texture, surface, angle=DEFAULT_ANGLE, tile_width=None,
+                                dtype=None, cache=False, band_rows=None):
     """Projects a texture onto a surface with occluded areas removed.
 
+    By default the whole projected surface is held in memory, along with a
+    few temporary copies of it. Passing ``tile_width`` or ``band_rows``
+    bounds the memory used for large surfaces: the surface is then
+    projected and occluded a band of columns or rows at a time, so only a
+    few arrays the size of one band are needed. Bands of rows read the
+    surface in order, so they are used for memory-mapped surfaces. The
+    result is the same either way.
+
     Args:
         texture (texture): the texture to map to the projected surface
-        surface (surface): the surface to project
+        surface (surface): the surface to project, or a ``PreparedSurface``
+            (in which case ``angle`` is ignored). An ``ImplicitSurface`` is
+            prepared on its grid, without tiling.
         angle (float): the angle to project at, in degrees (0 = overhead, 90 = side view)
+        tile_width (int): if provided, the number of surface columns to
+            process at a time
+        dtype (np.dtype): the floating point type used for the projected
+            surface. ``np.float32`` halves memory use, but rounds the output
+            to single precision. Implies tiling, in one tile by default.
+        cache (SurfaceCache): if true, prepare the surface through this cache
+            (or the module's ``surface_cache`` if ``True``), so later calls
+            with the same surface and angle reuse the projection. Cannot be
+            combined with ``tile_width`` or ``band_rows``.
+        band_rows (int): if provided, the number of surface rows to process
+            at a time. By default, memory-mapped surfaces are processed in
+            bands of about ``SURFACE_BAND_BYTES``. Cannot be combined with
+            ``tile_width``.
 
     Returns:
         layer: A layer.
+
+    Examples:
+        >>> cache = SurfaceCache()
+        >>> surface = np.zeros((4, 4))
+        >>> for _ in range(2):
+        ...     _ = project_and_occlude_texture((np.array([.5]), np.array([.5])), surface, cache=cache)
+        >>> len(cache)
+        1
+
+        A texture read a chunk at a time, or given as a ``Layer``, draws the
+        same lines as the whole texture:
+
+        >>> from penkit.layer import Layer
+        >>> from penkit.surfaces import make_sine_surface
+        >>> from penkit.textures import make_grid_texture
+        >>> from penkit.write import plot_to_svg
+        >>> texture = make_grid_texture(5, 5, 50)
+        >>> surface = make_sine_surface((60, 60)) * .5
+        >>> expected = plot_to_svg([project_and_occlude_texture(texture, surface, 60)], 11, 8.5)
+        >>> [plot_to_svg([project_and_occlude_texture(layer, surface, 60)], 11, 8.5) == expected
+        ...  for layer in (make_grid_texture(5, 5, 50, chunk_size=100), Layer.from_tuple(texture))]
+        [True, True]
+
+        A memory-mapped surface is read in bands of rows, with the same result
+        as in memory:
+
+        >>> import os
+        >>> import tempfile
+        >>> from penkit.surfaces import load_heightmap
+        >>> filename = os.path.join(tempfile.mkdtemp(), 'surface.npy')
+        >>> np.save(filename, surface)
+        >>> in_memory = project_and_occlude_texture(texture, surface, 60)
+        >>> [all(np.array_equal(a, b, equal_nan=True) for a, b in zip(layer, in_memory))
+        ...  for layer in (project_and_occlude_texture(texture, load_heightmap(filename), 60),
+        ...                project_and_occlude_texture(texture, load_heightmap(filename), 60,
+        ...                                            band_rows=7))]
+        [True, True]
     """
+    if isinstance(surface, ImplicitSurface):
+        surface = prepare_surface(surface, angle, dtype or np.float64, cache)
+
+    if (band_rows is None and tile_width is None and not _caching(cache) and
+            isinstance(surface, np.memmap)):
+        band_rows = _band_rows(surface)
+    if band_rows is not None and tile_width is not None:
+        raise ValueError('A surface cannot be tiled by both columns and rows')
+
+    if isinstance(texture, ChunkedLayer):
+        if tile_width is None and band_rows is None and not isinstance(surface, PreparedSurface):
+            # Project the surface once for all of the chunks.
+            surface = prepare_surface(surface, angle, dtype or np.float64, cache)
+        return texture.map(lambda chunk: project_and_occlude_texture(
+            chunk, surface, angle, tile_width, dtype, band_rows=band_rows))
+
+    if isinstance(surface, PreparedSurface):
+        return surface.map_texture(texture)
+
+    if _caching(cache):
+        if tile_width is not None or band_rows is not None:
+            raise ValueError('A cached surface cannot be tiled')
+        return prepare_surface(surface, angle, dtype or np.float64, cache).map_texture(texture)
+
+    if band_rows is not None:
+        texture_x, _ = layer_coordinates(texture)
+        texture_y = _project_and_occlude_bands(
+            texture, surface, angle, band_rows, np.dtype(dtype or np.float64).type)
+        return _occluded_layer(texture, texture_x, texture_y)
+
+    if tile_width is not None or dtype is not None:
+        texture_x, _ = layer_coordinates(texture)
+        texture_y = _project_and_occlude_tiled(
+            texture, surface, angle, tile_width or surface.shape[1],
+            np.dtype(dtype or np.float64).type)
+        return _occluded_layer(texture, texture_x, texture_y)
+
     projected_surface = project_surface(surface, angle)
     projected_surface = _remove_hidden_parts(projected_surface)
     texture_y = map_texture_to_surface(texture, projected_surface)
-    texture_x, _ = texture
+    texture_x, _ = layer_coordinates(texture)
+    return _occluded_layer(texture, texture_x, texture_y)
+
+
+def _occluded_layer(texture, texture_x, texture_y):
+    """Builds the layer for a projected texture whose hidden points are ``nan``.
+
+    Args:
+        texture (texture): the texture that was projected
+        texture_x (np.array): the x coordinates of the projected points
+        texture_y (np.array): the y coordinates of the projected points
+
+    Returns:
+        layer: A layer. For a ``Layer`` texture, hidden points are removed and
+        the polylines are split around them.
+    """
+    if isinstance(texture, Layer):
+        projected = texture.with_points(np.column_stack([texture_x, texture_y]))
+        return projected.filter(~np.isnan(texture_y))
     return texture_x, texture_y
+
+
+def _project_angle_batch(texture, surface, surface_x, surface_y, angles):
+    """Projects a texture onto a surface at each of a batch of angles.
+
+    The surface is projected at every angle at once as a 3-D array, and
+    occlusion is only checked at the texture's points.
+    """
+    # The coefficients are computed per angle exactly as project_surface
+    # does, so the results match it bit for bit.
+    z_coefs = np.array([np.sin(np.radians(angle)) for angle in angles])
+    y_coefs = np.array([np.cos(np.radians(angle)) for angle in angles])
+    slope = np.linspace(0., 1., surface.shape[0])[:, np.newaxis, np.newaxis]
+
+    # Laid out as (row, angle, column) so each step of the running maximum
+    # down the rows is a single contiguous operation over every angle.
+    num_rows, num_columns = surface.shape
+    projected = surface[:, np.newaxis, :] * z_coefs[:, np.newaxis]
+    projected += slope * y_coefs[:, np.newaxis]
+    flat = projected.reshape(-1)
+    row_stride = len(angles) * num_columns
+    points = surface_y.astype(np.intp) * row_stride + surface_x
+    texture_z = [flat[points + i * num_columns] for i in range(len(angles))]
+
+    for row in range(1, num_rows):
+        np.maximum(projected[row - 1], projected[row], out=projected[row])
+
+    texture_x, _ = layer_coordinates(texture)
+    layers = []
+    for i, z in enumerate(texture_z):
+        z[z != flat[points + i * num_columns]] = np.nan
+        layers.append(_occluded_layer(texture, texture_x, z))
+    return layers
+
+
+_angle_worker_args = None
+
+
+def _init_angle_worker(texture, surface):
+    """Stores the arguments shared by every batch in a worker process."""
+    global _angle_worker_args
+    surface_x, surface_y = _surface_indices(texture, surface.shape)
+    _angle_worker_args = texture, surface, surface_x, surface_y
+
+
+def _project_angle_batch_worker(angles):
+    """Projects one batch of angles in a worker process."""
+    return _project_angle_batch(*(_angle_worker_args + (angles,)))
+
+
+def project_and_occlude_texture_angles(texture, surface, angles, workers=None,
+                                       batch_size=None):
+    """Projects a texture onto a surface at each of several angles, with
+    occluded areas removed.
+
+    This gives the same layers as calling ``project_and_occlude_texture``
+    for each angle, for example to render the frames of an animation, but
+    shares the work that does not depend on the angle.
+
+    Args:
+        texture (texture): the texture to map to the projected surface
+        surface (surface): the surface to project. An ``ImplicitSurface`` is
+            projected at each angle in turn.
+        angles (list): the angles to project at, in degrees
+        workers (int): if greater than one, project batches of angles in a
+            pool of this many processes
+        batch_size (int): the number of angles to project at once. By
+            default, as many as fit in ``ANGLE_BATCH_ELEMENTS`` values.
+
+    Returns:
+        list: a layer for each angle
+    """
+    angles = [float(angle) for angle in np.atleast_1d(angles)]
+    if isinstance(surface, ImplicitSurface):
+        return [project_and_occlude_texture(texture, surface, angle) for angle in angles]
+
+    if batch_size is None:
+        batch_size = max(1, ANGLE_BATCH_ELEMENTS // surface.size)
+    batches = [angles[i:i + batch_size] for i in range(0, len(angles), batch_size)]
+
+    if not workers or workers <= 1:
+        surface_x, surface_y = _surface_indices(texture, surface.shape)
+        return [layer for batch in batches
+                for layer in _project_angle_batch(texture, surface, surface_x, surface_y, batch)]
+
+    pool = multiprocessing.Pool(workers, _init_angle_worker, (texture, surface))
+    try:
+        return [layer for layers in pool.imap(_project_angle_batch_worker, batches)
+                for layer in layers]
+    finally:
+        pool.terminate()
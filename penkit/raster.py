@@ -0,0 +1,206 @@
+"""The ``raster`` module draws plots as images, for previewing plots which
+are too dense to display as SVG.
+
+Lines are rasterized with numpy: each segment is sampled about once per
+pixel and every sample is splatted into its four nearest pixels, which
+anti-aliases the lines. The image is framed the same way as the SVG output
+of ``penkit.write``, and each layer is drawn in its colour from
+``PLOT_COLORS``.
+"""
+
+import struct
+import zlib
+
+import numpy as np
+from scipy.ndimage import uniform_filter
+
+from penkit.write import PLOT_COLORS, STROKE_THICKNESS_PCT, _flipped_view_box, _iter_path_chunks
+
+# RGB values of the SVG colour names in PLOT_COLORS
+COLOR_VALUES = {
+    'black': (0, 0, 0),
+    'red': (255, 0, 0),
+    'green': (0, 128, 0),
+    'blue': (0, 0, 255),
+    'cyan': (0, 255, 255),
+    'orange': (255, 165, 0),
+}
+
+BACKGROUND_COLOR = (255, 255, 255)
+
+# Number of points drawn at a time. Each chunk makes a pass over the whole
+# image, so this is larger than the chunk size used to write SVG.
+RASTER_CHUNK_SIZE = 1000000
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def _segment_samples(x0, y0, x1, y1):
+    """Samples segments about once per unit of length.
+
+    Returns:
+        tuple: the x and y coordinates of the samples, and the length of
+        line each sample stands for
+    """
+    dx = x1 - x0
+    dy = y1 - y0
+    length = np.hypot(dx, dy)
+    samples = np.maximum(np.ceil(length), 1).astype(np.int64)
+    if samples.max(initial=1) == 1:
+        # Common case for dense plots: every segment is shorter than a pixel.
+        return x0 + .5 * dx, y0 + .5 * dy, length
+
+    owner = np.repeat(np.arange(len(samples)), samples)
+    first = np.cumsum(samples) - samples
+    t = (np.arange(samples.sum()) - first[owner] + .5) / samples[owner]
+    return x0[owner] + t * dx[owner], y0[owner] + t * dy[owner], (length / samples)[owner]
+
+
+def _splat(coverage, x, y, weight):
+    """Adds weighted samples to a padded coverage image by bilinear splatting.
+
+    Args:
+        coverage (np.array): a ``(height + 2, width + 2)`` array, updated in
+            place. The one pixel border catches samples at the image edges.
+        x (np.array): the x pixel coordinates of the samples
+        y (np.array): the y pixel coordinates of the samples
+        weight (np.array): the weight of each sample
+    """
+    padded_height, padded_width = coverage.shape
+    # Pixel centres are at half-integer coordinates.
+    fx = np.clip(x + .5, 0, padded_width - 1.001)
+    fy = np.clip(y + .5, 0, padded_height - 1.001)
+    ix = fx.astype(np.int64)
+    iy = fy.astype(np.int64)
+    wx = fx - ix
+    wy = fy - iy
+
+    index = iy * padded_width + ix
+    flat = coverage.reshape(-1)
+    size = flat.size
+    flat += np.bincount(index, weight * (1 - wx) * (1 - wy), minlength=size)
+    flat += np.bincount(index + 1, weight * wx * (1 - wy), minlength=size)
+    flat += np.bincount(index + padded_width, weight * (1 - wx) * wy, minlength=size)
+    flat += np.bincount(index + padded_width + 1, weight * wx * wy, minlength=size)
+
+
+def _layer_coverage(layer, view_box, width, height, chunk_size):
+    """Computes the length of line from a layer which falls in each pixel."""
+    scale_x = width / view_box[2]
+    scale_y = height / view_box[3]
+    coverage = np.zeros((height + 2, width + 2))
+
+    last = None
+    for x, y, starts in _iter_path_chunks(layer, chunk_size, flip=True):
+        if not len(starts):
+            continue
+        x = (x - view_box[0]) * scale_x
+        y = (y - view_box[1]) * scale_y
+        if last is not None and not starts[0]:
+            # Join the first point of the chunk to the end of the last one.
+            x = np.concatenate([[last[0]], x])
+            y = np.concatenate([[last[1]], y])
+            starts = np.concatenate([[True], starts])
+        last = x[-1], y[-1]
+
+        joined = ~starts[1:]
+        sample_x, sample_y, weight = _segment_samples(
+            x[:-1][joined], y[:-1][joined], x[1:][joined], y[1:][joined])
+        _splat(coverage, sample_x, sample_y, weight)
+
+    return coverage[1:-1, 1:-1]
+
+
+def rasterize_plot(plot, width, height, stroke_thickness_pct=STROKE_THICKNESS_PCT,
+                   chunk_size=RASTER_CHUNK_SIZE):
+    """Draws a plot as an RGB image.
+
+    Args:
+        plot (list): the layers to draw
+        width (int): the width of the image in pixels
+        height (int): the height of the image in pixels
+        stroke_thickness_pct (float): the line width, relative to the width
+            of the view box (as in ``penkit.write.plot_to_svg``)
+        chunk_size (int): the number of points to draw at a time
+
+    Returns:
+        np.array: a ``(height, width, 3)`` array of ``uint8`` colour values
+    """
+    width = int(width)
+    height = int(height)
+    view_box = _flipped_view_box(plot, aspect_ratio=height / float(width))
+    line_width = stroke_thickness_pct * width
+    filter_size = int(round(line_width))
+
+    image = np.empty((height, width, 3))
+    image[:] = BACKGROUND_COLOR
+    for i, layer in enumerate(plot):
+        coverage = _layer_coverage(layer, view_box, width, height, chunk_size)
+        if filter_size > 1:
+            # Spread lines wider than a pixel, keeping their total coverage.
+            coverage = uniform_filter(coverage, filter_size, mode='constant')
+        alpha = np.minimum(coverage * line_width, 1.)[:, :, np.newaxis]
+        color = np.array(COLOR_VALUES[PLOT_COLORS[i % len(PLOT_COLORS)]], dtype=float)
+        image *= 1. - alpha
+        image += alpha * color
+
+    return np.round(image).astype(np.uint8)
+
+
+def _png_chunk(tag, data):
+    """Packs a PNG chunk with its length and checksum."""
+    return (struct.pack('>I', len(data)) + tag + data +
+            struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+
+def encode_png(image, compress_level=6):
+    """Encodes an image as a PNG file.
+
+    Args:
+        image (np.array): an array of ``uint8`` values, of shape
+            ``(height, width)`` for greyscale, or ``(height, width, 3)`` or
+            ``(height, width, 4)`` for RGB or RGBA
+        compress_level (int): the zlib compression level, from 0 to 9
+
+    Returns:
+        bytes: the contents of a PNG file
+
+    Examples:
+        Images decode to the same values:
+
+        >>> from io import BytesIO
+        >>> from matplotlib.image import imread
+        >>> image = np.arange(96, dtype=np.uint8).reshape(4, 6, 4) * 2
+        >>> [bool((np.round(imread(BytesIO(encode_png(pixels))) * 255) == pixels).all())
+        ...  for pixels in (image[:, :, 0], image[:, :, :3], image)]
+        [True, True, True]
+    """
+    image = np.asarray(image, dtype=np.uint8)
+    height, width = image.shape[:2]
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    color_type = {1: 0, 3: 2, 4: 6}[channels]
+
+    # Each row is prefixed by its filter type, 0 (none).
+    rows = np.zeros((height, width * channels + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, -1)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)
+    return (PNG_SIGNATURE + _png_chunk(b'IHDR', header) +
+            _png_chunk(b'IDAT', zlib.compress(rows.tobytes(), compress_level)) +
+            _png_chunk(b'IEND', b''))
+
+
+def plot_to_png(plot, width, height, stroke_thickness_pct=STROKE_THICKNESS_PCT):
+    """Draws a plot as a PNG image.
+
+    Args:
+        plot (list): the layers to draw
+        width (int): the width of the image in pixels
+        height (int): the height of the image in pixels
+        stroke_thickness_pct (float): the line width, relative to the width
+            of the view box
+
+    Returns:
+        bytes: the contents of a PNG file
+    """
+    return encode_png(rasterize_plot(plot, width, height, stroke_thickness_pct))
@@ -0,0 +1,73 @@
+"""The ``rng`` module turns the ``seed`` arguments of penkit's random
+functions into independent ``np.random.Generator`` objects.
+
+A seed may be ``None``, an integer, a ``np.random.SeedSequence`` or a
+``np.random.Generator``. Nothing here seeds numpy's global random state, so
+random surfaces and textures can be made from several threads or
+processes at once. To make a set of reproducible, statistically independent
+results, spawn a seed for each of them with ``spawn_seeds``.
+
+With no seed, a seed is drawn from numpy's global random state, so calling
+``np.random.seed`` first still makes the result reproducible.
+"""
+
+import numpy as np
+
+# Seeds drawn from the global random state are below this
+MAX_SEED = 2 ** 63
+
+
+def seed_sequence(seed=None):
+    """Makes a ``SeedSequence`` from a seed.
+
+    Args:
+        seed: ``None``, an integer, a ``SeedSequence`` or a ``Generator``. A
+            generator is advanced to draw the seed.
+
+    Returns:
+        np.random.SeedSequence: A seed sequence.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if isinstance(seed, np.random.Generator):
+        return np.random.SeedSequence(int(seed.integers(MAX_SEED)))
+    if seed is None:
+        seed = np.random.randint(MAX_SEED, dtype=np.int64)
+    return np.random.SeedSequence(seed)
+
+
+def make_generator(seed=None):
+    """Makes a random generator from a seed.
+
+    Args:
+        seed: ``None``, an integer, a ``SeedSequence`` or a ``Generator``,
+            which is returned as is.
+
+    Returns:
+        np.random.Generator: A random generator.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed_sequence(seed))
+
+
+def spawn_seeds(seed, count):
+    """Makes independent seeds for a number of random results.
+
+    The seeds depend only on ``seed`` and their position, so results made
+    from them are the same however the work is divided up.
+
+    Args:
+        seed: the parent seed (see ``seed_sequence``)
+        count (int): the number of seeds to make
+
+    Returns:
+        list: ``count`` seed sequences
+
+    Examples:
+        >>> a = [make_generator(s).integers(100) for s in spawn_seeds(1, 3)]
+        >>> b = [make_generator(s).integers(100) for s in spawn_seeds(1, 3)]
+        >>> a == b
+        True
+    """
+    return seed_sequence(seed).spawn(count)
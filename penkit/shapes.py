@@ -1,6 +1,48 @@
 import numpy as np
 
-def arc(center, radius, start_angle, end_angle, resolution=100):
+def chord_angle(radius, tolerance):
+    """Returns the largest angle a chord of a circle can span while staying
+    within a tolerance of the circle.
+
+    Args:
+        radius (float): the radius of the circle
+        tolerance (float): the largest distance allowed between the chord and
+            the circle, in the same units as the radius
+
+    Returns:
+        float: the angle, in radians (an array if either argument is)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = 1. - tolerance / np.abs(radius)
+    return 2 * np.arccos(np.clip(np.nan_to_num(ratio, nan=-1.), -1., 1.))
+
+
+def arc_resolution(radius, sweep, tolerance):
+    """Returns the number of points needed to draw an arc to within a
+    tolerance.
+
+    The tolerance is in the units of the coordinates. If the plot will be
+    scaled to fit the page, divide the pen's accuracy by that scale.
+
+    Args:
+        radius (float): the radius of the arc
+        sweep (float): the angle the arc sweeps through, in radians
+        tolerance (float): the largest distance allowed between the drawn
+            chords and the arc
+
+    Returns:
+        int: the number of points (an array if any argument is)
+
+    Examples:
+        >>> arc_resolution(np.array([0.1, 500.]), 2 * np.pi, 0.05)
+        array([  4, 224])
+    """
+    segments = np.maximum(np.ceil(np.abs(sweep) / chord_angle(radius, tolerance)), 1)
+    resolution = segments.astype(np.intp) + 1
+    return resolution if np.ndim(resolution) else int(resolution)
+
+
+def arc(center, radius, start_angle, end_angle, resolution=100, tolerance=None):
     """Draws an arc
 
     Args:
@@ -8,10 +50,16 @@ def arc(center, radius, start_angle, end_angle, resolution=100):
         radius (float): the radius of the circle inferred by the arc
         start_angle (float): the starting angle position of the arc
         end_angle (float): the ending angle position of the arc
+        resolution (int): the number of points on the arc
+        tolerance (float): if provided, the resolution is chosen so the
+            drawn arc is within this distance of the true one (see
+            ``arc_resolution``)
     
     Returns:
         layer: A layer.
     """
+    if tolerance is not None:
+        resolution = arc_resolution(radius, end_angle - start_angle, tolerance)
     linspace = np.linspace(0., 1., resolution)
     angles = start_angle + (end_angle - start_angle) * linspace
     return (
@@ -19,8 +67,8 @@ def arc(center, radius, start_angle, end_angle, resolution=100):
         (np.sin(angles) * radius) + center[1],
     )
 
-def circle(center, radius, resolution=100):
-    return arc(center, radius, 0, 2*np.pi, resolution)
+def circle(center, radius, resolution=100, tolerance=None):
+    return arc(center, radius, 0, 2*np.pi, resolution, tolerance)
 
 def line(origin, end=None, vector=None, length=None, angle=None, resolution=2):
     """Draws a line. One of these must be specified: end, vector, or (length, angle)
@@ -82,3 +130,288 @@ def ngon(n, origin=(0,0), diameter=1.0, resolution=2):
 
     return ngon_layer
 
+
+def _broadcast_shapes(centers, *values):
+    """Broadcasts the per-shape arguments of a batched shape function.
+
+    Args:
+        centers (array): a pair, or an array of pairs
+        *values: scalars or arrays with a value per shape
+
+    Returns:
+        list: the x and y coordinates of the centers, then each of the
+        values, as 1-D arrays of the same length
+    """
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    values = [np.asarray(value).reshape(-1) for value in values]
+    return [np.ravel(a) for a in np.broadcast_arrays(centers[:, 0], centers[:, 1], *values)]
+
+
+def _separated_layout(counts):
+    """Lays out shapes with the given numbers of points end to end, each
+    followed by a separator.
+
+    Returns:
+        tuple: the shape of each point, the index of each point within its
+        shape, the position of each point in the layer, and the length of
+        the layer
+    """
+    counts = np.asarray(counts, dtype=np.intp)
+    starts = np.cumsum(counts + 1) - (counts + 1)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    index = np.arange(counts.sum()) - np.repeat(starts - np.arange(len(counts)), counts)
+    return owner, index, starts[owner] + index, int((counts + 1).sum())
+
+
+def _interpolate(start, stop, counts, owner, index):
+    """Evaluates ``np.linspace(start, stop, count)`` for each shape at once,
+    giving the same values."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        step = (stop - start) / (counts - 1)
+        values = np.where(counts[owner] > 1, index * step[owner], 0.) + start[owner]
+    last = index == counts[owner] - 1
+    values[last & (counts[owner] > 1)] = stop[owner][last & (counts[owner] > 1)]
+    return values
+
+
+def _all_equal(values):
+    """Tests whether an array is non-empty and all of its values are equal."""
+    return bool(len(values)) and bool((values == values[0]).all())
+
+
+def _uniform_count(counts):
+    """Returns the number of points in every shape, if they all have the
+    same number, or else None."""
+    if _all_equal(counts):
+        return int(counts[0])
+    return None
+
+
+def _separated_rows(num_shapes, count):
+    """Allocates a layer for shapes of ``count`` points each, with a
+    separator after each shape.
+
+    Returns:
+        tuple: the x and y coordinates, as ``(num_shapes, count + 1)``
+        arrays whose last column holds the separators. The other columns
+        are to be filled in.
+    """
+    x = np.empty((num_shapes, count + 1))
+    y = np.empty((num_shapes, count + 1))
+    x[:, -1] = np.nan
+    y[:, -1] = np.nan
+    return x, y
+
+
+def _separated_layer(x, y, positions, size):
+    """Places points in a layer of the given length, with separators in the
+    remaining positions."""
+    layer_x = np.full(size, np.nan)
+    layer_y = np.full(size, np.nan)
+    layer_x[positions] = x
+    layer_y[positions] = y
+    return layer_x, layer_y
+
+
+def arcs(centers, radii, start_angles, end_angles, resolution=100, tolerance=None):
+    """Draws many arcs at once, as ``arc`` does for one.
+
+    Every argument may be a single value, or have a value per arc.
+
+    Args:
+        centers (array): the centers of the circles inferred by the arcs, as
+            a pair or an ``(n, 2)`` array
+        radii (array): the radii of the circles inferred by the arcs
+        start_angles (array): the starting angle position of each arc
+        end_angles (array): the ending angle position of each arc
+        resolution (array): the number of points on each arc
+        tolerance (float): if provided, the resolution of each arc is chosen
+            so the drawn arc is within this distance of the true one (see
+            ``arc_resolution``)
+
+    Returns:
+        layer: A layer with a separator after each arc.
+
+    Examples:
+        >>> x, y = arcs([(0, 0), (5, 0)], 1, 0, [np.pi, np.pi / 2], resolution=3)
+        >>> np.round(x, 3)
+        array([ 1.   ,  0.   , -1.   ,    nan,  6.   ,  5.707,  5.   ,    nan])
+    """
+    center_x, center_y, radii, start_angles, end_angles, counts = _broadcast_shapes(
+        centers, radii, start_angles, end_angles, resolution)
+    if tolerance is not None:
+        counts = arc_resolution(radii, end_angles - start_angles, tolerance)
+
+    count = _uniform_count(counts)
+    if count is not None:
+        if _all_equal(start_angles) and _all_equal(end_angles):
+            # Every arc has the same angles (e.g. circles), so only one row
+            # of them needs the trigonometric functions.
+            start_angles = start_angles[:1]
+            end_angles = end_angles[:1]
+        # A nan angle after each arc becomes its separator.
+        fraction = np.append(np.linspace(0., 1., count), np.nan)
+        angles = (start_angles[:, np.newaxis] +
+                  (end_angles - start_angles)[:, np.newaxis] * fraction)
+        x = np.multiply(np.cos(angles), radii[:, np.newaxis])
+        y = np.multiply(np.sin(angles), radii[:, np.newaxis])
+        x += center_x[:, np.newaxis]
+        y += center_y[:, np.newaxis]
+        return x.reshape(-1), y.reshape(-1)
+
+    owner, index, positions, size = _separated_layout(counts)
+
+    zeros = np.zeros(len(counts))
+    fraction = _interpolate(zeros, zeros + 1., counts, owner, index)
+    angles = start_angles[owner] + (end_angles - start_angles)[owner] * fraction
+    return _separated_layer(
+        (np.cos(angles) * radii[owner]) + center_x[owner],
+        (np.sin(angles) * radii[owner]) + center_y[owner],
+        positions, size)
+
+
+def circles(centers, radii, resolution=100, tolerance=None):
+    """Draws many circles at once, as ``circle`` does for one.
+
+    Args:
+        centers (array): the centers of the circles, as a pair or an
+            ``(n, 2)`` array
+        radii (array): the radius of each circle
+        resolution (array): the number of points on each circle
+        tolerance (float): if provided, the resolution of each circle is
+            chosen so the drawn circle is within this distance of the true
+            one (see ``arc_resolution``)
+
+    Returns:
+        layer: A layer with a separator after each circle.
+
+    Note:
+        Drawing circles is bound by writing out their points rather than by
+        per-shape overhead, so the gain over calling ``circle`` in a loop is
+        smaller than for the other batched shapes: about 40-70x for 100,000
+        circles of 20 points (see ``benchmarks/bench_batched_shapes.py``),
+        against 100x or more for lines and polygons.
+    """
+    return arcs(centers, radii, 0, 2*np.pi, resolution, tolerance)
+
+
+def lines(origins, ends=None, vectors=None, lengths=None, angles=None, resolution=2):
+    """Draws many lines at once, as ``line`` does for one. One of these must
+    be specified: ends, vectors, or (lengths, angles).
+
+    Args:
+        origins (array): the origin of each line, as a pair or an ``(n, 2)``
+            array
+        ends (array): optional. the coordinates of the end of each line
+        vectors (array): optional. the x and y lengths of each line
+        lengths (array): optional. the length of each line
+        angles (array): optional. the angle of each line
+        resolution (array): the number of points on each line
+
+    Returns:
+        layer: A layer with a separator after each line.
+    """
+    if ends is not None:
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        origin_x, origin_y, end_x, end_y, counts = _broadcast_shapes(
+            origins, ends[:, 0], ends[:, 1], resolution)
+    elif vectors is not None:
+        vectors = np.asarray(vectors, dtype=float).reshape(-1, 2)
+        origin_x, origin_y, vector_x, vector_y, counts = _broadcast_shapes(
+            origins, vectors[:, 0], vectors[:, 1], resolution)
+        end_x = origin_x + vector_x
+        end_y = origin_y + vector_y
+    elif lengths is not None and angles is not None:
+        origin_x, origin_y, lengths, angles, counts = _broadcast_shapes(
+            origins, lengths, angles, resolution)
+        end_x = origin_x + lengths * np.cos(angles)
+        end_y = origin_y + lengths * np.sin(angles)
+    else:
+        raise ValueError('One of ends, vectors, or lengths and angles must be given')
+
+    count = _uniform_count(counts)
+    if count is not None:
+        x, y = _separated_rows(len(counts), count)
+        x[:, :-1] = np.linspace(origin_x, end_x, count, axis=-1)
+        y[:, :-1] = np.linspace(origin_y, end_y, count, axis=-1)
+        return x.reshape(-1), y.reshape(-1)
+
+    owner, index, positions, size = _separated_layout(counts)
+    return _separated_layer(
+        _interpolate(origin_x, end_x, counts, owner, index),
+        _interpolate(origin_y, end_y, counts, owner, index),
+        positions, size)
+
+
+def ngons(sides, centers=(0, 0), radii=1.0, angles=0.0, resolution=2):
+    """Draws many regular polygons at once.
+
+    Unlike ``ngon``, which starts each polygon at its origin, these are
+    placed by their centers.
+
+    Every argument may be a single value, or have a value per polygon.
+
+    Args:
+        sides (array): the number of sides of each polygon
+        centers (array): the center of each polygon, as a pair or an
+            ``(n, 2)`` array
+        radii (array): the distance from the center of each polygon to its
+            vertices
+        angles (array): the angle of the first vertex of each polygon, in
+            radians
+        resolution (int): the number of points on each side. As in
+            ``ngon``, the points at the corners are repeated.
+
+    Returns:
+        layer: A layer with a separator after each polygon.
+
+    Examples:
+        >>> x, y = ngons([3, 4], radii=[1, 2])
+        >>> len(x), int(np.isnan(x).sum())
+        (16, 2)
+    """
+    center_x, center_y, sides, radii, angles = _broadcast_shapes(
+        centers, sides, radii, angles)
+    sides = sides.astype(np.intp)
+
+    counts = sides * resolution
+    starts = np.cumsum(counts + 1) - (counts + 1)
+    x = np.full(int((counts + 1).sum()), np.nan)
+    y = np.full(len(x), np.nan)
+
+    # Polygons with the same number of sides are drawn together.
+    for num_sides in np.unique(sides):
+        group = np.flatnonzero(sides == num_sides)
+        vertex_angles = angles[group, np.newaxis] + 2 * np.pi * np.arange(num_sides) / num_sides
+        vertex_x = np.cos(vertex_angles)
+        vertex_y = np.sin(vertex_angles)
+
+        # Each edge runs from a vertex to the next. The last edge ends
+        # exactly where the first starts.
+        edges_x = np.linspace(vertex_x, np.roll(vertex_x, -1, axis=1), resolution, axis=-1)
+        edges_y = np.linspace(vertex_y, np.roll(vertex_y, -1, axis=1), resolution, axis=-1)
+
+        positions = starts[group, np.newaxis] + np.arange(num_sides * resolution)
+        x[positions] = (edges_x.reshape(len(group), -1) * radii[group, np.newaxis] +
+                        center_x[group, np.newaxis])
+        y[positions] = (edges_y.reshape(len(group), -1) * radii[group, np.newaxis] +
+                        center_y[group, np.newaxis])
+    return x, y
+
+
+def hexagons(centers, radii=1.0, angles=0.0, resolution=2):
+    """Draws many hexagons at once (see ``ngons``).
+
+    Args:
+        centers (array): the center of each hexagon, as a pair or an
+            ``(n, 2)`` array
+        radii (array): the distance from the center of each hexagon to its
+            vertices
+        angles (array): the angle of the first vertex of each hexagon, in
+            radians
+        resolution (int): the number of points on each side
+
+    Returns:
+        layer: A layer with a separator after each hexagon.
+    """
+    return ngons(6, centers, radii, angles, resolution)
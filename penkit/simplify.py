@@ -0,0 +1,246 @@
+"""The ``simplify`` module removes points from layers that do not
+visibly change the drawing.
+
+Simplification uses the Ramer-Douglas-Peucker algorithm, evaluated for
+every polyline of a layer at once. Decimation is a cheaper, coarser pass
+which drops consecutive points that fall in the same cell of a grid, such as
+the pixels of a preview.
+"""
+
+import numpy as np
+
+from penkit.layer import ChunkedLayer, Layer
+
+
+def _segment_distances(px, py, ax, ay, bx, by):
+    """Returns the distance from each point ``p`` to the segment ``a``-``b``."""
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = ((px - ax) * dx + (py - ay) * dy) / length_sq
+    # Degenerate (zero-length) segments measure the distance to their start.
+    t = np.clip(np.nan_to_num(t), 0., 1.)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def _simplify_mask(x, y, tolerance):
+    """Finds the points of a layer to keep after simplification.
+
+    Args:
+        x (np.array): the x coordinates of the layer
+        y (np.array): the y coordinates of the layer
+        tolerance (float): the maximum distance a removed point may be from
+            the simplified line
+
+    Returns:
+        np.array: a boolean mask of the points to keep. Separators and the
+        endpoints of every polyline are always kept.
+    """
+    visible = ~(np.isnan(x) | np.isnan(y))
+    starts = visible.copy()
+    starts[1:] &= ~visible[:-1]
+    ends = visible.copy()
+    ends[:-1] &= ~visible[1:]
+
+    keep = ~visible | starts | ends
+    _douglas_peucker(x, y, np.flatnonzero(starts), np.flatnonzero(ends), keep, tolerance)
+    return keep
+
+
+def _douglas_peucker(x, y, lo, hi, keep, tolerance):
+    """Marks the points to keep from each polyline.
+
+    Args:
+        x (np.array): the x coordinates of the layer
+        y (np.array): the y coordinates of the layer
+        lo (np.array): the index of the first point of each polyline
+        hi (np.array): the index of the last point of each polyline
+        keep (np.array): boolean mask, updated in place, of the points to keep
+        tolerance (float): the maximum distance a removed point may be from
+            the simplified line
+    """
+    # Each pass splits every open interval at its farthest point, so all
+    # polylines are simplified together one recursion level at a time.
+    while True:
+        interior = hi - lo - 1
+        active = interior > 0
+        lo, hi, interior = lo[active], hi[active], interior[active]
+        if not len(lo):
+            break
+
+        owner = np.repeat(np.arange(len(lo)), interior)
+        offsets = np.cumsum(interior) - interior
+        idx = np.arange(interior.sum()) - offsets[owner] + lo[owner] + 1
+
+        distances = _segment_distances(
+            x[idx], y[idx], x[lo][owner], y[lo][owner], x[hi][owner], y[hi][owner])
+        max_distances = np.maximum.reduceat(distances, offsets)
+
+        # The first point in each interval attaining the maximum distance.
+        candidates = np.flatnonzero(distances == max_distances[owner])
+        first = np.ones(len(candidates), dtype=bool)
+        first[1:] = owner[candidates[1:]] != owner[candidates[:-1]]
+        farthest = idx[candidates[first]]
+
+        split = max_distances > tolerance
+        farthest = farthest[split]
+        keep[farthest] = True
+        lo, hi = np.concatenate([lo[split], farthest]), np.concatenate([farthest, hi[split]])
+
+
+def simplify_layer(layer, tolerance):
+    """Removes points from a layer which lie within a tolerance of the line
+    drawn without them.
+
+    Args:
+        layer (layer): the layer to simplify, as a tuple or a ``Layer``
+        tolerance (float): the maximum deviation from the original lines,
+            in the units of the layer
+
+    Returns:
+        tuple: the simplified layer and the number of points removed. A
+        ``ChunkedLayer`` is simplified lazily as it is read, so for one the
+        number of points removed is not known and is given as 0.
+
+    Examples:
+        >>> layer, removed = simplify_layer(([0., 1., 2., 3.], [0., 0., 0., 1.]), 0.1)
+        >>> layer[0], layer[1], removed
+        (array([0., 2., 3.]), array([0., 0., 1.]), 1)
+
+        Every polyline keeps its endpoints, and a ``Layer`` keeps the same
+        points as the tuple:
+
+        >>> x = np.array([0., 1., 2., np.nan, 0., .5, 1.])
+        >>> y = np.array([0., 1., 0., np.nan, 0., .05, 0.])
+        >>> layer, removed = simplify_layer((x, y), 0.1)
+        >>> layer[0], removed
+        (array([ 0.,  1.,  2., nan,  0.,  1.]), 1)
+        >>> simplified, _ = simplify_layer(Layer.from_tuple((x, y)), 0.1)
+        >>> all(np.array_equal(a, b, equal_nan=True)
+        ...     for a, b in zip(simplified.to_tuple(), layer))
+        True
+    """
+    if isinstance(layer, ChunkedLayer):
+        return layer.map(lambda chunk: simplify_layer(chunk, tolerance)[0]), 0
+    if isinstance(layer, Layer):
+        return _simplify_array_layer(layer, tolerance)
+
+    x, y = (np.asarray(axis, dtype=float) for axis in layer)
+    keep = _simplify_mask(x, y, tolerance)
+    return (x[keep], y[keep]), int(len(keep) - np.count_nonzero(keep))
+
+
+def _simplify_array_layer(layer, tolerance):
+    """Simplifies a ``Layer``; see ``simplify_layer``."""
+    offsets = layer.offsets
+    nonempty = np.diff(offsets) > 0
+    lo = offsets[:-1][nonempty]
+    hi = offsets[1:][nonempty] - 1
+
+    keep = np.zeros(layer.num_points, dtype=bool)
+    keep[lo] = True
+    keep[hi] = True
+    _douglas_peucker(layer.x, layer.y, lo, hi, keep, tolerance)
+
+    kept_before = np.concatenate([[0], np.cumsum(keep)])
+    simplified = Layer(layer.points[keep], kept_before[offsets])
+    return simplified, int(layer.num_points - simplified.num_points)
+
+
+def simplify_plot(plot, tolerance, scale=1.0):
+    """Simplifies every layer of a plot.
+
+    To give the tolerance in physical page units, pass the scale of the page
+    as computed by ``penkit.write.plot_scale``.
+
+    Args:
+        plot (list): the layers to simplify
+        tolerance (float): the maximum deviation from the original lines
+        scale (float): the number of plot units per unit of ``tolerance``
+
+    Returns:
+        tuple: the simplified plot and the total number of points removed
+    """
+    simplified = []
+    removed = 0
+    for layer in plot:
+        layer, layer_removed = simplify_layer(layer, tolerance * scale)
+        simplified.append(layer)
+        removed += layer_removed
+    return simplified, removed
+
+
+def _decimate_mask(x, y, visible, starts, ends, cell_size):
+    """Finds the points to keep after decimation; see ``decimate_layer``."""
+    with np.errstate(invalid='ignore'):
+        cell_x = np.floor(x / cell_size)
+        cell_y = np.floor(y / cell_size)
+    keep = ~visible | starts | ends
+    keep[1:] |= (cell_x[1:] != cell_x[:-1]) | (cell_y[1:] != cell_y[:-1])
+    return keep
+
+
+def decimate_layer(layer, cell_size):
+    """Removes points which fall in the same grid cell as the point before.
+
+    Each run of consecutive points within one cell is reduced to its first
+    point, so the number of points kept depends on the length of the lines
+    measured in cells rather than on the number of points. The endpoints of
+    every polyline are kept. Removed points are within a cell diagonal of
+    the remaining lines.
+
+    Args:
+        layer (layer): the layer to decimate, as a tuple or a ``Layer``
+        cell_size (float): the size of the grid cells, in the units of the
+            layer
+
+    Returns:
+        tuple: the decimated layer and the number of points removed. As for
+        ``simplify_layer``, a ``ChunkedLayer`` is decimated lazily and the
+        number removed is given as 0.
+
+    Examples:
+        >>> layer, removed = decimate_layer(([0., .1, .2, 1., 1.1], [0., 0., 0., 0., 0.]), 1.)
+        >>> layer[0], removed
+        (array([0. , 1. , 1.1]), 2)
+    """
+    if isinstance(layer, ChunkedLayer):
+        return layer.map(lambda chunk: decimate_layer(chunk, cell_size)[0]), 0
+    if isinstance(layer, Layer):
+        starts = layer.starts
+        ends = np.zeros(layer.num_points, dtype=bool)
+        nonempty = np.diff(layer.offsets) > 0
+        ends[layer.offsets[1:][nonempty] - 1] = True
+        keep = _decimate_mask(layer.x, layer.y, np.ones_like(starts), starts, ends, cell_size)
+        kept_before = np.concatenate([[0], np.cumsum(keep)])
+        decimated = Layer(layer.points[keep], kept_before[layer.offsets])
+        return decimated, int(layer.num_points - decimated.num_points)
+
+    x, y = (np.asarray(axis, dtype=float) for axis in layer)
+    visible = ~(np.isnan(x) | np.isnan(y))
+    starts = visible.copy()
+    starts[1:] &= ~visible[:-1]
+    ends = visible.copy()
+    ends[:-1] &= ~visible[1:]
+    keep = _decimate_mask(x, y, visible, starts, ends, cell_size)
+    return (x[keep], y[keep]), int(len(keep) - np.count_nonzero(keep))
+
+
+def decimate_plot(plot, cell_size):
+    """Decimates every layer of a plot.
+
+    Args:
+        plot (list): the layers to decimate
+        cell_size (float): the size of the grid cells, in plot units
+
+    Returns:
+        tuple: the decimated plot and the total number of points removed
+    """
+    decimated = []
+    removed = 0
+    for layer in plot:
+        layer, layer_removed = decimate_layer(layer, cell_size)
+        decimated.append(layer)
+        removed += layer_removed
+    return decimated, removed
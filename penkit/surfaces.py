@@ -1,12 +1,49 @@
 """The ``surfaces`` module provides functions for generating **surfaces**.
 Surfaces are 2D matrices which act as an elevation map.
+
+Surfaces given by a formula can also be made as an ``ImplicitSurface``,
+which is only evaluated at the points of the textures mapped onto it.
+
+Heightmaps too large to load into memory can be opened as memory-mapped
+surfaces with ``load_heightmap``, and downsampled with
+``make_surface_pyramid``.
+
+Random surfaces take a ``seed``, which may also be a
+``np.random.SeedSequence`` or ``np.random.Generator`` (see ``penkit.rng``).
 """
 
+import functools
+import multiprocessing
+import os
+
 from scipy.ndimage.filters import gaussian_filter
+from scipy.signal import fftconvolve
 import numpy as np
 
+from penkit.rng import make_generator, seed_sequence, spawn_seeds
+
+try:
+    # scipy.fft keeps float32 data in single precision.
+    from scipy.fft import rfft2, irfft2
+except ImportError:
+    from numpy.fft import rfft2, irfft2
+
 DEFAULT_DIMS = (500, 500)
 
+# Size of the blocks of white noise drawn from one random seed by the tiled
+# generator. Changing it changes the surfaces generated for a given seed.
+NOISE_TILE_SIZE = 256
+
+# Default size of the tiles made by the tiled generator
+SURFACE_TILE_SIZE = 2048
+
+# Rows of a heightmap downsampled at a time by make_surface_pyramid
+PYRAMID_BAND_ROWS = 1024
+
+# The Gaussian kernel is cut off at this many standard deviations, as in
+# scipy.ndimage.gaussian_filter
+BLUR_TRUNCATE = 4.0
+
 def make_noise_surface(dims=DEFAULT_DIMS, blur=10, seed=None):
     """Makes a surface by generating random noise and blurring it.
 
@@ -18,10 +55,187 @@ def make_noise_surface(dims=DEFAULT_DIMS, blur=10, seed=None):
     Returns:
         surface: A surface.
     """
-    if seed is not None:
-        np.random.seed(seed)
+    return gaussian_filter(make_generator(seed).standard_normal(dims), blur)
+
+
+def _spectral_filter(noise, gain):
+    """Filters a 2D array in the frequency domain.
+
+    Args:
+        noise (np.array): the array to filter
+        gain (callable): takes the squared frequency of each term of the
+            spectrum, in cycles per sample, and returns its gain
+
+    Returns:
+        np.array: the filtered array, with the same dtype as ``noise``
+    """
+    freq_y = np.fft.fftfreq(noise.shape[0]).astype(noise.dtype)
+    freq_x = np.fft.rfftfreq(noise.shape[1]).astype(noise.dtype)
+    spectrum = rfft2(noise)
+    spectrum *= gain(freq_y[:, np.newaxis] ** 2 + freq_x ** 2)
+    return irfft2(spectrum, s=noise.shape).astype(noise.dtype, copy=False)
+
 
-    return gaussian_filter(np.random.normal(size=dims), blur)
+def make_spectral_noise_surface(dims=DEFAULT_DIMS, blur=10, seed=None, dtype=np.float64):
+    """Makes a surface like ``make_noise_surface``, blurring the noise in the
+    frequency domain.
+
+    The run time does not depend on ``blur``, so this is much faster for
+    large blurs. The blur wraps around the edges, so the surface tiles
+    seamlessly with itself.
+
+    Args:
+        dims (pair): the dimensions of the surface to create
+        blur (float): the standard deviation of the Gaussian blur
+        seed (int): a random seed to use (optional)
+        dtype (dtype): the dtype of the surface. ``np.float32`` halves the
+            memory used.
+
+    Returns:
+        surface: A surface.
+    """
+    noise = make_generator(seed).standard_normal(dims, dtype=dtype)
+    return _spectral_filter(noise, lambda freq2: np.exp(-2 * np.pi ** 2 * blur ** 2 * freq2))
+
+
+def make_fractal_noise_surface(dims=DEFAULT_DIMS, exponent=3.0, seed=None, dtype=np.float64):
+    """Makes a fractal (Brownian) noise surface by spectral synthesis.
+
+    The power of each frequency in the surface is proportional to
+    ``1 / frequency ** exponent``, so it has detail at every scale. Like
+    ``make_spectral_noise_surface``, the surface tiles seamlessly.
+
+    Args:
+        dims (pair): the dimensions of the surface to create
+        exponent (float): the spectral exponent. Larger values make smoother
+            surfaces; 2 to 4 give natural-looking terrain.
+        seed (int): a random seed to use (optional)
+        dtype (dtype): the dtype of the surface
+
+    Returns:
+        surface: A surface, scaled to a standard deviation of 1.
+    """
+    def gain(freq2):
+        with np.errstate(divide='ignore'):
+            result = freq2 ** (-exponent / 4.)
+        # Remove the constant term, which would be infinite.
+        result[0, 0] = 0
+        return result
+
+    noise = make_generator(seed).standard_normal(dims, dtype=dtype)
+    surface = _spectral_filter(noise, gain)
+    surface /= surface.std() or 1.
+    return surface
+
+
+def _gaussian_kernel(blur, dtype):
+    """Returns the 1D Gaussian kernel used by ``gaussian_filter``."""
+    radius = int(BLUR_TRUNCATE * blur + 0.5)
+    if not radius:
+        return np.ones(1, dtype=dtype)
+    x = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (x / float(blur)) ** 2)
+    return (kernel / kernel.sum()).astype(dtype)
+
+
+def _reflect(index, size):
+    """Maps indices outside ``[0, size)`` back into it by reflecting about
+    the edges, as ``gaussian_filter`` does."""
+    index = index % (2 * size)
+    return np.where(index < size, index, 2 * size - 1 - index)
+
+
+def _noise_block(seed, rows, cols, dtype):
+    """Returns the white noise underlying a tiled surface over the given
+    ranges of rows and columns.
+
+    The noise is drawn in ``NOISE_TILE_SIZE`` square blocks, each from a seed
+    spawned from ``seed`` (a ``SeedSequence``) by its position, so any part
+    of it can be regenerated without the rest.
+    """
+    block = np.empty((rows[1] - rows[0], cols[1] - cols[0]), dtype=dtype)
+    for tile_row in range(rows[0] // NOISE_TILE_SIZE, (rows[1] - 1) // NOISE_TILE_SIZE + 1):
+        for tile_col in range(cols[0] // NOISE_TILE_SIZE, (cols[1] - 1) // NOISE_TILE_SIZE + 1):
+            tile_seed = np.random.SeedSequence(
+                seed.entropy, spawn_key=seed.spawn_key + (tile_row, tile_col))
+            tile = np.random.default_rng(tile_seed).standard_normal(
+                (NOISE_TILE_SIZE, NOISE_TILE_SIZE), dtype=dtype)
+            top = tile_row * NOISE_TILE_SIZE
+            left = tile_col * NOISE_TILE_SIZE
+            row_start, row_stop = max(rows[0], top), min(rows[1], top + NOISE_TILE_SIZE)
+            col_start, col_stop = max(cols[0], left), min(cols[1], left + NOISE_TILE_SIZE)
+            block[row_start - rows[0]:row_stop - rows[0], col_start - cols[0]:col_stop - cols[0]] = \
+                tile[row_start - top:row_stop - top, col_start - left:col_stop - left]
+    return block
+
+
+def iter_noise_surface_tiles(dims=DEFAULT_DIMS, blur=10, seed=None,
+                             tile_size=SURFACE_TILE_SIZE, dtype=np.float32):
+    """Generates a noise surface tile by tile.
+
+    Each tile is blurred together with a margin of the noise around it, so
+    tiles join seamlessly and the surface does not depend on ``tile_size``.
+    Only one tile (plus its margin) is in memory at a time.
+
+    Args:
+        dims (pair): the dimensions of the whole surface
+        blur (float): the standard deviation of the Gaussian blur
+        seed (int): a random seed to use (optional)
+        tile_size (int): the size of the tiles to generate
+        dtype (dtype): the dtype of the tiles
+
+    Yields:
+        tuple: the row and column slices of the surface covered by a tile,
+        and the tile
+    """
+    seed = seed_sequence(seed)
+    height, width = dims
+    kernel = _gaussian_kernel(blur, dtype)
+    kernel = np.outer(kernel, kernel)
+    margin = len(kernel) // 2
+
+    for top in range(0, height, tile_size):
+        rows = _reflect(np.arange(top - margin, min(top + tile_size, height) + margin), height)
+        for left in range(0, width, tile_size):
+            cols = _reflect(np.arange(left - margin, min(left + tile_size, width) + margin), width)
+            block = _noise_block(seed, (rows.min(), rows.max() + 1),
+                                 (cols.min(), cols.max() + 1), dtype)
+            window = block[(rows - rows.min())[:, np.newaxis], cols - cols.min()]
+            tile = fftconvolve(window, kernel, mode='valid').astype(dtype, copy=False)
+            yield (slice(top, top + tile.shape[0]), slice(left, left + tile.shape[1])), tile
+
+
+def make_tiled_noise_surface(dims=DEFAULT_DIMS, blur=10, seed=None,
+                             tile_size=SURFACE_TILE_SIZE, dtype=np.float32, out=None):
+    """Makes a noise surface a tile at a time (see ``iter_noise_surface_tiles``).
+
+    To make a surface larger than memory, pass a memory-mapped array as
+    ``out``, e.g. ``np.lib.format.open_memmap('surface.npy', 'w+', dtype,
+    dims)``.
+
+    Args:
+        dims (pair): the dimensions of the surface to create
+        blur (float): the standard deviation of the Gaussian blur
+        seed (int): a random seed to use (optional)
+        tile_size (int): the size of the tiles to generate
+        dtype (dtype): the dtype of the surface
+        out (np.array): an array of shape ``dims`` to write the surface to
+            (optional)
+
+    Returns:
+        surface: A surface.
+
+    Examples:
+        >>> a = make_tiled_noise_surface((300, 200), blur=5, seed=1, tile_size=64)
+        >>> b = make_tiled_noise_surface((300, 200), blur=5, seed=1, tile_size=1000)
+        >>> a.shape, a.dtype, bool(np.allclose(a, b, atol=1e-6))
+        ((300, 200), dtype('float32'), True)
+    """
+    if out is None:
+        out = np.empty(dims, dtype=dtype)
+    for (rows, cols), tile in iter_noise_surface_tiles(dims, blur, seed, tile_size, dtype):
+        out[rows, cols] = tile
+    return out
 
 
 def make_gradients(dims=DEFAULT_DIMS):
@@ -39,39 +253,251 @@ def make_gradients(dims=DEFAULT_DIMS):
     )
 
 
-def make_sine_surface(dims=DEFAULT_DIMS, offset=0.5, scale=1.0):
+class ImplicitSurface(object):
+    """A surface given by a function of ``x`` and ``y``, evaluated lazily.
+
+    ``penkit.projection`` and ``penkit.camera`` evaluate the function at
+    the exact position of each texture point, rather than looking up the
+    nearest cell of a grid, so no grid needs to be kept in memory and the
+    heights are not limited to its resolution. Hidden line removal does
+    need a grid, so the function is sampled on one (see ``grid``) to decide
+    which points are hidden.
+
+    Args:
+        function (callable): takes arrays of ``x`` and ``y`` coordinates in
+            ``[0, 1]`` and returns the height at each point. To use the
+            surface in a process pool, this must be picklable (e.g. a
+            function defined at the top level of a module, or a
+            ``functools.partial`` of one).
+        dims (pair): the dimensions of the grid to sample the function on
+            when one is needed, as for ``make_gradients``
+    """
+
+    def __init__(self, function, dims=DEFAULT_DIMS):
+        self.function = function
+        self.dims = dims
+        self._grid = None
+
+    def __call__(self, x, y):
+        return self.function(x, y)
+
+    @property
+    def shape(self):
+        """pair: the shape of ``grid``."""
+        return (self.dims[1], self.dims[0])
+
+    @property
+    def grid(self):
+        """np.array: the function sampled on a grid, as a regular surface.
+        It is computed when first needed and then kept."""
+        if self._grid is None:
+            self._grid = self.function(*make_gradients(self.dims))
+        return self._grid
+
+
+def surface_grid(surface):
+    """Returns a surface as an array, sampling it if it is implicit.
+
+    Args:
+        surface (surface): a surface or ``ImplicitSurface``
+
+    Returns:
+        surface: A surface.
+    """
+    if isinstance(surface, ImplicitSurface):
+        return surface.grid
+    return surface
+
+
+def _make_surface(function, dims, implicit):
+    """Returns a surface as an ``ImplicitSurface`` or sampled on a grid."""
+    if implicit:
+        return ImplicitSurface(function, dims)
+    return function(*make_gradients(dims))
+
+
+def _sine_height(x, y, offset, scale):
+    gradients = (np.array([x, y]) - offset) * scale * np.pi
+    return np.sin(np.linalg.norm(gradients, axis=0))
+
+
+def _bubble_height(x, y, repeat):
+    return np.sin((x - 0.5) * repeat * np.pi) * np.sin((y - 0.5) * repeat * np.pi)
+
+
+def _cylinder_height(x, y):
+    return np.sqrt(0.5 ** 2 - (x - y) ** 2)
+
+
+def make_sine_surface(dims=DEFAULT_DIMS, offset=0.5, scale=1.0, implicit=False):
     """Makes a surface from the 3D sine function.
 
     Args:
         dims (pair): the dimensions of the surface to create
         offset (float): an offset applied to the function
         scale (float): a scale applied to the sine frequency
+        implicit (bool): if true, return an ``ImplicitSurface``
 
     Returns:
         surface: A surface.
     """
-    gradients = (np.array(make_gradients(dims)) - offset) * scale * np.pi
-    return np.sin(np.linalg.norm(gradients, axis=0))
+    return _make_surface(
+        functools.partial(_sine_height, offset=offset, scale=scale), dims, implicit)
 
 
-def make_bubble_surface(dims=DEFAULT_DIMS, repeat=3):
+def make_bubble_surface(dims=DEFAULT_DIMS, repeat=3, implicit=False):
     """Makes a surface from the product of sine functions on each axis.
 
     Args:
         dims (pair): the dimensions of the surface to create
         repeat (int): the frequency of the waves is set to ensure this many
             repetitions of the function
+        implicit (bool): if true, return an ``ImplicitSurface``
     
     Returns:
         surface: A surface.
     """
-    gradients = make_gradients(dims)
-    return (
-        np.sin((gradients[0] - 0.5) * repeat * np.pi) *
-        np.sin((gradients[1] - 0.5) * repeat * np.pi))
+    return _make_surface(functools.partial(_bubble_height, repeat=repeat), dims, implicit)
+
+def make_cylinder_surface(dims=DEFAULT_DIMS, implicit=False):
+    """Makes a surface from a half cylinder lying along the diagonal.
+
+    Args:
+        dims (pair): the dimensions of the surface to create
+        implicit (bool): if true, return an ``ImplicitSurface``
+
+    Returns:
+        surface: A surface.
+    """
+    return _make_surface(_cylinder_height, dims, implicit)
+
+
+def load_heightmap(filename, shape=None, dtype=None, offset=0):
+    """Opens a heightmap file as a read-only memory-mapped surface.
+
+    Only the parts of the file which are used are read, so surfaces larger
+    than memory can be used with ``penkit.projection``.
+
+    Args:
+        filename (str): a ``.npy`` file, or a raw file of heights in row-major
+            order
+        shape (pair): the number of rows and columns of a raw file. May be
+            omitted if the heightmap is square.
+        dtype (dtype): the type of the values in a raw file, including the
+            byte order, e.g. ``'>i2'`` for SRTM ``.hgt`` files
+        offset (int): the number of header bytes to skip in a raw file
+
+    Returns:
+        np.memmap: A surface.
+    """
+    if filename.endswith('.npy'):
+        return np.load(filename, mmap_mode='r')
+
+    if dtype is None:
+        raise ValueError('The dtype of a raw heightmap must be given')
+    dtype = np.dtype(dtype)
+    if shape is None:
+        count = (os.path.getsize(filename) - offset) // dtype.itemsize
+        side = int(round(np.sqrt(count)))
+        if side * side != count:
+            raise ValueError('The shape of a heightmap which is not square must be given')
+        shape = (side, side)
+    return np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=tuple(shape))
+
+
+def _downsample(surface, out):
+    """Averages each 2x2 block of a surface into ``out``, a band of rows at a
+    time."""
+    height, width = out.shape
+    for start in range(0, height, PYRAMID_BAND_ROWS):
+        stop = min(start + PYRAMID_BAND_ROWS, height)
+        band = np.asarray(surface[2 * start:2 * stop, :2 * width], dtype=out.dtype)
+        out[start:stop] = band.reshape(stop - start, 2, width, 2).mean(axis=(1, 3))
+
+
+def make_surface_pyramid(surface, min_size=DEFAULT_DIMS[0], directory=None, dtype=np.float32):
+    """Makes successively halved copies of a surface.
+
+    A texture only samples the surface at its own points, so a surface
+    with about as many cells as the texture has points along each axis
+    looks the same as the full one, and is far faster to project.
+
+    Args:
+        surface (surface): the surface to downsample, which may be
+            memory-mapped. It is read a band of rows at a time.
+        min_size (int): levels are added until the smaller dimension of the
+            last one is less than twice this
+        directory (str): if provided, each downsampled level is written to a
+            ``.npy`` file in this directory, named after its level, and
+            returned memory-mapped
+        dtype (dtype): the dtype of the downsampled levels
+
+    Returns:
+        list: the surface, followed by each downsampled level. Level ``i``
+        has ``1 / 2 ** i`` of the rows and columns (an odd last row or
+        column is dropped).
+
+    Examples:
+        >>> [level.shape for level in make_surface_pyramid(np.ones((100, 90)), 20)]
+        [(100, 90), (50, 45), (25, 22)]
+    """
+    pyramid = [surface]
+    while min(surface.shape) >= 2 * min_size:
+        shape = (surface.shape[0] // 2, surface.shape[1] // 2)
+        if directory is None:
+            level = np.empty(shape, dtype=dtype)
+        else:
+            filename = os.path.join(directory, 'level-{}.npy'.format(len(pyramid)))
+            level = np.lib.format.open_memmap(filename, 'w+', dtype, shape)
+        _downsample(surface, level)
+        pyramid.append(level)
+        surface = level
+    return pyramid
+
+
+def _make_seeded_surface(job):
+    """Makes one surface of a batch."""
+    function, seed, kwargs = job
+    return function(seed=seed, **kwargs)
+
+
+def make_surface_batch(count, function=make_noise_surface, seed=None, workers=None, **kwargs):
+    """Makes a number of random surfaces across a pool of processes.
+
+    Each surface gets its own seed, spawned from ``seed`` (see
+    ``penkit.rng.spawn_seeds``), so the surfaces are independent and the
+    same whatever the number of workers.
+
+    Args:
+        count (int): the number of surfaces to make
+        function (callable): the function which makes each surface. It is
+            passed the surface's seed as ``seed``, and must be importable by
+            name so it can be sent to the worker processes.
+        seed (int): a random seed to use (optional)
+        workers (int): the number of processes to use. By default, one per
+            CPU. With one worker, surfaces are made in the calling process.
+        **kwargs: passed on to ``function`` (e.g. ``dims``, ``blur``)
+
+    Returns:
+        list: ``count`` surfaces
+
+    Examples:
+        >>> a = make_surface_batch(3, dims=(20, 20), seed=5, workers=1)
+        >>> b = make_surface_batch(3, dims=(20, 20), seed=5, workers=2)
+        >>> all(np.array_equal(x, y) for x, y in zip(a, b))
+        True
+    """
+    jobs = [(function, child, kwargs) for child in spawn_seeds(seed, count)]
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    workers = min(workers, len(jobs))
+
+    if workers <= 1:
+        return [_make_seeded_surface(job) for job in jobs]
 
-def make_cylinder_surface(dims=DEFAULT_DIMS):
-    gradients = make_gradients(dims)
-    return (
-        np.sqrt(0.5 ** 2 - (gradients[0] - gradients[1]) ** 2)
-    )
\ No newline at end of file
+    pool = multiprocessing.Pool(workers)
+    try:
+        return pool.map(_make_seeded_surface, jobs)
+    finally:
+        pool.terminate()
@@ -3,27 +3,24 @@
 
 import numpy as np
 
-from penkit.textures.util import fit_texture
+from penkit.layer import ChunkedLayer
+from penkit.rng import make_generator
+from penkit.shapes import chord_angle
+from penkit.textures.util import concat, fit_texture
 
 
-def make_lines_texture(num_lines=10, resolution=50, keep_prob=None):
-    """Makes a texture consisting of a given number of horizontal lines.
-
-    Args:
-        num_lines (int): the number of lines to draw
-        resolution (int): the number of midpoints on each line
-        keep_prob (None or float): if provided, should be a number between
-            0 and 1. Lines will be randomly discarded with probability 1-keep_prob.
-
-    Returns:
-        A texture.
-    """
+def _line_locations(num_lines, keep_prob, rng):
+    """Spaces lines evenly over ``[0, 1]``, randomly discarding some of them."""
     line_locations = np.linspace(0, 1, num_lines)
 
     if keep_prob is not None:
-        mask = np.random.uniform(size=num_lines) > keep_prob
+        mask = make_generator(rng).uniform(size=num_lines) > keep_prob
         line_locations = line_locations[mask]
+    return line_locations
+
 
+def _lines(line_locations, resolution):
+    """Makes horizontal lines at the given heights, each followed by a separator."""
     x, y = np.meshgrid(
         np.hstack([np.linspace(0, 1, resolution), np.nan]),
         line_locations,
@@ -33,22 +30,65 @@ def make_lines_texture(num_lines=10, resolution=50, keep_prob=None):
     return x.flatten(), y.flatten()
 
 
-def make_grid_texture(num_h_lines=10, num_v_lines=10, resolution=50):
+def _chunked_lines(line_locations, resolution, chunk_size, transpose=False):
+    """Makes horizontal (or, transposed, vertical) lines as a ``ChunkedLayer``
+    of whole lines, with about ``chunk_size`` points in each chunk."""
+    lines_per_chunk = max(1, chunk_size // (resolution + 1))
+
+    def chunks():
+        for begin in range(0, len(line_locations), lines_per_chunk):
+            x, y = _lines(line_locations[begin:begin + lines_per_chunk], resolution)
+            yield (y, x) if transpose else (x, y)
+
+    bounds = None
+    if len(line_locations) and resolution:
+        along = np.linspace(0, 1, resolution)
+        bounds = (along.min(), along.max(), line_locations.min(), line_locations.max())
+        if transpose:
+            bounds = bounds[2:] + bounds[:2]
+    return ChunkedLayer(chunks, bounds)
+
+
+def make_lines_texture(num_lines=10, resolution=50, keep_prob=None, chunk_size=None, seed=None):
+    """Makes a texture consisting of a given number of horizontal lines.
+
+    Args:
+        num_lines (int): the number of lines to draw
+        resolution (int): the number of midpoints on each line
+        keep_prob (None or float): if provided, should be a number between
+            0 and 1. Lines will be randomly discarded with probability 1-keep_prob.
+        chunk_size (int): if provided, return a ``penkit.layer.ChunkedLayer``
+            which generates the lines as needed, about this many points at a
+            time, rather than all at once
+        seed (int): a random seed to use for ``keep_prob`` (optional; see
+            ``penkit.rng``)
+
+    Returns:
+        A texture.
+    """
+    line_locations = _line_locations(num_lines, keep_prob, seed)
+    if chunk_size is not None:
+        return _chunked_lines(line_locations, resolution, chunk_size)
+    return _lines(line_locations, resolution)
+
+
+def make_grid_texture(num_h_lines=10, num_v_lines=10, resolution=50, chunk_size=None):
     """Makes a texture consisting of a grid of vertical and horizontal lines.
 
     Args:
         num_h_lines (int): the number of horizontal lines to draw
         num_v_lines (int): the number of vertical lines to draw
         resolution (int): the number of midpoints to draw on each line
+        chunk_size (int): if provided, return a ``penkit.layer.ChunkedLayer``
+            of about this many points per chunk (see ``make_lines_texture``)
 
     Returns:
         A texture.
     """
-    x_h, y_h = make_lines_texture(num_h_lines, resolution)
-    y_v, x_v = make_lines_texture(num_v_lines, resolution)
-    return np.concatenate([x_h, x_v]), np.concatenate([y_h, y_v])
+    return make_plaid_texture(num_h_lines, num_v_lines, resolution, None, chunk_size)
 
-def make_plaid_texture(num_h_lines=10, num_v_lines=10, resolution=50, keep_prob=0.5):
+def make_plaid_texture(num_h_lines=10, num_v_lines=10, resolution=50, keep_prob=0.5,
+                       chunk_size=None, seed=None):
     """Makes a texture consisting of a grid of plaid vertical and horizontal lines.
 
     Args:
@@ -56,16 +96,58 @@ def make_plaid_texture(num_h_lines=10, num_v_lines=10, resolution=50, keep_prob=
         num_v_lines (int): the number of vertical lines to draw
         resolution (int): the number of midpoints to draw on each line
         keep_prob (float): the probability a given line is kept
+        chunk_size (int): if provided, return a ``penkit.layer.ChunkedLayer``
+            of about this many points per chunk (see ``make_lines_texture``)
+        seed (int): a random seed to use (optional; see ``penkit.rng``)
 
     Returns:
         A texture.
     """
-    x_h, y_h = make_lines_texture(num_h_lines, resolution, keep_prob=keep_prob)
-    y_v, x_v = make_lines_texture(num_v_lines, resolution, keep_prob=keep_prob)
+    # Both directions draw from one generator, so they differ.
+    rng = make_generator(seed)
+    if chunk_size is not None:
+        horizontal = _line_locations(num_h_lines, keep_prob, rng)
+        vertical = _line_locations(num_v_lines, keep_prob, rng)
+        return concat([
+            _chunked_lines(horizontal, resolution, chunk_size),
+            _chunked_lines(vertical, resolution, chunk_size, transpose=True)])
+
+    x_h, y_h = make_lines_texture(num_h_lines, resolution, keep_prob=keep_prob, seed=rng)
+    y_v, x_v = make_lines_texture(num_v_lines, resolution, keep_prob=keep_prob, seed=rng)
     return np.concatenate([x_h, x_v]), np.concatenate([y_h, y_v])
 
 
-def make_spiral_texture(spirals=6.0, ccw=False, offset=0.0, resolution=1000):
+# Number of points at which the spacing of a spiral drawn to a tolerance is
+# worked out
+SPIRAL_SPACING_SAMPLES = 4096
+
+
+def _spiral_distances(spirals, tolerance):
+    """Spaces points along a spiral so that the chords between them stay
+    within a tolerance of it.
+
+    Returns:
+        np.array: the distance of each point from the center, from 0 to 1
+    """
+    # At distance ``dist`` the spiral is ``dist / 2`` from its center and
+    # has turned through ``sweep * dist`` radians. Work out its curvature and
+    # length per unit of distance, and so the number of chords needed per
+    # unit of distance for chords along a circle of the same curvature.
+    sweep = 2. * np.pi * abs(spirals)
+    dist = np.linspace(0., 1., SPIRAL_SPACING_SAMPLES)
+    radius = dist / 2.
+    spacing = 1. / (2. * sweep)
+    curvature = (radius ** 2 + 2 * spacing ** 2) / (radius ** 2 + spacing ** 2) ** 1.5
+    length = np.sqrt(.25 + (radius * sweep) ** 2)
+    density = curvature * length / chord_angle(1. / curvature, tolerance)
+    chords = np.concatenate([[0.], np.cumsum((density[1:] + density[:-1]) / 2 * np.diff(dist))])
+
+    # Place the points at equal numbers of chords apart.
+    resolution = max(int(np.ceil(chords[-1])), 1) + 1
+    return np.interp(np.linspace(0., chords[-1], resolution), chords, dist)
+
+
+def make_spiral_texture(spirals=6.0, ccw=False, offset=0.0, resolution=1000, tolerance=None):
     """Makes a texture consisting of a spiral from the origin.
 
     Args:
@@ -73,11 +155,18 @@ def make_spiral_texture(spirals=6.0, ccw=False, offset=0.0, resolution=1000):
         ccw (bool): make spirals counter-clockwise (default is clockwise)
         offset (float): if non-zero, spirals start offset by this amount
         resolution (int): number of midpoints along the spiral
+        tolerance (float): if provided, the number and spacing of the points
+            are chosen so the drawn spiral is within this distance of the
+            true one, in texture units (see ``penkit.shapes.arc_resolution``),
+            and ``resolution`` is ignored
 
     Returns:
         A texture.
     """
-    dist = np.sqrt(np.linspace(0., 1., resolution))
+    if tolerance is not None:
+        dist = _spiral_distances(spirals, tolerance)
+    else:
+        dist = np.sqrt(np.linspace(0., 1., resolution))
     if ccw:
         direction = 1.
     else:
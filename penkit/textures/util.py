@@ -1,8 +1,15 @@
 """The ``textures.util`` module contains utility functions for working with textures.
+
+These functions accept layers either as ``(x, y)`` tuples or as
+``penkit.layer.Layer`` objects, and return the same kind of layer they are given.
 """
 
 import numpy as np
 
+from penkit.layer import (
+    ChunkedLayer, Layer, chain_layers, concat_layers, layer_bounds, layer_coordinates,
+    replace_coordinates)
+
 def rotate_texture(texture, rotation, x_offset=0.5, y_offset=0.5):
     """Rotates the given texture by a given angle.
 
@@ -15,13 +22,13 @@ def rotate_texture(texture, rotation, x_offset=0.5, y_offset=0.5):
     Returns:
         texture: A texture.
     """
-    x, y = texture
+    x, y = layer_coordinates(texture)
     x = x.copy() - x_offset
     y = y.copy() - y_offset
     angle = np.radians(rotation)
     x_rot = x * np.cos(angle) + y * np.sin(angle)
     y_rot = x * -np.sin(angle) + y * np.cos(angle)
-    return x_rot + x_offset, y_rot + y_offset
+    return replace_coordinates(texture, x_rot + x_offset, y_rot + y_offset)
 
 
 def fit_texture(layer):
@@ -35,32 +42,141 @@ def fit_texture(layer):
     Returns:
         texture: A texture.
     """
-    x, y = layer
-    x = (x - np.nanmin(x)) / (np.nanmax(x) - np.nanmin(x))
-    y = (y - np.nanmin(y)) / (np.nanmax(y) - np.nanmin(y))
-    return x, y
+    x, y = layer_coordinates(layer)
+    min_x, max_x, min_y, max_y = layer_bounds(layer)
+    x = (x - min_x) / (max_x - min_x)
+    y = (y - min_y) / (max_y - min_y)
+    return replace_coordinates(layer, x, y)
 
 def concat(layers):
     """
+    Tuple layers are joined end to end, so a separator must be included
+    between them to keep their lines apart. If any of the layers is a
+    ``Layer``, the result is a ``Layer`` in which every input polyline stays
+    separate. If any is a ``ChunkedLayer``, the result is a ``ChunkedLayer``
+    which streams the chunks of each layer in turn.
+
     Args:
         layers (list(layer)): a list of layers
     """
+    if any(isinstance(l, ChunkedLayer) for l in layers):
+        return chain_layers(layers)
+    if any(isinstance(l, Layer) for l in layers):
+        return concat_layers(layers)
     return (
         np.concatenate([l[0] for l in layers]),
         np.concatenate([l[1] for l in layers])
     )
 
+
+_SEPARATOR = np.array([np.nan])
+
+
+class LayerBuilder(object):
+    """Joins many tuple layers into one, in time proportional to their total
+    length.
+
+    Calling ``concat`` in a loop copies the whole layer built so far on every
+    iteration. A builder instead copies each layer into buffers which grow
+    by doubling, and inserts a separator between layers which do not already
+    end or start with one.
+
+    Example::
+
+        builder = LayerBuilder()
+        for i in range(100):
+            builder.append(shapes.circle((0, 0), i))
+        layer = builder.to_layer()
+
+    Args:
+        capacity (int): the number of points to allocate room for at first
+    """
+
+    def __init__(self, capacity=1024):
+        self._x = np.empty(max(capacity, 1))
+        self._y = np.empty(max(capacity, 1))
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, size):
+        """Grows the buffers to hold at least ``size`` points."""
+        if size <= len(self._x):
+            return
+        capacity = max(size, 2 * len(self._x))
+        for name in ('_x', '_y'):
+            buffer = np.empty(capacity)
+            buffer[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, buffer)
+
+    def append(self, layer):
+        """Adds a layer to the end.
+
+        Args:
+            layer (layer): the layer to add, as a tuple layer, a ``Layer`` or a
+                ``ChunkedLayer``
+        """
+        self.extend([layer])
+
+    def extend(self, layers):
+        """Adds several layers to the end, growing the buffers at most once.
+
+        Args:
+            layers (list(layer)): the layers to add
+        """
+        parts_x = []
+        parts_y = []
+        ends_with_separator = not self._size or np.isnan(self._x[self._size - 1])
+        for layer in layers:
+            x, y = (np.asarray(axis, dtype=float).reshape(-1) for axis in layer)
+            if not len(x):
+                continue
+            if not ends_with_separator and not np.isnan(x[0]):
+                parts_x.append(_SEPARATOR)
+                parts_y.append(_SEPARATOR)
+            parts_x.append(x)
+            parts_y.append(y)
+            ends_with_separator = np.isnan(x[-1])
+
+        if not parts_x:
+            return
+        size = self._size + sum(len(part) for part in parts_x)
+        self._reserve(size)
+        np.concatenate(parts_x, out=self._x[self._size:size])
+        np.concatenate(parts_y, out=self._y[self._size:size])
+        self._size = size
+
+    def to_layer(self):
+        """Returns the layer built so far.
+
+        The result shares memory with the builder rather than copying it, so
+        it stays valid if more layers are added, but keeps the builder's
+        spare capacity allocated.
+
+        Returns:
+            layer: A tuple layer.
+
+        Examples:
+            >>> builder = LayerBuilder()
+            >>> builder.extend([([0., 1.], [0., 0.]), ([2., 3.], [1., 1.])])
+            >>> builder.to_layer()[0]
+            array([ 0.,  1., nan,  2.,  3.])
+        """
+        return self._x[:self._size], self._y[:self._size]
+
+
 def translate(layer, offset):
-    x, y = layer
+    x, y = layer_coordinates(layer)
     x = x.copy() - offset[0]
     y = y.copy() - offset[1]
-    return x, y
+    return replace_coordinates(layer, x, y)
 
 def center(layer):
-    x, y = layer
+    x, y = layer_coordinates(layer)
     x = (x - np.nanmean(x))
     y = (y - np.nanmean(y))
-    return x, y
+    return replace_coordinates(layer, x, y)
 
 def crop(layer, x1, y1, x2, y2):
     x_min = min(x1, x2)
@@ -68,11 +184,13 @@ def crop(layer, x1, y1, x2, y2):
     x_max = max(x1, x2)
     y_max = max(y1, y2)
 
-    x, y = layer
+    x, y = layer_coordinates(layer)
+    mask = np.logical_or.reduce([x > x_max, x < x_min, y > y_max, y < y_min])
+    if isinstance(layer, Layer):
+        return layer.filter(~mask)
+
     x = x.copy()
     y = y.copy()
-
-    mask = np.logical_or.reduce([x > x_max, x < x_min, y > y_max, y < y_min])
     x[mask] = np.nan
     y[mask] = np.nan
     return x,y
@@ -81,6 +199,9 @@ def reverse(layer):
     """
     Reverses the drawing order of a layer
     """
+    if isinstance(layer, Layer):
+        return Layer(layer.points[::-1], layer.num_points - layer.offsets[::-1])
+
     x, y = layer
     x = x.copy()
     y = y.copy()
@@ -93,9 +214,9 @@ def vflip(layer):
     """
     Flips a layer along the mean y-axis
     """
-    x, y = layer
+    x, y = layer_coordinates(layer)
     x = x.copy()
     y = y.copy()
 
     x = -x + 2*np.nanmean(x)
-    return x,y
\ No newline at end of file
+    return replace_coordinates(layer, x, y)
\ No newline at end of file
@@ -2,8 +2,14 @@
 
 The turtle language also includes a "branching" extension that allows the
 turtle to return to a previously remembered state.
+
+Long programs are interpreted with numpy rather than a command at a time
+(see ``vectorized_turtle_to_texture``), with the same result.
 """
 
+from collections import Counter
+from itertools import chain, islice
+
 import numpy as np
 
 DEFAULT_TURN = 45.
@@ -19,6 +25,12 @@ CCW_TURN_COMMAND = '-'
 PUSH_STATE_COMMAND = '['
 POP_STATE_COMMAND = ']'
 
+# Number of points read from a generator at a time by texture_from_generator
+TEXTURE_CHUNK_SIZE = 4096
+
+# Programs at least this long are interpreted with numpy by turtle_to_texture
+VECTORIZED_MIN_LENGTH = 2000
+
 
 def branching_turtle_generator(turtle_program, turn_amount=DEFAULT_TURN,
                                initial_angle=DEFAULT_INITIAL_ANGLE, resolution=1):
@@ -89,20 +101,66 @@ def branching_turtle_generator(turtle_program, turn_amount=DEFAULT_TURN,
             yield (x, y)
 
 
-def texture_from_generator(generator):
+def texture_from_generator(generator, size_hint=None):
     """Convert a generator into a texture.
 
+    Points are read in chunks into a preallocated array, which doubles in
+    size whenever it fills up.
+
     Args:
         generator (generator): a generator of coordinate pairs
+        size_hint (int): if provided, the expected number of points. If it is
+            right, the array is allocated only once.
 
     Returns:
         texture: A texture.
+
+    Examples:
+        >>> texture_from_generator(iter([(0, 0), (1, 2), (3, 4)]), size_hint=2)
+        array([[0., 1., 3.],
+               [0., 2., 4.]])
+    """
+    texture = np.empty((2, max(size_hint or TEXTURE_CHUNK_SIZE, 1)))
+    count = 0
+    while True:
+        chunk = np.fromiter(chain.from_iterable(islice(generator, TEXTURE_CHUNK_SIZE)), float)
+        if not len(chunk):
+            break
+        chunk = chunk.reshape(-1, 2).T
+        if count + chunk.shape[1] > texture.shape[1]:
+            grown = np.empty((2, max(2 * texture.shape[1], count + chunk.shape[1])))
+            grown[:, :count] = texture[:, :count]
+            texture = grown
+        texture[:, count:count + chunk.shape[1]] = chunk
+        count += chunk.shape[1]
+
+    if count < texture.shape[1]:
+        texture = texture[:, :count].copy()
+    return texture
+
+
+def turtle_point_count(turtle_program, resolution=1):
+    """Counts the points ``branching_turtle_generator`` yields for a program.
+
+    Args:
+        turtle_program (str): a string representing the turtle program
+        resolution (int): interpolation amount for visible lines
+
+    Returns:
+        int: the number of points, including separators
+
+    Examples:
+        >>> turtle_point_count('F+F[-aF]F')
+        9
     """
-    return np.array(list(zip(*list(generator))))
+    counts = Counter(turtle_program)
+    visible = sum(counts[command] for command in VISIBLE_FORWARD_COMMANDS)
+    hidden = sum(counts[command] for command in FORWARD_COMMANDS - VISIBLE_FORWARD_COMMANDS)
+    return 1 + visible * resolution + 2 * (hidden + counts[POP_STATE_COMMAND])
 
 
 def turtle_to_texture(turtle_program, turn_amount=DEFAULT_TURN,
-                      initial_angle=DEFAULT_INITIAL_ANGLE, resolution=1):
+                      initial_angle=DEFAULT_INITIAL_ANGLE, resolution=1, vectorized=None):
     """Makes a texture from a turtle program.
 
     Args:
@@ -111,10 +169,185 @@ def turtle_to_texture(turtle_program, turn_amount=DEFAULT_TURN,
         turn_amount (float): amount to turn in degrees
         initial_angle (float): initial orientation of the turtle
         resolution (int): if provided, interpolation amount for visible lines
+        vectorized (bool): whether to use ``vectorized_turtle_to_texture``. By
+            default, it is used for programs of at least
+            ``VECTORIZED_MIN_LENGTH`` characters.
 
     Returns:
         texture: A texture.
     """
+    if vectorized is None:
+        if not isinstance(turtle_program, str):
+            turtle_program = ''.join(turtle_program)
+        vectorized = len(turtle_program) >= VECTORIZED_MIN_LENGTH
+
+    if vectorized:
+        return vectorized_turtle_to_texture(
+            turtle_program, turn_amount, initial_angle, resolution)
+
+    size_hint = None
+    if isinstance(turtle_program, str):
+        size_hint = turtle_point_count(turtle_program, resolution)
     generator = branching_turtle_generator(
         turtle_program, turn_amount, initial_angle, resolution)
-    return texture_from_generator(generator)
+    return texture_from_generator(generator, size_hint)
+
+
+def _command_codes(commands):
+    """Returns the byte value of each character in a string of commands."""
+    return np.array([ord(command) for command in commands], dtype=np.uint8)
+
+
+_FORWARD_CODES = _command_codes(sorted(FORWARD_COMMANDS))
+_VISIBLE_FORWARD_CODES = _command_codes(sorted(VISIBLE_FORWARD_COMMANDS))
+_COMMAND_CODES = _command_codes(sorted(FORWARD_COMMANDS) + [
+    CW_TURN_COMMAND, CCW_TURN_COMMAND, PUSH_STATE_COMMAND, POP_STATE_COMMAND])
+
+
+def _branch_paths(push, pop):
+    """Works out which branch of a turtle program each command moves along.
+
+    A branch runs from a ``[`` to its matching ``]``, leaving out any branches
+    nested in it. The ``[`` and ``]`` themselves belong to the enclosing
+    branch, which carries on from the state the ``]`` restores.
+
+    Args:
+        push (np.array): true for each ``[`` command
+        pop (np.array): true for each ``]`` command
+
+    Returns:
+        tuple: for each command, the index of the ``[`` which opens its
+        branch (or -1 for the trunk), and how deeply that branch is nested
+    """
+    depth = np.cumsum(push, dtype=np.intp) - np.cumsum(pop, dtype=np.intp)
+    if len(depth) and depth.min() < 0:
+        raise IndexError('pop from empty list')
+
+    # The depth of the branch each command belongs to
+    level = depth - push
+    opens = np.flatnonzero(push)
+    paths = np.full(len(depth), -1, dtype=np.intp)
+    for branch_level in np.unique(level[level > 0]):
+        # A command belongs to the last branch opened at its depth.
+        level_opens = opens[depth[opens] == branch_level]
+        members = np.flatnonzero(level == branch_level)
+        paths[members] = level_opens[np.searchsorted(level_opens, members) - 1]
+    return paths, level
+
+
+def _accumulate(start, steps, lengths):
+    """Adds steps to start values one at a time, for several runs of steps.
+
+    Each run is summed along a row of a padded array, so the sums are made in
+    the same order as adding the steps one at a time.
+
+    Args:
+        start (np.array): the start value of each run
+        steps (np.array): the steps of every run, one run after another
+        lengths (np.array): the number of steps in each run
+
+    Returns:
+        tuple: the value before and after each step
+    """
+    filled = np.arange(lengths.max()) < lengths[:, np.newaxis]
+    values = np.zeros((len(lengths), filled.shape[1] + 1))
+    values[:, 0] = start
+    values[:, 1:][filled] = steps
+    values = np.cumsum(values, axis=1)
+    return values[:, :-1][filled], values[:, 1:][filled]
+
+
+def vectorized_turtle_to_texture(turtle_program, turn_amount=DEFAULT_TURN,
+                                 initial_angle=DEFAULT_INITIAL_ANGLE, resolution=1):
+    """Makes a texture from a turtle program, like ``turtle_to_texture``, with
+    numpy.
+
+    The headings of the turtle are a cumulative sum of its turns, and its
+    positions a cumulative sum of its steps. A branch starts from the state
+    at its ``[``, and the enclosing branch carries on after the ``]`` as if
+    it had not happened, so each branch is summed on its own. Values are
+    summed in the same order as by ``branching_turtle_generator``, so the
+    texture is exactly the same.
+
+    Args:
+        turtle_program (str): a string representing the turtle program; see the
+            docstring of `branching_turtle_generator` for more details
+        turn_amount (float): amount to turn in degrees
+        initial_angle (float): initial orientation of the turtle. As in
+            ``branching_turtle_generator``, this is currently ignored.
+        resolution (int): if provided, interpolation amount for visible lines
+
+    Returns:
+        texture: A texture.
+
+    Examples:
+        >>> program = 'F+F[-aF]F'
+        >>> bool(np.array_equal(vectorized_turtle_to_texture(program),
+        ...                     turtle_to_texture(program, vectorized=False), equal_nan=True))
+        True
+    """
+    if not isinstance(turtle_program, str):
+        turtle_program = ''.join(turtle_program)
+    codes = np.frombuffer(turtle_program.encode('utf-8'), dtype=np.uint8)
+    codes = codes[np.isin(codes, _COMMAND_CODES)]
+
+    forward = np.isin(codes, _FORWARD_CODES)
+    visible = np.isin(codes, _VISIBLE_FORWARD_CODES)
+    push = codes == ord(PUSH_STATE_COMMAND)
+    pop = codes == ord(POP_STATE_COMMAND)
+    turns = np.zeros(len(codes))
+    turns[codes == ord(CW_TURN_COMMAND)] = turn_amount
+    turns[codes == ord(CCW_TURN_COMMAND)] = -turn_amount
+
+    # Group the commands by branch. Each branch is opened within the one
+    # enclosing it, so the enclosing branch comes first.
+    paths, levels = _branch_paths(push, pop)
+    order = np.argsort(paths, kind='stable')
+    path_ids, path_starts = np.unique(paths[order], return_index=True)
+    lengths = np.diff(np.append(path_starts, len(order)))
+
+    # Branches are summed together, a nesting level at a time so that each
+    # starts from a known state. Branches of similar length are summed in
+    # the same array, to limit the padding.
+    groups = levels[order[path_starts]] * 64 + np.log2(lengths).astype(np.intp)
+
+    angles = np.empty(len(codes))
+    x_before = np.empty(len(codes))
+    y_before = np.empty(len(codes))
+    x_after = np.empty(len(codes))
+    y_after = np.empty(len(codes))
+    for group in np.unique(groups):
+        selected = groups == group
+        group_paths = path_ids[selected]
+        group_lengths = lengths[selected]
+        filled = np.arange(group_lengths.max()) < group_lengths[:, np.newaxis]
+        members = order[(path_starts[selected, np.newaxis] + np.arange(filled.shape[1]))[filled]]
+
+        trunk = group_paths < 0
+        parents = np.where(trunk, 0, group_paths)
+        start_angles = np.where(trunk, DEFAULT_INITIAL_ANGLE, angles[parents])
+        _, angles[members] = _accumulate(start_angles, turns[members], group_lengths)
+
+        radians = np.radians(angles[members])
+        moves = forward[members]
+        x_before[members], x_after[members] = _accumulate(
+            np.where(trunk, 0., x_after[parents]),
+            np.where(moves, -np.cos(radians), 0.), group_lengths)
+        y_before[members], y_after[members] = _accumulate(
+            np.where(trunk, 0., y_after[parents]),
+            np.where(moves, np.sin(radians), 0.), group_lengths)
+
+    # Lay out the points yielded for each command after the first point.
+    jumps = (forward & ~visible) | pop
+    counts = np.where(visible, resolution, 0) + np.where(jumps, 2, 0)
+    offsets = 1 + np.cumsum(counts) - counts
+    texture = np.zeros((2, 1 + counts.sum()))
+
+    fractions = 1 - np.flipud(np.linspace(0, 1, resolution, False))
+    positions = offsets[visible, np.newaxis] + np.arange(resolution)
+    for axis, before, after in ((0, x_before, x_after), (1, y_before, y_after)):
+        start = before[visible, np.newaxis]
+        texture[axis, positions] = start + fractions * (after[visible, np.newaxis] - start)
+        texture[axis, offsets[jumps]] = np.nan
+        texture[axis, offsets[jumps] + 1] = after[jumps]
+    return texture
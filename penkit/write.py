@@ -1,6 +1,17 @@
-import xml.etree.ElementTree as ET
+import gzip
+import logging
+import multiprocessing
+from collections import deque
+from io import StringIO
+from xml.sax.saxutils import escape
+
 import numpy as np
 
+from penkit.layer import ChunkedLayer, Layer, layer_bounds
+from penkit.simplify import simplify_plot
+
+logger = logging.getLogger(__name__)
+
 # Landscape Letter
 DEFAULT_PAGE_WIDTH = 11
 DEFAULT_PAGE_HEIGHT = 8.5
@@ -11,24 +22,21 @@ STROKE_THICKNESS_PCT = 0.003
 DEFAULT_VIEW_BOX_MARGIN = 0.1
 PLOT_COLORS = ['black', 'red', 'green', 'blue', 'cyan', 'orange']
 
+# Number of points formatted at a time when streaming path data
+DEFAULT_CHUNK_SIZE = 100000
 
-def calculate_view_box(layers, aspect_ratio, margin=DEFAULT_VIEW_BOX_MARGIN):
-    """Calculates the size of the SVG viewBox to use.
 
-    Args:
-        layers (list): the layers in the image
-        aspect_ratio (float): the height of the output divided by the width
-        margin (float): minimum amount of buffer to add around the image, relative
-            to the total dimensions
+def _view_box_from_bounds(bounds, aspect_ratio, margin=DEFAULT_VIEW_BOX_MARGIN):
+    """Calculates the SVG viewBox for a list of per-layer bounds.
 
-    Returns:
-        tuple: a 4-tuple of floats representing the viewBox according to SVG
-            specifications ``(x, y, width, height)``.
+    See ``calculate_view_box`` for details. Empty layers, whose bounds are
+    ``nan``, are left out.
     """
-    min_x = min(np.nanmin(x) for x, y in layers)
-    max_x = max(np.nanmax(x) for x, y in layers)
-    min_y = min(np.nanmin(y) for x, y in layers)
-    max_y = max(np.nanmax(y) for x, y in layers)
+    bounds = [b for b in bounds if not np.isnan(b).any()] or [(0., 0., 0., 0.)]
+    min_x = min(b[0] for b in bounds)
+    max_x = max(b[1] for b in bounds)
+    min_y = min(b[2] for b in bounds)
+    max_y = max(b[3] for b in bounds)
     height = max_y - min_y
     width = max_x - min_x
 
@@ -50,81 +58,442 @@ def calculate_view_box(layers, aspect_ratio, margin=DEFAULT_VIEW_BOX_MARGIN):
     )
 
 
-def _layer_to_path_gen(layer):
-    """Generates an SVG path from a given layer.
+def calculate_view_box(layers, aspect_ratio, margin=DEFAULT_VIEW_BOX_MARGIN):
+    """Calculates the size of the SVG viewBox to use.
+
+    Args:
+        layers (list): the layers in the image
+        aspect_ratio (float): the height of the output divided by the width
+        margin (float): minimum amount of buffer to add around the image, relative
+            to the total dimensions
+
+    Returns:
+        tuple: a 4-tuple of floats representing the viewBox according to SVG
+            specifications ``(x, y, width, height)``.
+    """
+    return _view_box_from_bounds(
+        [layer_bounds(layer) for layer in layers], aspect_ratio, margin)
+
+
+def _flipped_view_box(plot, aspect_ratio):
+    """Calculates the viewBox of a plot as it is drawn, with the y axis
+    pointing down."""
+    # SVG's y axis points down, so the plot is flipped vertically on output.
+    bounds = []
+    for layer in plot:
+        min_x, max_x, min_y, max_y = layer_bounds(layer)
+        bounds.append((min_x, max_x, -max_y, -min_y))
+    return _view_box_from_bounds(bounds, aspect_ratio=aspect_ratio)
+
+
+def plot_scale(plot, width, height):
+    """Returns the number of plot units per page unit when a plot is written
+    at the given page size.
+
+    This converts physical distances on the page, such as a pen width, into
+    the coordinates of the plot.
+
+    Args:
+        plot (list): the layers in the image
+        width (float): the width of the page
+        height (float): the height of the page
+
+    Returns:
+        float: the size of one page unit in plot units
+    """
+    return calculate_view_box(plot, aspect_ratio=height / width)[2] / width
+
+
+def _coordinate_strings(values):
+    """Formats coordinates as the shortest strings which round-trip in their
+    own precision, so ``float32`` values are not written with the digits of
+    their ``float64`` expansion."""
+    if values.dtype.kind == 'f' and values.dtype != np.float64:
+        return values.astype(str).tolist()
+    return map(str, values.tolist())
+
+
+def _format_path_data(x, y, starts):
+    """Formats points as SVG path data.
+
+    Args:
+        x (np.array): x coordinates of the points, without separators
+        y (np.array): y coordinates of the points, without separators
+        starts (np.array): boolean mask of the points which begin a new subpath
+
+    Returns:
+        str: path data with one ``M`` or ``L`` command per point
+    """
+    parts = [None] * (3 * len(starts))
+    parts[0::3] = np.where(starts, 'M', 'L').tolist()
+    parts[1::3] = _coordinate_strings(x)
+    parts[2::3] = _coordinate_strings(y)
+    return ' '.join(parts)
+
+
+def _quantization_step(view_box, precision):
+    """Returns the grid that compact path data is rounded to.
+
+    Args:
+        view_box (tuple): the viewBox of the image
+        precision (float): the largest acceptable step, relative to the width
+            of the viewBox
+
+    Returns:
+        float: a power of ten no larger than ``precision`` times the width
+    """
+    return 10. ** np.floor(np.log10(view_box[2] * precision))
+
+
+def _format_number(value, decimals):
+    """Formats a number as briefly as SVG allows (e.g. ``-.5`` for ``-0.50``)."""
+    # Adding zero turns negative zeros (from rounding) into positive ones.
+    text = '%.*f' % (decimals, value + 0.)
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text.startswith('0.'):
+        return text[1:]
+    if text.startswith('-0.'):
+        return '-' + text[2:]
+    return text
+
+
+def _format_compact_path_data(x, y, starts, step, previous=(0., 0.)):
+    """Formats points as compact SVG path data.
+
+    Coordinates are rounded to multiples of ``step`` and written relative to
+    the previous point. Every subpath is a single ``m`` command whose
+    additional coordinate pairs are implicit ``l`` commands. Points which
+    round onto the point before them are dropped, and separators are only
+    written where they are needed to tell two numbers apart.
+
+    Args:
+        x (np.array): x coordinates of the points, without separators
+        y (np.array): y coordinates of the points, without separators
+        starts (np.array): boolean mask of the points which begin a new subpath
+        step (float): the rounding grid, a power of ten
+        previous (pair): the rounded position preceding the first point, in
+            multiples of ``step``
+
+    Returns:
+        str: the path data. It can be appended directly to the path data
+        of the preceding points.
+    """
+    quantized_x = np.round(x / step)
+    quantized_y = np.round(y / step)
+    dx = np.diff(np.concatenate([[previous[0]], quantized_x]))
+    dy = np.diff(np.concatenate([[previous[1]], quantized_y]))
+
+    keep = starts | (dx != 0) | (dy != 0)
+    dx, dy, starts = dx[keep], dy[keep], starts[keep]
+    count = len(starts)
+    if not count:
+        return ''
+
+    # Relative coordinates repeat a lot, so each distinct value is only
+    # formatted once.
+    decimals = max(0, -int(round(np.log10(step))))
+    values, index = np.unique(np.concatenate([dx, dy]), return_inverse=True)
+    text = [_format_number(value, decimals) for value in (values * step).tolist()]
+    table = np.array(text, dtype=object)
+    lead = np.array([t[0] for t in text])
+    dotted = np.array(['.' in t for t in text], dtype=bool)
+    x_index, y_index = index[:count], index[count:]
+
+    # A separator is needed unless the next number starts with a sign, or
+    # starts with a decimal point while the previous number already has one.
+    x_lead, y_lead = lead[x_index], lead[y_index]
+    x_dotted, y_dotted = dotted[x_index], dotted[y_index]
+    y_dotted_before = np.concatenate([[False], y_dotted[:-1]])
+    x_separator = np.where(
+        starts, 'm',
+        np.where((x_lead == '-') | (y_dotted_before & (x_lead == '.')), '', ' '))
+    y_separator = np.where((y_lead == '-') | (x_dotted & (y_lead == '.')), '', ' ')
+
+    parts = [None] * (4 * count)
+    parts[0::4] = x_separator.tolist()
+    parts[1::4] = table[x_index].tolist()
+    parts[2::4] = y_separator.tolist()
+    parts[3::4] = table[y_index].tolist()
+    return ''.join(parts)
+
+
+def _iter_path_chunks(layer, chunk_size=DEFAULT_CHUNK_SIZE, flip=False):
+    """Splits a layer into chunks of points ready to be formatted.
+
+    Args:
+        layer (layer): the layer to split, as a tuple, ``Layer`` or
+            ``ChunkedLayer``
+        chunk_size (int): the number of layer points to process at a time
+        flip (bool): if true, the y axis is negated
+
+    Returns:
+        generator: ``(x, y, starts)`` arrays for each chunk, as accepted by
+            ``_format_path_data``.
+    """
+    if isinstance(layer, ChunkedLayer):
+        return _iter_chunked_layer_chunks(layer, chunk_size, flip)
+    if isinstance(layer, Layer):
+        return _iter_layer_chunks(layer, chunk_size, flip)
+    return _iter_tuple_chunks(layer, chunk_size, flip)
+
+
+def _iter_chunked_layer_chunks(layer, chunk_size, flip):
+    """Splits each chunk of a ``ChunkedLayer``; see ``_iter_path_chunks``."""
+    for chunk in layer.chunks():
+        for path_chunk in _iter_path_chunks(chunk, chunk_size, flip):
+            yield path_chunk
+
+
+def _iter_layer_chunks(layer, chunk_size, flip):
+    """Splits a ``Layer`` into chunks; see ``_iter_path_chunks``."""
+    for points, starts in layer.iter_chunks(chunk_size):
+        y = points[:, 1]
+        if flip:
+            y = -y
+        yield points[:, 0], y, starts
+
+
+def _iter_tuple_chunks(layer, chunk_size, flip):
+    """Splits a tuple layer into chunks; see ``_iter_path_chunks``."""
+    x, y = (np.asarray(axis) for axis in layer)
+    previous_visible = False
+
+    for begin in range(0, len(x), chunk_size):
+        chunk_x = x[begin:begin + chunk_size]
+        chunk_y = y[begin:begin + chunk_size]
+        visible = ~(np.isnan(chunk_x) | np.isnan(chunk_y))
+
+        # A visible point starts a subpath unless the point before it is visible.
+        starts = visible.copy()
+        starts[0] &= not previous_visible
+        starts[1:] &= ~visible[:-1]
+        previous_visible = visible[-1]
+
+        chunk_y = chunk_y[visible]
+        if flip:
+            chunk_y = -chunk_y
+        yield chunk_x[visible], chunk_y, starts[visible]
+
+
+def _iter_path_tasks(layer, chunk_size=DEFAULT_CHUNK_SIZE, flip=False, step=None):
+    """Splits the formatting of a layer's path data into independent tasks.
 
     Args:
         layer (layer): the layer to convert
+        chunk_size (int): the number of layer points in each task
+        flip (bool): if true, the y axis is negated
+        step (float): if provided, write compact path data rounded to this
+            grid (see ``_format_compact_path_data``)
 
     Yields:
-        str: the next component of the path
+        tuple: arguments for ``_format_path_task``. Formatting the tasks and
+        concatenating the results in order gives the layer's path data.
     """
-    draw = False
-    for x, y in zip(*layer):
-        if np.isnan(x) or np.isnan(y):
-            draw = False
-        elif not draw:
-            yield 'M {} {}'.format(x, y)
-            draw = True
-        else:
-            yield 'L {} {}'.format(x, y)
+    separator = ''
+    previous = (0., 0.)
+    for x, y, starts in _iter_path_chunks(layer, chunk_size, flip):
+        if not len(starts):
+            continue
+        yield x, y, starts, separator, step, previous
+        separator = ' '
+        if step is not None:
+            previous = (np.round(x[-1] / step), np.round(y[-1] / step))
+
+
+def _format_path_task(task):
+    """Formats the path data for a task from ``_iter_path_tasks``."""
+    x, y, starts, separator, step, previous = task
+    if step is None:
+        return separator + _format_path_data(x, y, starts)
+    return _format_compact_path_data(x, y, starts, step, previous)
+
+
+def _imap_ordered(pool, function, iterable, max_pending):
+    """Like ``pool.imap``, but never holds more than ``max_pending`` items of
+    ``iterable`` at a time."""
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.apply_async(function, (item,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _max_path_tasks(plot, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Counts the most tasks ``_iter_path_tasks`` can give for the layers of
+    a plot, or returns None if that is not known without reading them (as for
+    ``penkit.layer.ChunkedLayer``)."""
+    total = 0
+    for layer in plot:
+        if isinstance(layer, ChunkedLayer):
+            return None
+        size = layer.num_points if isinstance(layer, Layer) else len(layer[0])
+        total += -(-size // chunk_size)
+    return total
+
+
+def _iter_path_data(layer, chunk_size=DEFAULT_CHUNK_SIZE, flip=False, step=None,
+                    pool=None, workers=1):
+    """Generates the SVG path data for a layer piece by piece.
+
+    Args:
+        layer (layer): the layer to convert
+        chunk_size (int): the number of layer points to format at a time
+        flip (bool): if true, the y axis is negated
+        step (float): if provided, write compact path data rounded to this
+            grid (see ``_format_compact_path_data``)
+        pool (multiprocessing.Pool): if provided, chunks are formatted in
+            this pool of ``workers`` processes
+
+    Returns:
+        iterable: the pieces of the path data, in order
+    """
+    tasks = _iter_path_tasks(layer, chunk_size, flip, step)
+    if pool is None:
+        return (_format_path_task(task) for task in tasks)
+    return _imap_ordered(pool, _format_path_task, tasks, 2 * workers)
 
 
 def layer_to_path(layer):
     """Generates an SVG path from a given layer.
 
     Args:
-        layer (layer): the layer to convert
+        layer (layer): the layer to convert, as a tuple or a ``Layer``
 
     Returns:
         str: an SVG path
+
+    Examples:
+        Coordinates are written as briefly as their type allows:
+
+        >>> layer = (np.array([.1, .2], np.float32), np.array([.3, .4], np.float32))
+        >>> layer_to_path(layer)
+        'M 0.1 0.3 L 0.2 0.4'
+        >>> layer_to_path(Layer.from_tuple(layer))
+        'M 0.1 0.3 L 0.2 0.4'
+
+        Each run of separators starts a new polyline, and the output does not
+        depend on how many points are formatted at a time:
+
+        >>> layer = (np.array([np.nan, 0., 1., np.nan, np.nan, 2.]),
+        ...          np.array([np.nan, 0., 1., np.nan, np.nan, 3.]))
+        >>> layer_to_path(layer)
+        'M 0.0 0.0 L 1.0 1.0 M 2.0 3.0'
+        >>> ''.join(_iter_path_data(layer, chunk_size=2)) == layer_to_path(layer)
+        True
     """
-    return ' '.join(_layer_to_path_gen(layer))
+    return ''.join(_iter_path_data(layer))
 
 
-def plot_to_svg(plot, width, height, unit='', stroke_thickness_pct=STROKE_THICKNESS_PCT):
-    """Converts a plot (list of layers) into an SVG document.
+def _quote(value):
+    """Escapes a value for use in a double-quoted XML attribute."""
+    return escape('{}'.format(value), {'"': '&quot;', '\n': '&#10;'})
+
+
+def write_svg(plot, outfile, width, height, unit='',
+              stroke_thickness_pct=STROKE_THICKNESS_PCT, simplify=None,
+              precision=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Writes a plot (list of layers) as an SVG document to a file object.
+
+    The document is written incrementally, so apart from the plot itself memory
+    use depends only on ``chunk_size``, not on the number of points. Layers
+    may be ``penkit.layer.ChunkedLayer`` objects, which are streamed a chunk
+    at a time (and read twice if their bounds are not known), so the plot
+    need not fit in memory either.
 
     Args:
         plot (list): list of layers that make up the plot
+        outfile (file): a text file object to write to
         width (float): the width of the resulting image
         height (float): the height of the resulting image
         unit (str): the units of the resulting image if not pixels
-
-    Returns:
-        str: A stringified XML document representing the image
+        simplify (float): if provided, remove points that deviate less than
+            this distance (in ``unit``) from the simplified lines
+        precision (float): if provided, round coordinates to this fraction of
+            the image width (or finer, to the next power of ten) and write
+            them as compact relative path commands
+        workers (int): if greater than one, format path data in a pool of
+            this many processes, or fewer if the plot has fewer chunks. The
+            output is the same as without workers.
+        chunk_size (int): the number of points to format at a time
+
+    Examples:
+        >>> plot = [(np.arange(5.), np.array([0., 1., np.nan, 2., 3.]))]
+        >>> serial, parallel = StringIO(), StringIO()
+        >>> write_svg(plot, serial, 11, 8.5, chunk_size=2)
+        >>> write_svg(plot, parallel, 11, 8.5, workers=2, chunk_size=2)
+        >>> serial.getvalue() == parallel.getvalue()
+        True
     """
-    flipped_plot = [(x, -y) for x, y in plot]
-    aspect_ratio = height / width
-    view_box = calculate_view_box(flipped_plot, aspect_ratio=aspect_ratio)
+    view_box = _flipped_view_box(plot, aspect_ratio=height / width)
     view_box_str = '{} {} {} {}'.format(*view_box)
     stroke_thickness = stroke_thickness_pct * (view_box[2])
 
-    svg = ET.Element('svg', attrib={
-        'xmlns': 'http://www.w3.org/2000/svg',
-        'xmlns:inkscape': 'http://www.inkscape.org/namespaces/inkscape',
-        'width': '{}{}'.format(width, unit),
-        'height': '{}{}'.format(height, unit),
-        'viewBox': view_box_str})
-
-    for i, layer in enumerate(flipped_plot):
-        group = ET.SubElement(svg, 'g', attrib={
-            'inkscape:label': '{}-layer'.format(i),
-            'inkscape:groupmode': 'layer',
-        })
-
-        color = PLOT_COLORS[i % len(PLOT_COLORS)]
-        ET.SubElement(group, 'path', attrib={
-            'style': 'stroke-width: {}; stroke: {};'.format(stroke_thickness, color),
-            'fill': 'none',
-            'd': layer_to_path(layer)
-        })
-
+    if simplify:
+        # The view box spans the page width, which gives the page scale.
+        plot, removed = simplify_plot(plot, simplify, scale=view_box[2] / width)
+        logger.info('Simplification removed %d points', removed)
+
+    step = None if precision is None else _quantization_step(view_box, precision)
+
+    outfile.write(
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        'xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape" '
+        'width="{}" height="{}" viewBox="{}">'.format(
+            _quote('{}{}'.format(width, unit)),
+            _quote('{}{}'.format(height, unit)),
+            _quote(view_box_str)))
+
+    # A pool only pays off if each worker has a chunk to format.
+    max_tasks = _max_path_tasks(plot, chunk_size)
+    if workers and max_tasks is not None:
+        workers = min(workers, max_tasks)
+    pool = multiprocessing.Pool(workers) if workers and workers > 1 else None
     try:
-        return ET.tostring(svg, encoding='unicode')
-    except LookupError:
-        # Python 2.x
-        return ET.tostring(svg)
+        for i, layer in enumerate(plot):
+            color = PLOT_COLORS[i % len(PLOT_COLORS)]
+            outfile.write(
+                '<g inkscape:label="{}-layer" inkscape:groupmode="layer">'
+                '<path style="{}" fill="none" d="'.format(
+                    i, _quote('stroke-width: {}; stroke: {};'.format(stroke_thickness, color))))
+
+            for data in _iter_path_data(layer, chunk_size, flip=True, step=step,
+                                        pool=pool, workers=workers):
+                outfile.write(data)
+
+            outfile.write('" /></g>')
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    outfile.write('</svg>')
+
+
+def plot_to_svg(plot, width, height, unit='', stroke_thickness_pct=STROKE_THICKNESS_PCT,
+                simplify=None, precision=None, workers=None):
+    """Converts a plot (list of layers) into an SVG document.
+
+    Args:
+        plot (list): list of layers that make up the plot
+        width (float): the width of the resulting image
+        height (float): the height of the resulting image
+        unit (str): the units of the resulting image if not pixels
+        simplify (float): if provided, the tolerance (in ``unit``) used to
+            simplify the plot's lines before output
+        precision (float): if provided, write compact path data rounded to
+            this fraction of the image width
+        workers (int): if greater than one, the number of processes used to
+            format path data
+
+    Returns:
+        str: A stringified XML document representing the image
+    """
+    svg = StringIO()
+    write_svg(plot, svg, width, height, unit, stroke_thickness_pct=stroke_thickness_pct,
+              simplify=simplify, precision=precision, workers=workers)
+    return svg.getvalue()
 
 
 def layer_to_svg(layer, **kwargs):
@@ -145,16 +514,36 @@ def layer_to_svg(layer, **kwargs):
 
 
 def write_plot(plot, filename, width=DEFAULT_PAGE_WIDTH, height=DEFAULT_PAGE_HEIGHT, 
-    unit=DEFAULT_PAGE_UNIT, stroke_thickness_pct=STROKE_THICKNESS_PCT):
+    unit=DEFAULT_PAGE_UNIT, stroke_thickness_pct=STROKE_THICKNESS_PCT, compress=None,
+    simplify=None, precision=None, workers=None):
     """Writes a plot SVG to a file.
 
+    The SVG is streamed to disk as it is generated rather than built in memory.
+
     Args:
         plot (list): a list of layers to plot
         filename (str): the name of the file to write
         width (float): the width of the output SVG
         height (float): the height of the output SVG
         unit (str): the unit of the height and width
+        compress (bool): if true, write gzip-compressed SVG. By default, output
+            is compressed if the filename ends in ``.svgz``.
+        simplify (float): if provided, the tolerance (in ``unit``) used to
+            simplify the plot's lines before output. The number of points
+            removed is logged.
+        precision (float): if provided, write compact path data rounded to
+            this fraction of the image width (e.g. ``1e-4``)
+        workers (int): if greater than one, the number of processes used to
+            format path data
     """
-    svg = plot_to_svg(plot, width, height, unit, stroke_thickness_pct=stroke_thickness_pct)
-    with open(filename, 'w') as outfile:
-        outfile.write(svg)
+    if compress is None:
+        compress = filename.lower().endswith('.svgz')
+
+    if compress:
+        outfile = gzip.open(filename, 'wt')
+    else:
+        outfile = open(filename, 'w')
+
+    with outfile:
+        write_svg(plot, outfile, width, height, unit, stroke_thickness_pct=stroke_thickness_pct,
+                  simplify=simplify, precision=precision, workers=workers)
@@ -7,4 +7,15 @@ setup(name='penkit',
       author_email='penkit@paulbutler.org',
       url='https://github.com/paulgb/penkit',
       packages=['penkit', 'penkit.textures', 'penkit.fractal'],
+      python_requires='>=3.6',
+      classifiers=[
+          'Programming Language :: Python :: 3',
+          'Programming Language :: Python :: 3 :: Only',
+          'Programming Language :: Python :: 3.6',
+          'Programming Language :: Python :: 3.7',
+          'Programming Language :: Python :: 3.8',
+      ],
+      entry_points={
+          'console_scripts': ['penkit-batch=penkit.batch:main'],
+      },
 )